@@ -10,7 +10,8 @@ resource "google_app_engine_standard_app_version" "default" {
   version_id      = "v1"
   runtime         = "python39"
   entrypoint {
-    shell = "gunicorn -b :$PORT main:app"
+    # One threaded process per instance, as in app.yaml
+    shell = "gunicorn -b :$PORT --worker-class gthread --workers 1 --threads 16 main:app"
   }
   deployment {
     zip {
@@ -22,8 +23,21 @@ resource "google_app_engine_standard_app_version" "default" {
     DB_USER     = "lookmyshow_app"
     DB_PASSWORD = "{{resolve:secretmanager:lookmyshow-db-password:latest}}"
     DB_NAME     = "eventsdb"
+    # No /api/stream on the buffering standard runtime (see app.yaml)
+    STREAM_MAX_CLIENTS = "0"
+  }
+  # Scale on concurrent requests and queueing (as in app.yaml): the API is I/O-bound, so CPU rises last
+  automatic_scaling {
+    max_concurrent_requests = 8
+    min_pending_latency     = "0.030s"
+    max_pending_latency     = "0.100s"
+    standard_scheduler_settings {
+      target_cpu_utilization        = 0.6
+      target_throughput_utilization = 0.7
+      min_instances                 = 1
+      max_instances                 = 10
+    }
   }
-  automatic_scaling {}
   noop_on_destroy = true
   depends_on = [google_app_engine_application.app]
 } 
\ No newline at end of file
@@ -2,107 +2,283 @@
 """
 Infrastructure deployment script for LookMyShow three-tier architecture
 This script helps deploy the application to GCP
+
+Deployment steps form a dependency graph; steps whose dependencies are done
+run at the same time, each command's output is streamed with the step name
+as prefix, and the first failure cancels everything still pending.
+
+Deploys are incremental: each resource is looked up first and only created
+or updated when it is missing or its inputs changed since the last deploy
+(content hashes in the state file). ``--plan`` shows what would change.
+
+Usage:
+    python deploy.py [--plan] [--force] [--state-file PATH]
 """
 
+import argparse
+import hashlib
 import os
 import sys
 import subprocess
 import json
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
-class GCPDeployer:
-    def __init__(self):
-        self.project_id = os.getenv('GCP_PROJECT_ID')
-        self.region = os.getenv('GCP_REGION', 'us-central1')
-        self.zone = os.getenv('GCP_ZONE', 'us-central1-a')
-        
-    def check_prerequisites(self):
-        """Check if required tools are installed"""
-        required_tools = ['gcloud', 'docker']
-        missing_tools = []
-        
-        for tool in required_tools:
-            try:
-                subprocess.run([tool, '--version'], 
-                             capture_output=True, check=True)
-                print(f"✓ {tool} is installed")
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                missing_tools.append(tool)
-                print(f"✗ {tool} is not installed")
-        
-        if missing_tools:
-            print(f"\nPlease install missing tools: {', '.join(missing_tools)}")
-            return False
-        
-        return True
-    
-    def create_cloud_sql_instance(self):
-        """Create Cloud SQL instance for data tier"""
-        print("\n🗄️  Creating Cloud SQL instance...")
-        
-        instance_name = "lookmyshow-db"
-        
-        cmd = [
-            'gcloud', 'sql', 'instances', 'create', instance_name,
-            '--database-version=MYSQL_8_0',
-            '--tier=db-f1-micro',
-            '--region=' + self.region,
-            '--storage-size=10GB',
-            '--storage-type=SSD'
-        ]
-        
+class StepFailed(Exception):
+    """A deployment step could not complete"""
+
+class StepCancelled(StepFailed):
+    """A step was stopped because another step failed"""
+
+@dataclass
+class Step:
+    """One node of the deployment graph"""
+    name: str
+    action: Callable[[], object]
+    needs: Tuple[str, ...] = ()
+
+@dataclass
+class StepResult:
+    name: str
+    status: str = "pending"  # ok, failed, cancelled or skipped
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+def order_steps(steps: Sequence[Step]) -> List[Step]:
+    """Steps in a valid execution order; raises ValueError on unknown dependencies or cycles"""
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        unknown = [need for need in step.needs if need not in by_name]
+        if unknown:
+            raise ValueError(f"Step '{step.name}' depends on unknown step(s): {', '.join(unknown)}")
+    ordered, done = [], set()
+    remaining = list(steps)
+    while remaining:
+        ready = [step for step in remaining if set(step.needs) <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(s.name for s in remaining)}")
+        for step in ready:
+            ordered.append(step)
+            done.add(step.name)
+            remaining.remove(step)
+    return ordered
+
+class CommandRunner:
+    """Runs commands for steps, streaming their output prefixed with the step name
+
+    Every running process is tracked so a failure elsewhere can stop it.
+    """
+
+    def __init__(self, out=None):
+        self.out = out
+        self.cancelled = threading.Event()
+        self._print_lock = threading.Lock()
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.width = 12
+
+    @property
+    def step(self) -> str:
+        return getattr(self._local, "step", "deploy")
+
+    @step.setter
+    def step(self, name: str):
+        self._local.step = name
+
+    def say(self, message: str):
+        with self._print_lock:
+            print(f"[{self.step:<{self.width}}] {message}", file=self.out or sys.stdout, flush=True)
+
+    def run(self, cmd: List[str], cwd: Optional[str] = None, allow_failure: bool = False,
+            quiet: bool = False) -> Tuple[int, str]:
+        """Run ``cmd`` to completion; raises StepFailed on a non-zero exit unless ``allow_failure``
+
+        ``quiet`` captures the output without streaming it (describe calls).
+        """
+        if self.cancelled.is_set():
+            raise StepCancelled("cancelled before start")
         try:
-            subprocess.run(cmd, check=True)
-            print(f"✓ Cloud SQL instance '{instance_name}' created")
-            
-            # Create database
-            subprocess.run([
-                'gcloud', 'sql', 'databases', 'create', 'eventsdb',
-                '--instance=' + instance_name
-            ], check=True)
-            print("✓ Database 'eventsdb' created")
-            
-            return instance_name
-        except subprocess.CalledProcessError as e:
-            print(f"✗ Failed to create Cloud SQL instance: {e}")
-            return None
-    
-    def deploy_app_engine(self):
-        """Deploy application tier to App Engine"""
-        print("\n🚀 Deploying to App Engine...")
-        
-        # Create app.yaml
-        app_yaml_content = """
-runtime: python39
-
-env_variables:
-  DB_HOST: "127.0.0.1"
-  DB_USER: "root"
-  DB_PASSWORD: "your-db-password"
-  DB_NAME: "eventsdb"
-  
-automatic_scaling:
-  min_instances: 1
-  max_instances: 10
-"""
-        
-        with open('../website/app.yaml', 'w') as f:
-            f.write(app_yaml_content.strip())
-        
+            process = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, bufsize=1)
+        except FileNotFoundError as e:
+            raise StepFailed(f"{cmd[0]} not found") from e
+        with self._lock:
+            self._processes[process.pid] = process
+        output = []
         try:
-            subprocess.run(['gcloud', 'app', 'deploy', '../website/app.yaml'], 
-                         check=True, cwd=os.getcwd())
-            print("✓ Application deployed to App Engine")
-        except subprocess.CalledProcessError as e:
-            print(f"✗ Failed to deploy to App Engine: {e}")
-    
-    def create_compute_engine_vm(self):
-        """Create Compute Engine VM for presentation tier"""
-        print("\n💻 Creating Compute Engine VM...")
-        
-        vm_name = "lookmyshow-frontend"
-        
-        startup_script = """#!/bin/bash
+            for line in process.stdout:
+                output.append(line)
+                if not quiet:
+                    self.say(line.rstrip())
+            returncode = process.wait()
+        finally:
+            with self._lock:
+                self._processes.pop(process.pid, None)
+        if self.cancelled.is_set() and returncode != 0:
+            raise StepCancelled(f"{' '.join(cmd[:4])} stopped")
+        if returncode != 0 and not allow_failure:
+            raise StepFailed(f"{' '.join(cmd[:4])} exited with {returncode}")
+        return returncode, "".join(output)
+
+    def cancel(self):
+        """Stop every running command and refuse to start new ones"""
+        self.cancelled.set()
+        with self._lock:
+            processes = list(self._processes.values())
+        for process in processes:
+            process.terminate()
+
+class StepRunner:
+    """Executes a step graph with up to ``max_workers`` steps at once, failing fast"""
+
+    def __init__(self, steps: Sequence[Step], commands: CommandRunner, max_workers: int = 4):
+        self.steps = order_steps(steps)
+        self.commands = commands
+        self.max_workers = max_workers
+        self.commands.width = max([len(s.name) for s in self.steps] + [6])
+
+    def _execute(self, step: Step, result: StepResult):
+        self.commands.step = step.name
+        result.started = time.monotonic()
+        try:
+            step.action()
+            result.status = "ok"
+        except StepCancelled as e:
+            result.status, result.error = "cancelled", str(e)
+        except Exception as e:
+            result.status, result.error = "failed", str(e)
+            raise
+        finally:
+            result.finished = time.monotonic()
+
+    def run(self) -> Dict[str, StepResult]:
+        results = {step.name: StepResult(step.name) for step in self.steps}
+        pending = list(self.steps)
+        running = {}
+        failed = False
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                if not failed:
+                    for step in [s for s in pending if all(results[n].status == "ok" for n in s.needs)]:
+                        pending.remove(step)
+                        running[pool.submit(self._execute, step, results[step.name])] = step
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    running.pop(future)
+                    if future.exception() is not None and not failed:
+                        failed = True
+                        self.commands.cancel()
+        for step in pending:
+            results[step.name].status = "skipped"
+        return results
+
+def digest(value) -> str:
+    """Content hash of a JSON-serialisable deploy input"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+def tree_digest(root: Path, exclude: Sequence[str] = ()) -> str:
+    """Content hash of every file gcloud would upload from ``root`` (caches and dotfiles excluded)
+
+    Top-level entries named in ``exclude`` are skipped too, e.g. generated output.
+    """
+    h = hashlib.sha256()
+    for path in sorted(root.rglob("*")):
+        relative = path.relative_to(root)
+        if (path.is_dir() or any(part.startswith(".") or part == "__pycache__" for part in relative.parts)
+                or path.suffix == ".pyc" or relative.parts[0] in exclude):
+            continue
+        h.update(str(relative).encode("utf-8") + b"\0")
+        h.update(path.read_bytes() + b"\0")
+    return h.hexdigest()
+
+class DeployState:
+    """Hashes of the inputs each resource was last deployed from, kept in a JSON file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.resources: Dict[str, dict] = json.loads(self.path.read_text())["resources"]
+        except FileNotFoundError:
+            self.resources = {}
+
+    def matches(self, key: str, value: str) -> bool:
+        return self.resources.get(key, {}).get("hash") == value
+
+    def record(self, key: str, value: str):
+        """Remember a deployed input; written immediately so an interrupted run keeps its progress"""
+        with self._lock:
+            self.resources[key] = {"hash": value, "deployed_at": datetime.now(timezone.utc).isoformat()}
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"resources": self.resources}, indent=2, sort_keys=True))
+            os.replace(tmp, self.path)
+
+@dataclass
+class Change:
+    """What converging one resource takes: create, update or nothing"""
+    resource: str
+    action: str  # create, update or unchanged
+    apply: Optional[Callable[[], object]] = None
+    state_key: Optional[str] = None
+    state_hash: Optional[str] = None
+
+PLAN_SYMBOLS = {"create": "+", "update": "~", "unchanged": "="}
+
+def print_timing_report(results: Dict[str, StepResult], wall_time: float):
+    """Per-step status and duration, plus how much running in parallel saved"""
+    icons = {"ok": "✓", "failed": "✗", "cancelled": "⊘", "skipped": "-"}
+    starts = [r.started for r in results.values() if r.started is not None]
+    origin = min(starts) if starts else 0.0
+    print("\n⏱️  Step timings")
+    for r in results.values():
+        offset = f"+{r.started - origin:6.1f}s" if r.started is not None else " " * 8
+        print(f"   {icons.get(r.status, '?')} {r.name:<14} {r.status:<10} {offset}  {r.duration:7.1f}s")
+    sequential = sum(r.duration for r in results.values())
+    print(f"   Total {wall_time:.1f}s (steps add up to {sequential:.1f}s)")
+    for r in results.values():
+        if r.status == "failed":
+            print(f"\n❌ {r.name} failed: {r.error}")
+
+class GCPDeployer:
+    INSTANCE_NAME = "lookmyshow-db"
+    DATABASE_NAME = "eventsdb"
+    VM_NAME = "lookmyshow-frontend"
+    # App Engine doesn't serve the catalog snapshot, so the page goes straight to the API
+    ASSET_DEFINES = ["/catalog/latest.json=api-only"]
+
+    FIREWALL_RULES = [
+        {
+            'name': 'allow-http',
+            'direction': 'INGRESS',
+            'action': 'allow',
+            'rules': 'tcp:80',
+            'target-tags': 'http-server'
+        },
+        {
+            'name': 'allow-https',
+            'direction': 'INGRESS',
+            'action': 'allow',
+            'rules': 'tcp:443',
+            'target-tags': 'https-server'
+        }
+    ]
+
+    STARTUP_SCRIPT = """#!/bin/bash
 # Install nginx
 apt-get update
 apt-get install -y nginx
@@ -118,11 +294,11 @@ server {
     server_name _;
     root /var/www/html/lookmyshow;
     index index.html;
-    
+
     location / {
         try_files $uri $uri/ =404;
     }
-    
+
     location /api/ {
         proxy_pass http://your-app-engine-url/api/;
         proxy_set_header Host $host;
@@ -131,63 +307,219 @@ server {
 }
 EOF
 
-ln -s /etc/nginx/sites-available/lookmyshow /etc/nginx/sites-enabled/
-rm /etc/nginx/sites-enabled/default
+ln -sf /etc/nginx/sites-available/lookmyshow /etc/nginx/sites-enabled/
+rm -f /etc/nginx/sites-enabled/default
 systemctl restart nginx
 """
-        
-        cmd = [
-            'gcloud', 'compute', 'instances', 'create', vm_name,
-            '--zone=' + self.zone,
-            '--machine-type=e2-micro',
-            '--image-family=ubuntu-2004-lts',
-            '--image-project=ubuntu-os-cloud',
-            '--metadata=startup-script=' + startup_script,
-            '--tags=http-server,https-server'
-        ]
-        
-        try:
-            subprocess.run(cmd, check=True)
-            print(f"✓ VM '{vm_name}' created")
-        except subprocess.CalledProcessError as e:
-            print(f"✗ Failed to create VM: {e}")
-    
+
+    def __init__(self, commands: Optional[CommandRunner] = None, state_file: Optional[str] = None,
+                 website_dir: Optional[str] = None, plan_only: bool = False, force: bool = False):
+        self.project_id = os.getenv('GCP_PROJECT_ID')
+        self.region = os.getenv('GCP_REGION', 'us-central1')
+        self.zone = os.getenv('GCP_ZONE', 'us-central1-a')
+        self.commands = commands or CommandRunner()
+        self.website_dir = Path(website_dir) if website_dir else Path(__file__).resolve().parent.parent / "website"
+        self.state = DeployState(Path(state_file or os.getenv(
+            'DEPLOY_STATE_FILE', Path(__file__).resolve().parent / ".deploy-state.json")))
+        self.plan_only = plan_only
+        self.force = force
+        self.changes: List[Change] = []
+        self._changes_lock = threading.Lock()
+
+    def check_prerequisites(self):
+        """Check if required tools are installed"""
+        required_tools = ['gcloud', 'docker']
+        missing_tools = []
+
+        for tool in required_tools:
+            try:
+                subprocess.run([tool, '--version'],
+                             capture_output=True, check=True)
+                print(f"✓ {tool} is installed")
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                missing_tools.append(tool)
+                print(f"✗ {tool} is not installed")
+
+        if missing_tools:
+            print(f"\nPlease install missing tools: {', '.join(missing_tools)}")
+            return False
+
+        return True
+
+    def _exists(self, cmd: List[str]) -> bool:
+        """Run a gcloud describe command; False when the resource doesn't exist"""
+        returncode, output = self.commands.run(cmd + ['--format=json'], allow_failure=True, quiet=True)
+        if returncode == 0:
+            return True
+        if "not found" in output.lower() or "NOT_FOUND" in output:
+            return False
+        raise StepFailed(f"{' '.join(cmd[:4])} failed (exit {returncode}): {output.strip()[-200:]}")
+
+    def _unchanged(self, key: str, value: str) -> bool:
+        return not self.force and self.state.matches(key, value)
+
+    def _converge(self, changes: List[Change]):
+        """Apply (or in plan mode only report) the changes for one step"""
+        with self._changes_lock:
+            self.changes.extend(changes)
+        for change in changes:
+            if change.action == "unchanged":
+                self.commands.say(f"= {change.resource} is up to date")
+            elif self.plan_only:
+                self.commands.say(f"{PLAN_SYMBOLS[change.action]} {change.resource} would be {change.action}d")
+                continue
+            else:
+                change.apply()
+                self.commands.say(f"✓ {change.resource} {change.action}d")
+            if change.state_key and not self.plan_only:
+                self.state.record(change.state_key, change.state_hash)
+
+    def create_cloud_sql_instance(self):
+        """Create Cloud SQL instance for data tier"""
+        self.commands.say("🗄️  Checking Cloud SQL instance...")
+
+        instance_name = self.INSTANCE_NAME
+        settings = ['--tier=db-f1-micro', '--storage-size=10GB']
+        settings_hash = digest(settings)
+        changes = []
+
+        if not self._exists(['gcloud', 'sql', 'instances', 'describe', instance_name]):
+            cmd = [
+                'gcloud', 'sql', 'instances', 'create', instance_name,
+                '--database-version=MYSQL_8_0',
+                '--region=' + self.region,
+                '--storage-type=SSD',
+                *settings
+            ]
+            changes.append(Change(f"Cloud SQL instance '{instance_name}'", "create",
+                                  lambda: self.commands.run(cmd), f"sql:{instance_name}", settings_hash))
+        elif self._unchanged(f"sql:{instance_name}", settings_hash):
+            changes.append(Change(f"Cloud SQL instance '{instance_name}'", "unchanged"))
+        else:
+            cmd = ['gcloud', 'sql', 'instances', 'patch', instance_name, '--quiet', *settings]
+            changes.append(Change(f"Cloud SQL instance '{instance_name}'", "update",
+                                  lambda: self.commands.run(cmd), f"sql:{instance_name}", settings_hash))
+
+        # Create database
+        database = f"Database '{self.DATABASE_NAME}'"
+        if changes[0].action == "create" or not self._exists(
+                ['gcloud', 'sql', 'databases', 'describe', self.DATABASE_NAME, '--instance=' + instance_name]):
+            changes.append(Change(database, "create", lambda: self.commands.run([
+                'gcloud', 'sql', 'databases', 'create', self.DATABASE_NAME,
+                '--instance=' + instance_name
+            ])))
+        else:
+            changes.append(Change(database, "unchanged"))
+
+        self._converge(changes)
+        return instance_name
+
+    def build_assets(self):
+        """Minify and fingerprint the frontend into website/build (served by app.yaml)"""
+        if self.plan_only:
+            # The build writes website/build; a plan only reports
+            self.commands.say("📦 Static assets would be built")
+            return
+        self.commands.say("📦 Building static assets...")
+        defines = [arg for define in self.ASSET_DEFINES for arg in ("--define", define)]
+        self.commands.run([sys.executable, str(self.website_dir / "build_assets.py"), *defines],
+                          cwd=str(self.website_dir))
+
+    def deploy_app_engine(self):
+        """Deploy application tier to App Engine from the app.yaml kept with the source"""
+        self.commands.say("🚀 Checking App Engine source...")
+
+        app_yaml = self.website_dir / "app.yaml"
+        if not app_yaml.exists():
+            raise StepFailed(f"{app_yaml} not found")
+        # build/ is generated from the sources and defines, so a plan (which doesn't build) hashes the same
+        source_hash = digest([tree_digest(self.website_dir, exclude=("build",)), self.ASSET_DEFINES])
+
+        if self._unchanged("app_engine:default", source_hash):
+            change = Change("App Engine service 'default'", "unchanged")
+        else:
+            change = Change("App Engine service 'default'", "update",
+                            lambda: self.commands.run(['gcloud', 'app', 'deploy', str(app_yaml), '--quiet'],
+                                                      cwd=str(self.website_dir)),
+                            "app_engine:default", source_hash)
+        self._converge([change])
+
+    def create_compute_engine_vm(self):
+        """Create Compute Engine VM for presentation tier"""
+        self.commands.say("💻 Checking Compute Engine VM...")
+
+        vm_name = self.VM_NAME
+        script_hash = digest(self.STARTUP_SCRIPT)
+        key = f"vm:{vm_name}:startup-script"
+
+        if not self._exists(['gcloud', 'compute', 'instances', 'describe', vm_name, '--zone=' + self.zone]):
+            cmd = [
+                'gcloud', 'compute', 'instances', 'create', vm_name,
+                '--zone=' + self.zone,
+                '--machine-type=e2-micro',
+                '--image-family=ubuntu-2004-lts',
+                '--image-project=ubuntu-os-cloud',
+                '--metadata=startup-script=' + self.STARTUP_SCRIPT,
+                '--tags=http-server,https-server'
+            ]
+            change = Change(f"VM '{vm_name}'", "create", lambda: self.commands.run(cmd), key, script_hash)
+        elif self._unchanged(key, script_hash):
+            change = Change(f"VM '{vm_name}'", "unchanged")
+        else:
+            # Takes effect on the next boot; no need to recreate the VM
+            cmd = ['gcloud', 'compute', 'instances', 'add-metadata', vm_name, '--zone=' + self.zone,
+                   '--metadata=startup-script=' + self.STARTUP_SCRIPT]
+            change = Change(f"VM '{vm_name}' startup script", "update", lambda: self.commands.run(cmd),
+                            key, script_hash)
+        self._converge([change])
+
     def setup_firewall_rules(self):
         """Setup firewall rules"""
-        print("\n🔥 Setting up firewall rules...")
-        
-        rules = [
-            {
-                'name': 'allow-http',
-                'direction': 'INGRESS',
-                'action': 'allow',
-                'rules': 'tcp:80',
-                'target-tags': 'http-server'
-            },
-            {
-                'name': 'allow-https',
-                'direction': 'INGRESS',
-                'action': 'allow',
-                'rules': 'tcp:443',
-                'target-tags': 'https-server'
-            }
+        self.commands.say("🔥 Checking firewall rules...")
+
+        changes = []
+        for rule in self.FIREWALL_RULES:
+            resource = f"Firewall rule '{rule['name']}'"
+            key, rule_hash = f"firewall:{rule['name']}", digest(rule)
+            if not self._exists(['gcloud', 'compute', 'firewall-rules', 'describe', rule['name']]):
+                cmd = [
+                    'gcloud', 'compute', 'firewall-rules', 'create', rule['name'],
+                    '--direction=' + rule['direction'],
+                    '--action=' + rule['action'],
+                    '--rules=' + rule['rules'],
+                    '--target-tags=' + rule['target-tags']
+                ]
+                changes.append(Change(resource, "create", lambda cmd=cmd: self.commands.run(cmd), key, rule_hash))
+            elif self._unchanged(key, rule_hash):
+                changes.append(Change(resource, "unchanged"))
+            else:
+                cmd = [
+                    'gcloud', 'compute', 'firewall-rules', 'update', rule['name'],
+                    '--rules=' + rule['rules'],
+                    '--target-tags=' + rule['target-tags']
+                ]
+                changes.append(Change(resource, "update", lambda cmd=cmd: self.commands.run(cmd), key, rule_hash))
+        self._converge(changes)
+
+    def steps(self) -> List[Step]:
+        """The deployment graph: the VM only needs its firewall rules, App Engine the database and the build"""
+        return [
+            Step("firewall", self.setup_firewall_rules),
+            Step("cloud_sql", self.create_cloud_sql_instance),
+            Step("build_assets", self.build_assets),
+            Step("app_engine", self.deploy_app_engine, needs=("cloud_sql", "build_assets")),
+            Step("frontend_vm", self.create_compute_engine_vm, needs=("firewall",)),
         ]
-        
-        for rule in rules:
-            cmd = [
-                'gcloud', 'compute', 'firewall-rules', 'create', rule['name'],
-                '--direction=' + rule['direction'],
-                '--action=' + rule['action'],
-                '--rules=' + rule['rules'],
-                '--target-tags=' + rule['target-tags']
-            ]
-            
-            try:
-                subprocess.run(cmd, check=True)
-                print(f"✓ Firewall rule '{rule['name']}' created")
-            except subprocess.CalledProcessError:
-                print(f"⚠️  Firewall rule '{rule['name']}' might already exist")
-    
+
+    def print_plan(self):
+        """Summary of what the run changed (or, with --plan, would change)"""
+        counts = {action: sum(c.action == action for c in self.changes) for action in PLAN_SYMBOLS}
+        print(f"\n📋 {'Plan' if self.plan_only else 'Changes'}: {counts['create']} to create, "
+              f"{counts['update']} to update, {counts['unchanged']} unchanged")
+        for change in self.changes:
+            if change.action != "unchanged":
+                print(f"   {PLAN_SYMBOLS[change.action]} {change.resource}")
+
     def print_deployment_summary(self):
         """Print deployment summary"""
         print("\n" + "="*50)
@@ -206,31 +538,44 @@ systemctl restart nginx
         print("   gcloud app browse  # Open App Engine app")
         print("   gcloud compute instances list  # List VMs")
         print("   gcloud sql instances list  # List SQL instances")
-    
+
+    def run_steps(self, max_workers: int = 4) -> bool:
+        """Run the deployment graph and print the plan and timing report; True when every step succeeded"""
+        started = time.monotonic()
+        results = StepRunner(self.steps(), self.commands, max_workers).run()
+        self.print_plan()
+        print_timing_report(results, time.monotonic() - started)
+        return all(r.status == "ok" for r in results.values())
+
     def deploy(self):
         """Main deployment function"""
         print("🚀 Starting LookMyShow Three-Tier Architecture Deployment")
         print("="*60)
-        
+
         if not self.check_prerequisites():
             sys.exit(1)
-        
+
         if not self.project_id:
             print("❌ Please set GCP_PROJECT_ID environment variable")
             sys.exit(1)
-        
+
         print(f"📊 Project: {self.project_id}")
         print(f"🌍 Region: {self.region}")
         print(f"🏢 Zone: {self.zone}")
-        
-        # Deploy components
-        self.setup_firewall_rules()
-        self.create_cloud_sql_instance()
-        self.deploy_app_engine()
-        self.create_compute_engine_vm()
-        
-        self.print_deployment_summary()
+        print(f"💾 State: {self.state.path}{' (plan only)' if self.plan_only else ''}")
+
+        # Deploy components, independent ones in parallel
+        if not self.run_steps():
+            sys.exit(1)
+
+        if not self.plan_only:
+            self.print_deployment_summary()
 
 if __name__ == "__main__":
-    deployer = GCPDeployer()
-    deployer.deploy() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Deploy LookMyShow to GCP")
+    parser.add_argument("--plan", action="store_true", help="Only show what would be created or updated")
+    parser.add_argument("--force", action="store_true", help="Ignore the state file and update everything")
+    parser.add_argument("--state-file", help="Deploy state file (default: infra/.deploy-state.json)")
+    args = parser.parse_args()
+    deployer = GCPDeployer(state_file=args.state_file, plan_only=args.plan, force=args.force)
+    deployer.deploy()
@@ -49,6 +49,12 @@ resource "google_compute_instance" "frontend" {
         location / {
             try_files $uri $uri/ =404;
         }
+        # Events catalog snapshots, straight from the catalog bucket (never the API)
+        location /catalog/ {
+            proxy_pass https://storage.googleapis.com/${google_storage_bucket.catalog.name}/catalog/;
+            proxy_set_header Host storage.googleapis.com;
+            proxy_ssl_server_name on;
+        }
         location /api/ {
             proxy_pass http://YOUR_APP_ENGINE_URL/api/;
             proxy_set_header Host $host;
@@ -0,0 +1,206 @@
+"""
+Offline tests for the deployment graph, using a fake gcloud on PATH
+The fake keeps a list of existing resources for describe/create, logs each call
+with timestamps, sleeps FAKE_GCLOUD_SLEEP seconds on mutating commands and
+fails any command containing FAKE_GCLOUD_FAIL.
+"""
+
+import os
+import shutil
+import stat
+import sys
+import time
+import pytest
+from deploy import CommandRunner, GCPDeployer, Step, StepRunner, order_steps
+
+FAKE_GCLOUD = """#!{python}
+import os, sys, time
+argv = sys.argv[1:]
+args = " ".join(argv).replace("\\n", " ")
+with open(os.environ["FAKE_GCLOUD_LOG"], "a") as log:
+    log.write(f"start {{time.monotonic()}} {{args}}\\n")
+marker = os.path.join(os.environ["FAKE_GCLOUD_STORE"], "_".join(argv[:2] + argv[3:4]))
+if argv[2] == "describe":
+    if not os.path.exists(marker):
+        print(f"ERROR: (gcloud.{{argv[0]}}) The resource '{{argv[3]}}' was not found", flush=True)
+        sys.exit(1)
+    print("{{}}")
+    sys.exit(0)
+print(f"gcloud {{argv[0]}} {{argv[1]}}: working", flush=True)
+time.sleep(float(os.environ.get("FAKE_GCLOUD_SLEEP", "0")))
+fail = os.environ.get("FAKE_GCLOUD_FAIL")
+if fail and fail in args:
+    print("ERROR: (gcloud) simulated failure", flush=True)
+    sys.exit(1)
+if argv[2] == "create":
+    open(marker, "w").close()
+with open(os.environ["FAKE_GCLOUD_LOG"], "a") as log:
+    log.write(f"end {{time.monotonic()}} {{args}}\\n")
+"""
+
+class FakeGcloud:
+    """Handle on the fake: which commands ran and which resources exist"""
+
+    def __init__(self, root):
+        self.log = root / "gcloud.log"
+        self.store = root / "resources"
+        self.log.write_text("")
+        self.store.mkdir()
+
+    def calls(self):
+        return [line.split(" ", 2) for line in self.log.read_text().splitlines()]
+
+    def mutations(self):
+        """Commands other than describe, in start order"""
+        return [args for kind, _, args in self.calls() if kind == "start" and " describe " not in f" {args} "]
+
+    def add(self, *resources):
+        for resource in resources:
+            (self.store / resource.replace(" ", "_")).touch()
+
+@pytest.fixture
+def fake_gcloud(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    gcloud = bin_dir / "gcloud"
+    gcloud.write_text(FAKE_GCLOUD.format(python=sys.executable))
+    gcloud.chmod(gcloud.stat().st_mode | stat.S_IEXEC)
+    fake = FakeGcloud(tmp_path)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_GCLOUD_LOG", str(fake.log))
+    monkeypatch.setenv("FAKE_GCLOUD_STORE", str(fake.store))
+    return fake
+
+@pytest.fixture
+def website(tmp_path):
+    site = tmp_path / "website"
+    site.mkdir()
+    (site / "app.yaml").write_text("runtime: python39\n")
+    (site / "main.py").write_text("app = None\n")
+    (site / "build_assets.py").write_text(
+        "import pathlib\n"
+        "out = pathlib.Path(__file__).parent / 'build'\n"
+        "out.mkdir(exist_ok=True)\n"
+        "(out / 'index.html').write_text('<html></html>')\n"
+        "import sys\n"
+        "print('built', *sys.argv[1:])\n")
+    (site / "__pycache__").mkdir()
+    return site
+
+def _deployer(tmp_path, website, **kwargs):
+    return GCPDeployer(state_file=str(tmp_path / "state.json"), website_dir=str(website), **kwargs)
+
+def _span(calls, fragment):
+    start = next(float(t) for kind, t, args in calls if kind == "start" and fragment in args)
+    end = next(float(t) for kind, t, args in calls if kind == "end" and fragment in args)
+    return start, end
+
+def test_independent_steps_run_in_parallel(fake_gcloud, tmp_path, website, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_GCLOUD_SLEEP", "0.3")
+    started = time.monotonic()
+    assert _deployer(tmp_path, website).run_steps()
+    elapsed = time.monotonic() - started
+
+    calls = fake_gcloud.calls()
+    sql_start, _ = _span(calls, "sql instances create")
+    _, rule_end = _span(calls, "allow-https")
+    assert sql_start < rule_end  # database and firewall overlap
+    _, db_end = _span(calls, "sql databases create")
+    app_start, _ = _span(calls, "app deploy")
+    assert app_start >= db_end  # App Engine waits for the database
+    assert elapsed < 6 * 0.3  # 6 slow commands, the longest chain is 3
+
+    out = capsys.readouterr().out
+    assert "[cloud_sql   ] gcloud sql instances: working" in out
+    assert "[build_assets] built --define /catalog/latest.json=api-only" in out
+    assert "Step timings" in out and "frontend_vm" in out
+
+def test_failure_cancels_dependents_and_reports(fake_gcloud, tmp_path, website, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_GCLOUD_FAIL", "sql instances create")
+    assert not _deployer(tmp_path, website).run_steps()
+
+    assert not any("app deploy" in args for args in fake_gcloud.mutations())
+    out = capsys.readouterr().out
+    assert "❌ cloud_sql failed: gcloud sql instances create exited with 1" in out
+    assert "app_engine     skipped" in out
+
+def test_redeploy_without_changes_only_looks_up_resources(fake_gcloud, tmp_path, website, capsys):
+    assert _deployer(tmp_path, website).run_steps()
+    assert len(fake_gcloud.mutations()) == 6  # 5 creates and the App Engine deploy
+    fake_gcloud.log.write_text("")
+
+    assert _deployer(tmp_path, website).run_steps()
+    assert fake_gcloud.mutations() == []
+    assert "0 to create, 0 to update, 6 unchanged" in capsys.readouterr().out
+
+def test_only_changed_inputs_are_redeployed(fake_gcloud, tmp_path, website):
+    assert _deployer(tmp_path, website).run_steps()
+    fake_gcloud.log.write_text("")
+
+    (website / "main.py").write_text("app = 'changed'\n")
+    (website / "__pycache__" / "main.cpython-39.pyc").write_bytes(b"ignored")
+    deployer = _deployer(tmp_path, website)
+    deployer.FIREWALL_RULES = [dict(GCPDeployer.FIREWALL_RULES[0], rules="tcp:8080"), GCPDeployer.FIREWALL_RULES[1]]
+    assert deployer.run_steps()
+
+    mutations = fake_gcloud.mutations()
+    assert len(mutations) == 2
+    assert any(m.startswith("compute firewall-rules update allow-http --rules=tcp:8080") for m in mutations)
+    assert any(m.startswith("app deploy") for m in mutations)
+
+def test_existing_resources_are_adopted_not_recreated(fake_gcloud, tmp_path, website, capsys):
+    fake_gcloud.add("compute firewall-rules allow-http", "sql instances lookmyshow-db",
+                    "sql databases eventsdb")
+    assert _deployer(tmp_path, website).run_steps()
+    mutations = fake_gcloud.mutations()
+    assert not any(m.startswith("compute firewall-rules create allow-http ") for m in mutations)
+    assert "compute firewall-rules update allow-http" in " | ".join(mutations)
+    assert not any(m.startswith("sql databases create") for m in mutations)
+
+def test_plan_mode_changes_nothing(fake_gcloud, tmp_path, website, capsys):
+    deployer = _deployer(tmp_path, website, plan_only=True)
+    assert deployer.run_steps()
+    assert fake_gcloud.mutations() == []
+    assert not (tmp_path / "state.json").exists()
+    out = capsys.readouterr().out
+    assert "Plan: 5 to create, 1 to update, 0 unchanged" in out
+    assert "+ Cloud SQL instance 'lookmyshow-db'" in out
+    assert (website / "app.yaml").read_text() == "runtime: python39\n"
+    assert "Static assets would be built" in out and "built --define" not in out
+    assert not (website / "build").exists()
+
+def test_plan_from_a_clean_checkout_matches_the_deployed_source(fake_gcloud, tmp_path, website, capsys):
+    assert _deployer(tmp_path, website).run_steps()
+    # A fresh checkout: the plan doesn't build, so build/ is missing
+    shutil.rmtree(website / "build")
+    capsys.readouterr()
+
+    assert _deployer(tmp_path, website, plan_only=True).run_steps()
+    assert "0 to create, 0 to update, 6 unchanged" in capsys.readouterr().out
+
+    deployer = _deployer(tmp_path, website, plan_only=True)
+    deployer.ASSET_DEFINES = ["/catalog/latest.json=https://example.com/catalog.json"]
+    assert deployer.run_steps()
+    assert "0 to create, 1 to update, 5 unchanged" in capsys.readouterr().out
+
+def test_running_commands_are_stopped_when_a_step_fails(tmp_path):
+    commands = CommandRunner(out=open(os.devnull, "w"))
+    slow = Step("slow", lambda: commands.run([sys.executable, "-c", "import time; time.sleep(30)"]))
+
+    def broken():
+        time.sleep(0.2)
+        raise RuntimeError("boom")
+
+    started = time.monotonic()
+    results = StepRunner([slow, Step("broken", broken), Step("after", lambda: None, needs=("slow",))],
+                         commands).run()
+    assert time.monotonic() - started < 5
+    assert {name: r.status for name, r in results.items()} == {
+        "slow": "cancelled", "broken": "failed", "after": "skipped"}
+
+def test_graph_validation():
+    with pytest.raises(ValueError, match="unknown"):
+        order_steps([Step("a", lambda: None, needs=("b",))])
+    with pytest.raises(ValueError, match="cycle"):
+        order_steps([Step("a", lambda: None, needs=("b",)), Step("b", lambda: None, needs=("a",))])
+    assert [s.name for s in order_steps([Step("b", lambda: None, needs=("a",)), Step("a", lambda: None)])] == ["a", "b"]
@@ -13,4 +13,44 @@ resource "google_storage_bucket" "website_static" {
 # Note: Upload your website.zip (containing index.html, styles.css, etc.) to this bucket before running terraform apply for the VM.
 # Example:
 #   cd website && zip -r website.zip *
-#   gsutil cp website.zip gs://<bucket-name>/website.zip 
\ No newline at end of file
+#   gsutil cp website.zip gs://<bucket-name>/website.zip 
+
+# Events catalog snapshots written by website/catalog_publisher.py (--target gs://<this bucket>/catalog).
+# Public and separate from the site bucket, whose website.zip stays private.
+resource "google_storage_bucket" "catalog" {
+  name     = "${var.website_bucket}-catalog"
+  location = var.region
+  force_destroy = true
+  uniform_bucket_level_access = true
+
+  # For pages that read the snapshot from storage.googleapis.com directly
+  cors {
+    origin          = ["*"]
+    method          = ["GET", "HEAD"]
+    response_header = ["Content-Type", "ETag"]
+    max_age_seconds = 3600
+  }
+
+  labels = {
+    environment = var.environment
+    application = "lookmyshow"
+    purpose     = "events-catalog"
+  }
+}
+
+resource "google_storage_bucket_iam_member" "catalog_public_read" {
+  bucket = google_storage_bucket.catalog.name
+  role   = "roles/storage.objectViewer"
+  member = "allUsers"
+}
+
+# Lets a publisher on the frontend VM (e.g. a cron job) write snapshots
+resource "google_storage_bucket_iam_member" "catalog_publisher" {
+  bucket = google_storage_bucket.catalog.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.cloudsql_proxy.email}"
+}
+
+output "catalog_url" {
+  value = "https://storage.googleapis.com/${google_storage_bucket.catalog.name}/catalog/latest.json"
+}
@@ -21,8 +21,16 @@ if [ ! -f "/var/www/html/lookmyshow/index.html" ]; then
 fi
 
 # Update script.js with VM IP
+# (for a build from build_assets.py, pass --define YOUR_VM_EXTERNAL_IP=<ip> instead so the hash matches the content)
 echo "🔧 Updating API URL in script.js..."
-sudo sed -i "s/YOUR_VM_EXTERNAL_IP/$VM_EXTERNAL_IP/g" /var/www/html/lookmyshow/script.js
+if [ -f /var/www/html/lookmyshow/script.js ]; then
+    sudo sed -i "s/YOUR_VM_EXTERNAL_IP/$VM_EXTERNAL_IP/g" /var/www/html/lookmyshow/script.js
+fi
+
+# Directory nginx serves /catalog/ from; catalog_publisher.py writes the events snapshots here
+echo "📦 Preparing the events catalog directory..."
+sudo mkdir -p /var/www/lookmyshow-catalog
+sudo chown "$(id -un)" /var/www/lookmyshow-catalog
 
 # Configure Nginx
 echo "⚙️  Setting up Nginx configuration..."
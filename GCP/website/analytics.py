@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Vectorized booking analytics for demand reporting
+Bookings are read in fixed-size chunks (keyset pagination on id, so every
+query is short and holds no long-running snapshot) into NumPy columns:
+event_id, epoch timestamp and a 64-bit hash of user_email. Each chunk is
+folded into fixed-size aggregates with bincount, so tens of millions of
+bookings need no more memory than one chunk plus the results:
+
+- velocity: bookings per time bin over the window, and the peak bin
+- fill curves: per event, the share of its bookings made N days ahead of the event date
+- heatmap: bookings by day of week and hour of day (in the report's UTC offset)
+- buyers: distinct buyers per event and overall, from a K-minimum-values sketch
+
+Usage:
+    python analytics.py [--days 30 | --all] [--bin-minutes 60] [--utc-offset 330] [--json]
+    python analytics.py --local lookmyshow.db --all      # a SQLite stand-in (see local_db.py)
+
+numpy is only needed here; the API imports this module on first use.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+from data_access import BookingRepository, DatabaseConnection, EventRepository
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+SKETCH_SIZE = 1024
+_EMPTY = np.empty(0, dtype=np.uint64)
+_MAX_HASH = 2 ** 64 - 1
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+# Keyset pagination: each chunk starts after the last id of the previous one
+CHUNK_SQL = "SELECT b.id, b.event_id, b.timestamp, b.user_email FROM bookings b WHERE b.id > %s{window} " \
+            "ORDER BY b.id LIMIT %s"
+# Served from idx_bookings_ts_cover; skips the ids before the window
+FIRST_ID_SQL = "SELECT MIN(b.id) FROM bookings b WHERE b.timestamp >= %s"
+
+@dataclass
+class Chunk:
+    """One batch of bookings as columns"""
+    event_ids: np.ndarray    # int64
+    timestamps: np.ndarray   # int64 epoch seconds
+    buyers: np.ndarray       # uint64 hash of the normalised email
+
+    def __len__(self) -> int:
+        return len(self.event_ids)
+
+def email_hashes(emails: Sequence[str]) -> np.ndarray:
+    """64-bit hashes of ``emails`` (case-insensitive) for the distinct-count sketch
+
+    The built-in (SipHash) string hash is several times faster than hashlib here. It is
+    salted per process, which is fine: hashes are only compared within one report.
+    """
+    return np.fromiter(map(hash, map(str.lower, emails)), dtype=np.int64, count=len(emails)).view(np.uint64)
+
+def epoch_seconds(timestamps: Sequence[datetime]) -> np.ndarray:
+    """Naive UTC datetimes (as the driver returns TIMESTAMP columns) to int64 epoch seconds"""
+    try:
+        # Plain datetime arithmetic beats numpy's per-object datetime64 conversion
+        return np.fromiter(((t - _EPOCH) // _SECOND for t in timestamps), dtype=np.int64, count=len(timestamps))
+    except TypeError:
+        # Strings, e.g. MIN(timestamp) from the SQLite stand-in
+        return np.array(timestamps, dtype="datetime64[s]").astype(np.int64)
+
+def to_chunk(rows: Sequence[tuple]) -> Chunk:
+    """(event_id, timestamp, user_email) rows to a Chunk"""
+    event_ids, timestamps, emails = zip(*rows)
+    return Chunk(np.array(event_ids, dtype=np.int64), epoch_seconds(timestamps), email_hashes(emails))
+
+def _sql_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def shard_chunks(db: DatabaseConnection, chunk_size: int, since: Optional[int] = None,
+                 until: Optional[int] = None) -> Iterator[Chunk]:
+    """Bookings on one database in id order, ``chunk_size`` at a time, optionally within [since, until)"""
+    window, bounds = "", ()
+    if since is not None:
+        window += " AND b.timestamp >= %s"
+        bounds += (_sql_time(since),)
+    if until is not None:
+        window += " AND b.timestamp < %s"
+        bounds += (_sql_time(until),)
+    sql = CHUNK_SQL.format(window=window)
+    last_id = 0
+    if since is not None:
+        def first_id(conn):
+            cursor = conn.cursor()
+            cursor.execute(FIRST_ID_SQL, bounds[:1])
+            return cursor.fetchone()[0]
+        first = db.read(first_id)
+        if first is None:
+            return
+        last_id = first - 1
+
+    while True:
+        def fetch(conn):
+            cursor = conn.cursor()
+            cursor.execute(sql, (last_id, *bounds, chunk_size))
+            return cursor.fetchall()
+        rows = db.read(fetch)
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield to_chunk([row[1:] for row in rows])
+        if len(rows) < chunk_size:
+            return
+
+def booking_chunks(bookings: BookingRepository, chunk_size: int = 50000, since: Optional[int] = None,
+                   until: Optional[int] = None, include_archived: bool = False) -> Iterator[Chunk]:
+    """Every shard's bookings (and optionally the archive's) as chunks"""
+    for shard in bookings.shards:
+        yield from shard_chunks(shard, chunk_size, since, until)
+    if include_archived and bookings.archive is not None:
+        archived = ((b.event_id, b.timestamp, b.user_email) for b in bookings.archive.bookings())
+        while True:
+            rows = list(islice(archived, chunk_size))
+            if not rows:
+                return
+            yield to_chunk(rows)
+
+class DistinctSketch:
+    """K-minimum-values distinct count: keeps the ``k`` smallest hashes seen"""
+
+    def __init__(self, k: int = SKETCH_SIZE):
+        self.k = k
+        self.values = _EMPTY
+
+    @property
+    def limit(self) -> int:
+        """Hashes above this can no longer change the sketch"""
+        return int(self.values[-1]) if len(self.values) == self.k else _MAX_HASH
+
+    def add(self, hashes: np.ndarray):
+        if len(hashes):
+            # Sort and drop repeats directly; np.union1d's hashing costs more at these sizes
+            merged = np.sort(np.concatenate((self.values, hashes)))
+            self.values = merged[np.r_[True, merged[1:] != merged[:-1]]][:self.k]
+
+    def estimate(self) -> int:
+        if len(self.values) < self.k:
+            return len(self.values)  # Exact below k distinct values
+        return int(round((self.k - 1) * 2.0 ** 64 / (float(self.values[-1]) + 1)))
+
+class DemandAggregator:
+    """Folds booking chunks into velocity, fill-curve, heatmap and distinct-buyer aggregates"""
+
+    def __init__(self, event_dates: Dict[int, str], start: int, end: int, bin_seconds: int = 3600,
+                 horizon_days: int = 90, utc_offset_minutes: int = 0, sketch_size: int = SKETCH_SIZE):
+        self.event_ids = np.array(sorted(event_dates), dtype=np.int64)
+        self.event_days = np.array([np.datetime64(str(event_dates[e])[:10], "D").astype(np.int64)
+                                    for e in self.event_ids], dtype=np.int64)
+        self.start, self.end = start, max(end, start + 1)
+        self.bin_seconds = max(1, bin_seconds)
+        self.horizon = max(0, horizon_days)
+        self.offset = utc_offset_minutes * 60
+        self.rows = 0
+        self.skipped = 0
+        n_events = len(self.event_ids)
+        self.velocity = np.zeros(-(-(self.end - self.start) // self.bin_seconds), dtype=np.int64)
+        self.heatmap = np.zeros(7 * 24, dtype=np.int64)
+        self.bookings = np.zeros(n_events, dtype=np.int64)
+        # fill[e, d]: bookings for event e made d days before its date (the last column is "horizon or more")
+        self.fill = np.zeros((n_events, self.horizon + 1), dtype=np.int64)
+        self.buyers = DistinctSketch(sketch_size)
+        self.event_buyers = [DistinctSketch(sketch_size) for _ in range(n_events)]
+        self._limits = np.full(n_events, _MAX_HASH, dtype=np.uint64)
+
+    def add(self, chunk: Chunk):
+        ts = chunk.timestamps
+        # Map event ids to aggregate rows; bookings for deleted events are skipped
+        index = np.searchsorted(self.event_ids, chunk.event_ids)
+        known = index < len(self.event_ids)
+        known[known] = self.event_ids[index[known]] == chunk.event_ids[known]
+        keep = known & (ts >= self.start) & (ts < self.end)
+        self.skipped += len(chunk) - int(keep.sum())
+        if not keep.all():
+            ts, index, buyers = ts[keep], index[keep], chunk.buyers[keep]
+        else:
+            buyers = chunk.buyers
+        if len(ts) == 0:
+            return
+        self.rows += len(ts)
+        n_events, width = len(self.event_ids), self.horizon + 1
+
+        self.velocity += np.bincount((ts - self.start) // self.bin_seconds, minlength=len(self.velocity))
+        local = ts + self.offset
+        # 1970-01-01 was a Thursday; Monday is day 0
+        cell = ((local // DAY + 3) % 7) * 24 + (local % DAY) // 3600
+        self.heatmap += np.bincount(cell, minlength=7 * 24)
+        self.bookings += np.bincount(index, minlength=n_events)
+        # Bookings on (or after) the event date count as day 0
+        ahead = np.clip(self.event_days[index] - ts // DAY, 0, self.horizon)
+        self.fill += np.bincount(index * width + ahead, minlength=n_events * width).reshape(n_events, width)
+
+        # Once a sketch is full only hashes under its k-th smallest matter, which is few rows per chunk
+        self.buyers.add(buyers[buyers <= np.uint64(self.buyers.limit)])
+        candidate = buyers <= self._limits[index]
+        index, buyers = index[candidate], buyers[candidate]
+        order = np.argsort(index, kind="stable")
+        index, buyers = index[order], buyers[order]
+        bounds = np.flatnonzero(np.diff(index)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(index)]):
+            sketch = self.event_buyers[index[lo]]
+            sketch.add(buyers[lo:hi])
+            self._limits[index[lo]] = sketch.limit
+
+    def report(self, titles: Optional[Dict[int, str]] = None) -> dict:
+        titles = titles or {}
+        peak = int(self.velocity.argmax()) if len(self.velocity) else 0
+        peak_count = int(self.velocity[peak]) if len(self.velocity) else 0
+        # Share of each event's bookings already made d days out: suffix sums over days ahead
+        made_by = self.fill[:, ::-1].cumsum(axis=1)[:, ::-1]
+        events = []
+        for i, event_id in enumerate(self.event_ids.tolist()):
+            total = int(self.bookings[i])
+            events.append({
+                "event_id": event_id,
+                "title": titles.get(event_id),
+                "bookings": total,
+                "buyers": self.event_buyers[i].estimate(),
+                "fill_curve": [round(v / total, 4) for v in made_by[i].tolist()] if total else [],
+            })
+        events.sort(key=lambda e: e["bookings"], reverse=True)
+        return {
+            "bookings": self.rows,
+            "skipped": self.skipped,
+            "buyers": self.buyers.estimate(),
+            "window": {"start": _iso(self.start), "end": _iso(self.end), "bin_seconds": self.bin_seconds},
+            "velocity": {
+                "counts": self.velocity.tolist(),
+                "peak": {"start": _iso(self.start + peak * self.bin_seconds), "bookings": peak_count,
+                         "per_minute": round(peak_count * 60 / self.bin_seconds, 2)},
+            },
+            "heatmap": {
+                "utc_offset_minutes": self.offset // 60,
+                "days": list(DAY_NAMES),
+                "counts": self.heatmap.reshape(7, 24).tolist(),
+            },
+            "fill_curves": {"horizon_days": self.horizon, "events": events},
+        }
+
+def _iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def booking_span(bookings: BookingRepository) -> Optional[tuple]:
+    """(first, last) booking epoch seconds across the shards, or None when there are none"""
+    def fetch(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(b.timestamp), MAX(b.timestamp) FROM bookings b")
+        return cursor.fetchone()
+    spans = [shard.read(fetch) for shard in bookings.shards]
+    firsts = [first for first, _ in spans if first is not None]
+    lasts = [last for _, last in spans if last is not None]
+    if not firsts:
+        return None
+    return int(epoch_seconds(firsts).min()), int(epoch_seconds(lasts).max())
+
+def demand_report(bookings: BookingRepository, events: EventRepository, days: Optional[float] = 30,
+                  bin_seconds: int = 3600, horizon_days: int = 90, utc_offset_minutes: int = 0,
+                  chunk_size: int = 50000, include_archived: bool = False, now: Optional[float] = None) -> dict:
+    """The demand report over the last ``days`` days (all bookings when ``days`` is None)"""
+    started = time.perf_counter()
+    catalog = events.get_all_events(("id", "title", "date"))
+    end = int(now if now is not None else time.time()) + 1
+    if days is None:
+        span = booking_span(bookings)
+        start, end = (span[0], span[1] + 1) if span else (end - 1, end)
+        since = until = None
+    else:
+        start = since = end - int(days * DAY)
+        until = end
+    aggregator = DemandAggregator({e.id: e.date for e in catalog}, start, end, bin_seconds, horizon_days,
+                                  utc_offset_minutes)
+    chunks = 0
+    for chunk in booking_chunks(bookings, chunk_size, since, until, include_archived):
+        aggregator.add(chunk)
+        chunks += 1
+    report = aggregator.report({e.id: e.title for e in catalog})
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    report["chunks"] = chunks
+    logger.info("Demand report over %d bookings in %d chunks took %.0fms", report["bookings"], chunks,
+                report["elapsed_ms"])
+    return report
+
+def _sparkline(counts: Iterable[int], width: int = 60) -> str:
+    counts = list(counts)
+    if not counts:
+        return ""
+    step = max(1, -(-len(counts) // width))
+    sums = [sum(counts[i:i + step]) for i in range(0, len(counts), step)]
+    top = max(sums) or 1
+    return "".join(" ▁▂▃▄▅▆▇█"[round(8 * s / top)] for s in sums)
+
+def print_report(report: dict, top: int = 10):
+    window = report["window"]
+    print(f"📊 {report['bookings']} bookings, ~{report['buyers']} buyers, "
+          f"{window['start']} → {window['end']} ({report['elapsed_ms']:.0f}ms)")
+    peak = report["velocity"]["peak"]
+    print(f"\nVelocity per {window['bin_seconds'] // 60} min, peak {peak['bookings']} at {peak['start']} "
+          f"({peak['per_minute']}/min)")
+    print(f"  {_sparkline(report['velocity']['counts'])}")
+
+    heatmap = report["heatmap"]
+    print(f"\nDay × hour (UTC{heatmap['utc_offset_minutes'] / 60:+g})")
+    for day, row in zip(heatmap["days"], heatmap["counts"]):
+        print(f"  {day} {_sparkline(row, 24)}")
+
+    horizon = report["fill_curves"]["horizon_days"]
+    marks = [d for d in (horizon, 30, 7, 1) if d <= horizon]
+    print(f"\n{'event':<32} {'bookings':>9} {'buyers':>8} " + " ".join(f"{f'≥{d}d':>6}" for d in marks))
+    for event in report["fill_curves"]["events"][:top]:
+        if event["bookings"]:
+            shares = " ".join(f"{event['fill_curve'][d]:>6.0%}" for d in marks)
+            print(f"{(event['title'] or str(event['event_id']))[:32]:<32} {event['bookings']:>9} "
+                  f"{event['buyers']:>8} {shares}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Booking demand report: velocity, fill curves and heatmap")
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument("--days", type=float, default=30, help="Report on the last N days (default 30)")
+    window.add_argument("--all", action="store_true", help="Report on every booking")
+    parser.add_argument("--bin-minutes", type=int, default=60, help="Velocity bin width")
+    parser.add_argument("--horizon", type=int, default=90, help="Days ahead covered by the fill curves")
+    parser.add_argument("--utc-offset", type=int, default=0, help="Heatmap time zone, minutes east of UTC")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Bookings read per query")
+    parser.add_argument("--include-archived", action="store_true", help="Also read BOOKINGS_ARCHIVE_DIR")
+    parser.add_argument("--local", metavar="PATH", help="Read a SQLite stand-in instead of MySQL")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from config import AppConfig
+    from log_setup import configure_logging
+    configure_logging(json_output=False)
+
+    if args.local:
+        from local_db import LocalDatabase
+        db = LocalDatabase(args.local, seed=False).connection_manager(pool_size=1)
+        shards, archive = [db], None
+    else:
+        config = AppConfig.from_env()
+        db = DatabaseConnection(config.database)
+        shards = [DatabaseConnection(shard) for shard in config.booking_shards] or [db]
+        archive = None
+        if args.include_archived and config.bookings_archive_dir:
+            from booking_archive import BookingArchive
+            archive = BookingArchive(config.bookings_archive_dir)
+    report = demand_report(BookingRepository(db, archive, shards), EventRepository(db),
+                           None if args.all else args.days, args.bin_minutes * 60, args.horizon,
+                           args.utc_offset, args.chunk_size, args.include_archived)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
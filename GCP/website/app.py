@@ -1,110 +1,619 @@
-from flask import Flask, jsonify, request
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request
 from flask_cors import CORS
+import atexit
+import hmac
 import logging
-from config import API_CONFIG, CORS_ORIGINS
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from config import AppConfig
+from booking_archive import BookingArchive
+from data_access import DatabaseConnection, EventRepository, BookingRepository, QueuePassUsed, shard_id_series
+from resilience import UnavailableError
+import deadlines
+import listing_formats
+import load_signal
+import log_setup
+import tracing
+from profiler import StackSampler, in_request
+from deadlines import DeadlineExceeded
+from event_bus import EVENT_CHANGED, EventBus, fanout_from_spec
 from services import EventService, BookingService
+from shared_cache import SharedSnapshot, catalog_segment_name, default_segment_path
+from waiting_room import TOKEN_HEADER, WaitingRoom, WaitingRoomError
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the entry point (log_setup.configure_logging)
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__)
+IMPORT_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
+
+# Lets a caller with less patience than the route's deadline say so (milliseconds)
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+# Carries DEBUG_PROFILE_TOKEN; profiles the request and names the result in X-Profile-Id
+PROFILE_HEADER = "X-Debug-Profile"
+PROFILE_TOKEN_HEADER = "X-Debug-Token"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+# Hold a thread without loading the instance (streams, profiler windows) or are the probes themselves
+UNCOUNTED_ENDPOINTS = frozenset({"api.stream", "api.profile", "api.load_metrics", "api.health_check"})
+# Request profiles kept for /api/debug/profile/requests/<id>
+KEPT_REQUEST_PROFILES = 20
+
+# One window profile at a time per worker
+_profiling = threading.Lock()
+
+class ServiceContainer:
+    """Builds the data-access layer and services on first use
+
+    Both services share one DatabaseConnection (and its pool), and nothing
+    touches the database until a request or the warm-up thread needs it.
+    """
+
+    def __init__(self, config: AppConfig, db: Optional[DatabaseConnection] = None,
+                 shards: Optional[List[DatabaseConnection]] = None):
+        self.config = config
+        self._db = db
+        self._shards = shards
+        self._event_service = None
+        self._booking_service = None
+        # Reentrant: building a service builds the shared db (and shards) under the same lock
+        self._lock = threading.RLock()
+        self.events = EventBus(config.stream_buffer_size, config.stream_client_queue,
+                               config.stream_max_clients, fanout_from_spec(config.event_fanout))
+        self.request_profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self.waiting_room = (WaitingRoom(config.waiting_room_events, config.waiting_room_rate,
+                                         config.waiting_room_burst, config.waiting_room_secret,
+                                         config.waiting_room_admit_seconds)
+                             if config.waiting_room_events else None)
+        self.load = load_signal.LoadMonitor(lambda: [self.db] + (self.shards or []),
+                                            config.load_target_concurrency, config.load_target_pool_wait_ms,
+                                            config.load_target_queue_ms, config.load_window_seconds)
+        exporter = tracing.exporter_from_spec(config.trace_exporter)
+        self.tracer = (tracing.Tracer(exporter, tracing.RatioSampler(config.trace_sample_ratio))
+                       if exporter else None)
+
+    @property
+    def db(self) -> DatabaseConnection:
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._db = DatabaseConnection(self.config.database,
+                                                  pool_size=self.config.db_pool_size)
+        return self._db
+
+    @property
+    def shards(self) -> Optional[List[DatabaseConnection]]:
+        """Bookings shard connections from BOOKING_SHARDS (None when bookings aren't sharded)"""
+        if self._shards is None and self.config.booking_shards:
+            with self._lock:
+                if self._shards is None:
+                    count = len(self.config.booking_shards)
+                    self._shards = [DatabaseConnection(shard, pool_size=self.config.db_pool_size,
+                                                       id_series=shard_id_series(index, count))
+                                    for index, shard in enumerate(self.config.booking_shards)]
+        return self._shards
+
+    @property
+    def event_service(self) -> EventService:
+        if self._event_service is None:
+            with self._lock:
+                if self._event_service is None:
+                    self._event_service = EventService(EventRepository(self.db), self._catalog_cache())
+        return self._event_service
+
+    @property
+    def booking_service(self) -> BookingService:
+        if self._booking_service is None:
+            with self._lock:
+                if self._booking_service is None:
+                    archive = (BookingArchive(self.config.bookings_archive_dir)
+                               if self.config.bookings_archive_dir else None)
+                    shards = self.shards
+                    self._booking_service = BookingService(
+                        BookingRepository(self.db, archive, shards), EventRepository(self.db), self.events
+                    )
+        return self._booking_service
+
+    def _catalog_cache(self) -> Optional[SharedSnapshot]:
+        """Shared events catalog snapshot, or None when CATALOG_CACHE_TTL is 0
+
+        An event.changed notification marks it stale, so the next read reloads it
+        instead of serving the old catalog until the TTL runs out.
+        """
+        if self.config.catalog_cache_ttl <= 0:
+            return None
+        path = self.config.catalog_cache_path or default_segment_path(
+            catalog_segment_name(self.config.database.host, self.config.database.database))
+        cache = SharedSnapshot(path, ttl=self.config.catalog_cache_ttl)
+        self.events.listen(EVENT_CHANGED, lambda notification: cache.invalidate())
+        return cache
+
+def _services() -> ServiceContainer:
+    return current_app.extensions["lookmyshow"]
+
+def _warm_connections(app: Flask, container: ServiceContainer):
+    """Open pooled DB connections in the background so the first request doesn't pay for it"""
+    started = time.perf_counter()
+    try:
+        opened = container.db.warm()
+        app.config["STARTUP_TIMINGS"]["db_warmup_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("Warmed %d database connections in %sms", opened, app.config["STARTUP_TIMINGS"]["db_warmup_ms"])
+    except Exception as e:
+        logger.warning("Database warm-up failed: %s", e)
+
+def _requested_fields() -> Optional[List[str]]:
+    """Sparse fieldset from ?fields=id,title,date (None means the default representation)"""
+    fields = request.args.get("fields")
+    if fields is None:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+def _include_archived() -> bool:
+    return request.args.get("include_archived", "false").lower() == "true"
+
+def _unavailable(error: UnavailableError):
+    """Fail fast with 503 (504 past the request deadline) instead of a generic 500"""
+    logger.warning("Data tier unavailable: %s", error)
+    if isinstance(error, DeadlineExceeded):
+        return jsonify({"error": "Request deadline exceeded"}), error.status_code
+    response = jsonify({"error": "Service temporarily unavailable"})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, error.status_code
+
+def _turned_away(error: WaitingRoomError):
+    response = jsonify({"error": str(error), "waiting_room": error.status_code != 404})
+    if error.retry_after is not None:
+        response.headers["Retry-After"] = str(error.retry_after)
+    return response, error.status_code
+
+def _start_deadline():
+    """Give the request a deadline: the route's budget, or less if the caller asked for less"""
+    config = current_app.config["APP_CONFIG"]
+    seconds = config.route_deadlines.get(request.endpoint, config.request_deadline_seconds)
+    requested = request.headers.get(DEADLINE_HEADER)
+    if requested:
+        try:
+            seconds = min(seconds, max(0.0, float(requested) / 1000.0))
+        except ValueError:
+            pass
+    g.deadline_token = deadlines.set_deadline(seconds)
+
+def _end_deadline(exc=None):
+    token = g.pop("deadline_token", None)
+    if token is not None:
+        deadlines.reset(token)
+
+def _start_load():
+    if request.endpoint in UNCOUNTED_ENDPOINTS:
+        return
+    _services().load.started(load_signal.queue_seconds(request.headers.get(load_signal.REQUEST_START_HEADER)))
+    g.load_counted = True
+
+def _end_load(exc=None):
+    if g.pop("load_counted", False):
+        _services().load.finished()
+
+def _start_trace():
+    """Root span for the request, continuing the caller's trace from its traceparent header"""
+    tracer = _services().tracer
+    if tracer is None:
+        return
+    g.trace_span = tracer.start_trace(f"{request.method} {request.url_rule or request.path}",
+                                      request.headers.get("traceparent"),
+                                      {"http.method": request.method, "http.target": request.full_path})
+    g.trace_token = tracing.activate(g.trace_span)
+
+def _tag_response(response):
+    span = g.get("trace_span")
+    if span is not None:
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = "error"
+        if span.sampled:
+            response.headers["X-Trace-Id"] = span.trace_id
+    return response
+
+def _end_trace(exc=None):
+    span = g.pop("trace_span", None)
+    if span is None:
+        return
+    if exc is not None:
+        span.record_exception(exc)
+    tracing.deactivate(g.pop("trace_token"))
+    span.end()
+
+def _token_ok(token: Optional[str], supplied: Optional[str]) -> bool:
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode(), token.encode())
+
+def _profile_token_ok(supplied: Optional[str]) -> bool:
+    return _token_ok(current_app.config["APP_CONFIG"].profile_token, supplied)
+
+def _start_request_profile():
+    """Sample just this request's thread when it carries the profiling header (hooked only if a token is set)"""
+    if _profile_token_ok(request.headers.get(PROFILE_HEADER)):
+        g.request_profiler = StackSampler(interval=0.001, thread_id=threading.get_ident())
+        g.request_profiler.start()
+
+def _finish_request_profile(response):
+    sampler = g.pop("request_profiler", None)
+    if sampler is not None:
+        sampler.stop()
+        profile_id = os.urandom(8).hex()
+        profiles = _services().request_profiles
+        profiles[profile_id] = dict(sampler.report(), request=f"{request.method} {request.full_path}")
+        while len(profiles) > KEPT_REQUEST_PROFILES:
+            profiles.popitem(last=False)
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+def _stop_request_profile(exc=None):
+    # after_request doesn't run when the view raised; never leave the sampler running
+    sampler = g.pop("request_profiler", None)
+    if sampler is not None:
+        sampler.stop()
+
+def _listing_format() -> Optional[str]:
+    """Representation asked for with Accept or ?format= (None: not one this worker can produce)"""
+    return listing_formats.negotiate(request.accept_mimetypes, request.args.get("format"))
+
+def _not_acceptable():
+    return jsonify({"error": "Not acceptable", "available": listing_formats.available()}), 406
+
+def _respond(payload, status: int, media_type: str = listing_formats.JSON):
+    """JSON (or ``media_type``) response; successful GETs carry an ETag and answer If-None-Match with 304"""
+    with tracing.span("serialize"):
+        if media_type == listing_formats.JSON:
+            response = jsonify(payload)
+        else:
+            response = Response(listing_formats.encode(payload, media_type), mimetype=media_type)
+    response.status_code = status
+    if request.method == "GET" and status == 200:
+        # Clients may keep the body but must check back before using it
+        response.headers["Cache-Control"] = "no-cache"
+        response.add_etag()
+        response.make_conditional(request)
+    return response
 
-# Configure CORS
-CORS(app, origins=CORS_ORIGINS)
+def _listing(payload, media_type: str):
+    """A booking listing response; the representation depends on Accept, so caches must vary on it"""
+    response = _respond(payload, 200, media_type)
+    response.vary.add("Accept")
+    return response
 
-# Initialize services
-event_service = EventService()
-booking_service = BookingService()
+api = Blueprint("api", __name__)
 
-@app.route("/api/events", methods=["GET"])
+@api.route("/api/events", methods=["GET"])
 def get_events():
     """Get all events - Application Tier endpoint"""
     try:
-        events = event_service.get_all_events()
-        return jsonify(events), 200
+        events = _services().event_service.get_all_events(_requested_fields())
+        return _respond(events, 200)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except UnavailableError as e:
+        return _unavailable(e)
     except Exception as e:
-        logger.error(f"Error in get_events: {e}")
+        logger.error("Error in get_events: %s", e, exc_info=e)
         return jsonify({"error": "Failed to retrieve events"}), 500
 
-@app.route("/api/events/<int:event_id>", methods=["GET"])
+@api.route("/api/events/<int:event_id>", methods=["GET"])
 def get_event(event_id):
     """Get a specific event - Application Tier endpoint"""
     try:
-        event = event_service.get_event_by_id(event_id)
+        event = _services().event_service.get_event_by_id(event_id, _requested_fields())
         if event:
-            return jsonify(event), 200
+            return _respond(event, 200)
         else:
             return jsonify({"error": "Event not found"}), 404
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except UnavailableError as e:
+        return _unavailable(e)
     except Exception as e:
-        logger.error(f"Error in get_event: {e}")
+        logger.error("Error in get_event: %s", e, exc_info=e)
         return jsonify({"error": "Failed to retrieve event"}), 500
 
-@app.route("/api/bookings", methods=["POST"])
+@api.route("/api/bookings", methods=["POST"])
 def create_booking():
     """Create a new booking - Application Tier endpoint"""
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
-        
+
         event_id = data.get("event_id")
         user_email = data.get("user_email")
-        
+
         if not event_id or not user_email:
             return jsonify({"error": "event_id and user_email are required"}), 400
-        
-        result = booking_service.create_booking(event_id, user_email)
-        return jsonify(result), 201
-        
+
+        # Flash on-sales: only clients the waiting room has admitted get through to the service
+        room = _services().waiting_room
+        queue_pass = None
+        if room is not None and room.covers(event_id):
+            queue_pass = room.admit(event_id, request.headers.get(TOKEN_HEADER))
+        try:
+            result = _services().booking_service.create_booking(event_id, user_email, queue_pass)
+        except QueuePassUsed:
+            room.turned_away(event_id)
+            raise WaitingRoomError("Queue token already used") from None
+        if queue_pass is not None:
+            room.booked(event_id)
+        return _respond(result, 201)
+
+    except WaitingRoomError as e:
+        return _turned_away(e)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except UnavailableError as e:
+        return _unavailable(e)
     except Exception as e:
-        logger.error(f"Error in create_booking: {e}")
+        logger.error("Error in create_booking: %s", e, exc_info=e)
         return jsonify({"error": "Booking failed"}), 500
 
-@app.route("/api/bookings", methods=["GET"])
+@api.route("/api/bookings", methods=["GET"])
 def get_bookings():
     """Get all bookings - Application Tier endpoint"""
     try:
-        bookings = booking_service.get_all_bookings()
-        return jsonify(bookings), 200
+        media_type = _listing_format()
+        if media_type is None:
+            return _not_acceptable()
+        if media_type != listing_formats.JSON:
+            fields, rows = _services().booking_service.get_booking_rows(_requested_fields(), _include_archived())
+            return _listing(listing_formats.columnar(fields, rows), media_type)
+        bookings = _services().booking_service.get_all_bookings(_requested_fields(), _include_archived())
+        return _listing(bookings, media_type)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except UnavailableError as e:
+        return _unavailable(e)
     except Exception as e:
-        logger.error(f"Error in get_bookings: {e}")
+        logger.error("Error in get_bookings: %s", e, exc_info=e)
         return jsonify({"error": "Failed to retrieve bookings"}), 500
 
-@app.route("/api/bookings/user/<email>", methods=["GET"])
+@api.route("/api/bookings/user/<email>", methods=["GET"])
 def get_user_bookings(email):
     """Get bookings for a specific user - Application Tier endpoint"""
     try:
-        bookings = booking_service.get_user_bookings(email)
-        return jsonify(bookings), 200
+        media_type = _listing_format()
+        if media_type is None:
+            return _not_acceptable()
+        if media_type != listing_formats.JSON:
+            fields, rows = _services().booking_service.get_booking_rows(_requested_fields(), _include_archived(),
+                                                                        email)
+            return _listing(listing_formats.columnar(fields, rows), media_type)
+        bookings = _services().booking_service.get_user_bookings(email, _requested_fields(), _include_archived())
+        return _listing(bookings, media_type)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except UnavailableError as e:
+        return _unavailable(e)
     except Exception as e:
-        logger.error(f"Error in get_user_bookings: {e}")
+        logger.error("Error in get_user_bookings: %s", e, exc_info=e)
         return jsonify({"error": "Failed to retrieve user bookings"}), 500
 
-@app.route("/api/health", methods=["GET"])
+@api.route("/api/waiting-room/<int:event_id>", methods=["POST"])
+def join_waiting_room(event_id):
+    """Join the queue for a flash on-sale; the token goes in X-Queue-Token once admitted"""
+    room = _services().waiting_room
+    try:
+        if room is None:
+            raise WaitingRoomError("This event has no waiting room", 404)
+        return jsonify(room.join(event_id)), 201
+    except WaitingRoomError as e:
+        return _turned_away(e)
+
+@api.route("/api/waiting-room/<int:event_id>", methods=["GET"])
+def waiting_room_status(event_id):
+    """Queue position for the token in X-Queue-Token (answered from the token, no database)"""
+    room = _services().waiting_room
+    try:
+        if room is None:
+            raise WaitingRoomError("This event has no waiting room", 404)
+        status = room.status(event_id, request.headers.get(TOKEN_HEADER))
+    except WaitingRoomError as e:
+        return _turned_away(e)
+    response = jsonify(status)
+    if not status["admitted"]:
+        # Poll again roughly when a meaningful share of the wait has passed
+        response.headers["Retry-After"] = str(max(1, min(30, int(status["wait_seconds"] / 4))))
+    return response
+
+@api.route("/api/stream", methods=["GET"])
+def stream():
+    """Server-sent events: booking.created and event.changed notifications"""
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+
+    bus = _services().events
+    subscription = bus.subscribe(last_event_id)
+    if subscription is None:
+        response = jsonify({"error": "Too many stream clients"})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+
+    config = current_app.config["APP_CONFIG"]
+    body = bus.stream(subscription, config.stream_heartbeat_seconds, config.stream_max_seconds)
+    return Response(body, mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # nginx would otherwise hold events back
+    })
+
+@api.route("/api/debug/profile", methods=["GET"])
+def profile():
+    """Sample the stacks of all request threads for ?seconds=N (token in X-Debug-Token)"""
+    config = current_app.config["APP_CONFIG"]
+    if not config.profile_token:
+        return not_found(None)
+    if not _profile_token_ok(request.headers.get(PROFILE_TOKEN_HEADER)):
+        return jsonify({"error": "Invalid debug token"}), 403
+    try:
+        seconds = min(float(request.args.get("seconds", "5")), config.profile_max_seconds)
+        interval = max(float(request.args.get("interval_ms", "5")), 1.0) / 1000.0
+    except ValueError:
+        return jsonify({"error": "seconds and interval_ms must be numbers"}), 400
+    if not _profiling.acquire(blocking=False):
+        return jsonify({"error": "A profile is already running"}), 409
+    try:
+        sampler = StackSampler(interval, thread_filter=None if request.args.get("all_threads") == "true"
+                               else in_request)
+        sampler.run(max(seconds, 0.0))
+    finally:
+        _profiling.release()
+    if request.args.get("format") == "collapsed":
+        return Response(sampler.collapsed(), mimetype="text/plain")
+    return jsonify(sampler.report())
+
+@api.route("/api/debug/profile/requests/<profile_id>", methods=["GET"])
+def request_profile(profile_id):
+    """A profile recorded for a request sent with the X-Debug-Profile header"""
+    if not current_app.config["APP_CONFIG"].profile_token:
+        return not_found(None)
+    if not _profile_token_ok(request.headers.get(PROFILE_TOKEN_HEADER)):
+        return jsonify({"error": "Invalid debug token"}), 403
+    report = _services().request_profiles.get(profile_id)
+    if report is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "collapsed":
+        return Response(report["collapsed"], mimetype="text/plain")
+    return jsonify(report)
+
+@api.route("/api/admin/analytics", methods=["GET"])
+def booking_analytics():
+    """Demand report: booking velocity, fill curves and a day/hour heatmap (token in X-Admin-Token)"""
+    config = current_app.config["APP_CONFIG"]
+    if not config.admin_token:
+        return not_found(None)
+    if not _token_ok(config.admin_token, request.headers.get(ADMIN_TOKEN_HEADER)):
+        return jsonify({"error": "Invalid admin token"}), 403
+    try:
+        # numpy stays out of worker start-up until someone asks for a report
+        import analytics
+    except ImportError:
+        return jsonify({"error": "Analytics needs numpy on this instance"}), 503
+    try:
+        days = float(request.args.get("days", "30"))
+        bin_seconds = int(float(request.args.get("bin_minutes", "60")) * 60)
+        horizon_days = int(request.args.get("horizon_days", "90"))
+        utc_offset = int(request.args.get("utc_offset", "0"))
+    except ValueError:
+        return jsonify({"error": "days, bin_minutes, horizon_days and utc_offset must be numbers"}), 400
+    if bin_seconds < 60 or not 0 <= horizon_days <= 3650 or abs(utc_offset) > 14 * 60:
+        return jsonify({"error": "bin_minutes must be at least 1, horizon_days at most 3650 "
+                                 "and utc_offset within ±840 minutes"}), 400
+    # days=0 covers every booking; keep the velocity series a sensible length either way
+    if days > 0 and days * 86400 / bin_seconds > 100000:
+        return jsonify({"error": "Too many velocity bins; raise bin_minutes"}), 400
+    try:
+        service = _services().booking_service
+        report = analytics.demand_report(service.booking_repository, service.event_repository,
+                                         days if days > 0 else None, bin_seconds, horizon_days, utc_offset,
+                                         config.analytics_chunk_size, _include_archived())
+        return jsonify(report)
+    except UnavailableError as e:
+        return _unavailable(e)
+    except Exception as e:
+        logger.error("Error in booking_analytics: %s", e, exc_info=e)
+        return jsonify({"error": "Failed to build the analytics report"}), 500
+
+@api.route("/api/metrics/load", methods=["GET"])
+def load_metrics():
+    """Autoscaling signal from requests in flight, pool use and wait, and queue time (?format=prometheus)"""
+    snapshot = _services().load.snapshot()
+    if request.args.get("format") == "prometheus":
+        return Response(load_signal.prometheus_text(snapshot), mimetype="text/plain; version=0.0.4")
+    return jsonify(snapshot)
+
+@api.route("/api/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "LookMyShow API"}), 200
+    circuit = _services().db.breaker.snapshot()
+    database = {"circuit": circuit, "prepared_statements": _services().db.statement_stats.snapshot()}
+    circuits = [circuit]
+    if _services().shards:
+        database["shards"] = [shard.breaker.snapshot() for shard in _services().shards]
+        circuits += database["shards"]
+    return jsonify({
+        "status": "healthy" if all(c["state"] == "closed" for c in circuits) else "degraded",
+        "service": "LookMyShow API",
+        "startup": current_app.config["STARTUP_TIMINGS"],
+        "database": database,
+        "logging": log_setup.stats(),
+        "stream": _services().events.stats(),
+        "waiting_room": _services().waiting_room.stats() if _services().waiting_room else None
+    }), 200
 
-@app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
-@app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
+def create_app(config: Optional[AppConfig] = None, db: Optional[DatabaseConnection] = None,
+               shards: Optional[List[DatabaseConnection]] = None) -> Flask:
+    """Application factory
+
+    Services are built lazily on first use and share one data-access layer.
+    Pass ``db`` (and ``shards`` for bookings) to run against different
+    connection managers (e.g. in tests).
+    """
+    started = time.perf_counter()
+    config = config or AppConfig.from_env()
+
+    app = Flask(__name__)
+    app.config["APP_CONFIG"] = config
+    app.config["STARTUP_TIMINGS"] = {"import_ms": round(IMPORT_MS, 2)}
+
+    # Configure CORS
+    CORS(app, origins=config.cors_origins, expose_headers=["ETag"])
+
+    container = ServiceContainer(config, db, shards)
+    app.extensions["lookmyshow"] = container
+
+    if container.tracer is not None:
+        # Flush the spans still queued when the worker exits
+        atexit.register(container.tracer.exporter.shutdown)
+
+    app.register_blueprint(api)
+    app.before_request(_start_load)
+    app.before_request(_start_deadline)
+    app.before_request(_start_trace)
+    app.after_request(_tag_response)
+    app.teardown_request(_end_deadline)
+    app.teardown_request(_end_trace)
+    app.teardown_request(_end_load)
+    if config.profile_token:
+        # Without a token the profiler adds nothing to normal requests
+        app.before_request(_start_request_profile)
+        app.after_request(_finish_request_profile)
+        app.teardown_request(_stop_request_profile)
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+
+    if config.warm_connections:
+        threading.Thread(target=_warm_connections, args=(app, container),
+                         name="db-warmup", daemon=True).start()
+
+    app.config["STARTUP_TIMINGS"]["create_app_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("LookMyShow API ready: import %sms, create_app %sms",
+                app.config["STARTUP_TIMINGS"]["import_ms"], app.config["STARTUP_TIMINGS"]["create_app_ms"])
+    return app
+
 if __name__ == "__main__":
-    logger.info(f"Starting LookMyShow API on {API_CONFIG.host}:{API_CONFIG.port}")
+    from log_setup import configure_logging
+    config = AppConfig.from_env()
+    configure_logging(config.log_level, json_output=False)
+    app = create_app(config)
+    api_config = app.config["APP_CONFIG"].api
+    logger.info("Starting LookMyShow API on %s:%s", api_config.host, api_config.port)
     app.run(
-        host=API_CONFIG.host,
-        port=API_CONFIG.port,
-        debug=API_CONFIG.debug
-    )
\ No newline at end of file
+        host=api_config.host,
+        port=api_config.port,
+        debug=api_config.debug
+    )
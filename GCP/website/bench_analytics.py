@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized demand report
+Aggregation: feeds synthetic booking chunks (as analytics.py builds them
+from the database) through DemandAggregator and reports rows per second and
+peak traced memory, against the same aggregates computed row by row in
+plain Python on a sample.
+End to end: seeds a SQLite stand-in and runs demand_report over it, so the
+chunked reads and hashing are included.
+
+Usage:
+    python bench_analytics.py [--rows 20000000] [--chunk-size 50000] [--db-bookings 500000] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, Iterator
+import numpy as np
+from analytics import DAY, Chunk, DemandAggregator, demand_report
+from data_access import BookingRepository, EventRepository
+from local_db import LocalDatabase
+from perf_gate import seed_bookings
+
+EVENTS = 200
+START = 1704067200  # 2024-01-01
+SPAN = 365 * DAY
+
+def _event_dates() -> Dict[int, str]:
+    return {e: str(np.datetime64(START + SPAN, "s").astype("datetime64[D]") + int(e % 60)) for e in range(1, EVENTS + 1)}
+
+def synthetic_chunks(rows: int, chunk_size: int, users: int, seed: int = 42) -> Iterator[Chunk]:
+    rng = np.random.default_rng(seed)
+    # A pool of buyer hashes; each booking picks one
+    buyers = rng.integers(0, 2 ** 63, size=users, dtype=np.int64).astype(np.uint64) * np.uint64(2)
+    for offset in range(0, rows, chunk_size):
+        n = min(chunk_size, rows - offset)
+        yield Chunk(rng.integers(1, EVENTS + 1, size=n, dtype=np.int64),
+                    START + rng.integers(0, SPAN, size=n, dtype=np.int64),
+                    buyers[rng.integers(0, users, size=n)])
+
+def row_by_row(chunks: Iterator[Chunk], event_dates: Dict[int, str], bin_seconds: int, horizon: int) -> int:
+    """The same aggregates one booking at a time, as a loop over cursor rows would build them"""
+    event_days = {e: int(np.datetime64(d, "D").astype(np.int64)) for e, d in event_dates.items()}
+    velocity, heatmap, fill = Counter(), Counter(), Counter()
+    buyers = defaultdict(set)
+    rows = 0
+    for chunk in chunks:
+        for event_id, ts, buyer in zip(chunk.event_ids.tolist(), chunk.timestamps.tolist(), chunk.buyers.tolist()):
+            velocity[(ts - START) // bin_seconds] += 1
+            heatmap[((ts // DAY + 3) % 7, ts % DAY // 3600)] += 1
+            fill[(event_id, min(max(event_days[event_id] - ts // DAY, 0), horizon))] += 1
+            buyers[event_id].add(buyer)
+            rows += 1
+    return rows
+
+def _measure(run) -> Dict[str, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = run()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"rows": rows, "seconds": round(elapsed, 2), "rows_per_second": round(rows / max(elapsed, 1e-9)),
+            "peak_mb": round(peak / 2 ** 20, 1)}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vectorized demand report vs a row-by-row baseline")
+    parser.add_argument("--rows", type=int, default=20000000, help="Synthetic bookings aggregated")
+    parser.add_argument("--baseline-rows", type=int, default=500000, help="Bookings for the row-by-row baseline")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=2000000)
+    parser.add_argument("--db-bookings", type=int, default=500000, help="Bookings in the SQLite end-to-end run")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    event_dates = _event_dates()
+
+    def vectorized():
+        aggregator = DemandAggregator(event_dates, START, START + SPAN, 3600, 90)
+        for chunk in synthetic_chunks(args.rows, args.chunk_size, args.users):
+            aggregator.add(chunk)
+        return aggregator.report()["bookings"]
+
+    results = {
+        "vectorized": _measure(vectorized),
+        "row_by_row": _measure(lambda: row_by_row(synthetic_chunks(args.baseline_rows, args.chunk_size, args.users),
+                                                  event_dates, 3600, 90)),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lookmyshow.db")
+        database = LocalDatabase(path)
+        seed_bookings(path, args.db_bookings, users=min(args.users, args.db_bookings))
+        db = database.connection_manager(pool_size=1)
+        try:
+            results["end_to_end_sqlite"] = _measure(lambda: demand_report(
+                BookingRepository(db), EventRepository(db), None, chunk_size=args.chunk_size)["bookings"])
+        finally:
+            db.close_all()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'run':<18} {'rows':>11} {'time':>9} {'rows/s':>12} {'peak memory':>12}")
+    for name, r in results.items():
+        print(f"{name:<18} {r['rows']:>11} {r['seconds']:>8.2f}s {r['rows_per_second']:>12,} {r['peak_mb']:>10.1f}MB")
+    speedup = results["vectorized"]["rows_per_second"] / max(results["row_by_row"]["rows_per_second"], 1)
+    print(f"\n✓ Vectorized aggregation is {speedup:.0f}x faster than row by row, "
+          f"in {results['vectorized']['peak_mb']:.0f}MB for {args.rows} bookings")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
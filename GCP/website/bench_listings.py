@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the booking listing formats on a large listing
+Seeds a SQLite stand-in with synthetic bookings, then builds the full
+listing each way the API serves it (row JSON from Booking.to_dict, columnar
+JSON and, if msgpack is installed, MessagePack built from cursor tuples) and
+reports build and encode time plus payload size, raw and gzipped.
+
+Usage:
+    python bench_listings.py [--bookings 100000] [--repeat 5] [--json]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Tuple
+from flask import Flask
+import listing_formats
+from data_access import BookingRepository, EventRepository
+from local_db import LocalDatabase
+from perf_gate import seed_bookings
+from services import BookingService
+
+def _time(call: Callable[[], object], repeat: int) -> Tuple[float, object]:
+    """Median milliseconds over ``repeat`` runs, and the last result"""
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2), result
+
+def run(service: BookingService, repeat: int) -> Dict[str, Dict[str, float]]:
+    # Row JSON goes through the app's JSON provider, exactly as jsonify() encodes it
+    app = Flask(__name__)
+    formats = {"json": None, "columnar": listing_formats.COLUMNAR_JSON}
+    if listing_formats.msgpack is not None:
+        formats["msgpack"] = listing_formats.MSGPACK
+
+    results = {}
+    for name, media_type in formats.items():
+        if media_type is None:
+            build_ms, payload = _time(service.get_all_bookings, repeat)
+            with app.app_context():
+                encode_ms, body = _time(lambda: app.json.dumps(payload).encode("utf-8"), repeat)
+        else:
+            def build():
+                return listing_formats.columnar(*service.get_booking_rows())
+            build_ms, payload = _time(build, repeat)
+            encode_ms, body = _time(lambda: listing_formats.encode(payload, media_type), repeat)
+        results[name] = {"build_ms": build_ms, "encode_ms": encode_ms, "total_ms": round(build_ms + encode_ms, 2),
+                         "bytes": len(body), "gzip_bytes": len(gzip.compress(body, 6))}
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Row JSON vs columnar JSON vs MessagePack for a large listing")
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lookmyshow.db")
+        database = LocalDatabase(path)
+        seed_bookings(path, args.bookings, args.users)
+        db = database.connection_manager(pool_size=1)
+        try:
+            results = run(BookingService(BookingRepository(db), EventRepository(db)), args.repeat)
+        finally:
+            db.close_all()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{args.bookings} bookings, median of {args.repeat}\n")
+    print(f"{'format':<10} {'build':>10} {'encode':>10} {'total':>10} {'size':>12} {'gzipped':>12}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['build_ms']:>8.1f}ms {r['encode_ms']:>8.1f}ms {r['total_ms']:>8.1f}ms "
+              f"{r['bytes'] / 1024:>10.0f}KB {r['gzip_bytes'] / 1024:>10.0f}KB")
+    base = results["json"]
+    for name, r in results.items():
+        if name != "json":
+            print(f"\n✓ {name}: {base['bytes'] / r['bytes']:.1f}x smaller, "
+                  f"{base['encode_ms'] / max(r['encode_ms'], 0.01):.1f}x faster to encode, "
+                  f"{base['total_ms'] / max(r['total_ms'], 0.01):.1f}x faster end to end")
+    if listing_formats.msgpack is None:
+        print("\n⚠️  msgpack is not installed; MessagePack was skipped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot booking path with and without server-side prepared statements
+Runs the statements a booking makes (event lookup, booking + outbox insert,
+the user's bookings) on one pooled connection, first as plain text queries
+(statement cache off) and then prepared, and reports per-operation latency.
+Against MySQL it also reports the server's parse/execute counters and, when
+performance_schema is on, the server time and CPU the statements used.
+
+Usage:
+    python bench_statements.py --local [--iterations 2000]
+    python bench_statements.py [--iterations 2000]      # the database from DB_HOST/DB_NAME/...
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional
+from config import load_database_config
+from data_access import BookingRepository, DatabaseConnection, EventRepository
+
+BENCH_DOMAIN = "bench.lookmyshow.invalid"
+OPERATIONS = ("event_by_id", "create_booking", "bookings_by_email")
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def server_counters(db: DatabaseConnection) -> Optional[Dict[str, float]]:
+    """Statement counters (and server time/CPU in seconds if performance_schema has them); None off MySQL"""
+    if db.dialect != "mysql":
+        return None
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SHOW SESSION STATUS WHERE Variable_name IN "
+                       "('Com_select', 'Com_insert', 'Com_stmt_prepare', 'Com_stmt_execute')")
+        counters = {name: float(value) for name, value in cursor.fetchall()}
+        try:
+            # SUM_CPU_TIME needs MySQL 8.0.28+; timers are in picoseconds
+            cursor.execute("SELECT SUM(SUM_TIMER_WAIT), SUM(SUM_CPU_TIME) "
+                           "FROM performance_schema.events_statements_summary_by_digest "
+                           "WHERE SCHEMA_NAME = DATABASE()")
+            wait, cpu = cursor.fetchone()
+            counters["server_time_s"] = float(wait or 0) / 1e12
+            counters["server_cpu_s"] = float(cpu or 0) / 1e12
+        except Exception:
+            pass
+    return counters
+
+def run(db: DatabaseConnection, iterations: int, label: str) -> Dict[str, Dict[str, float]]:
+    events, bookings = EventRepository(db), BookingRepository(db)
+    samples: Dict[str, List[float]] = {op: [] for op in OPERATIONS}
+    # Session counters need the same connection, so keep the pool at one
+    before = server_counters(db)
+    for i in range(iterations):
+        email = f"{label}{i}@{BENCH_DOMAIN}"
+        for op, call in (("event_by_id", lambda: events.get_event_by_id(1 + i % 5)),
+                         ("create_booking", lambda: bookings.create_booking(1 + i % 5, email)),
+                         ("bookings_by_email", lambda: bookings.get_bookings_by_email(email))):
+            started = time.perf_counter()
+            call()
+            samples[op].append(time.perf_counter() - started)
+    after = server_counters(db)
+
+    report = {op: {"p50_ms": round(_percentile(s, 50) * 1000, 3), "p95_ms": round(_percentile(s, 95) * 1000, 3),
+                   "mean_ms": round(sum(s) / len(s) * 1000, 3)} for op, s in samples.items()}
+    if before is not None and after is not None:
+        report["server"] = {name: round((after[name] - before.get(name, 0)) / iterations, 6)
+                            for name in after}  # per iteration
+    report["statements"] = db.statement_stats.snapshot()
+    return report
+
+def cleanup(db: DatabaseConnection):
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM booking_outbox WHERE payload LIKE %s", (f"%@{BENCH_DOMAIN}%",))
+        cursor.execute("DELETE FROM bookings WHERE user_email LIKE %s", (f"%@{BENCH_DOMAIN}",))
+        conn.commit()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prepared vs text statements on the booking path")
+    parser.add_argument("--local", action="store_true", help="Use a SQLite stand-in (latency only)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.local:
+        from local_db import LocalDatabase
+        database = LocalDatabase(tempfile.mkstemp(suffix=".db")[1])
+        base, connect, dialect = database.config(), database.connect, "sqlite"
+    else:
+        base, connect, dialect = load_database_config(), None, "mysql"
+
+    results = {}
+    for label, cache_size in (("text", 0), ("prepared", 32)):
+        db = DatabaseConnection(replace(base, statement_cache_size=cache_size), pool_size=1,
+                                connect=connect, dialect=dialect)
+        try:
+            results[label] = run(db, args.iterations, label)
+        finally:
+            cleanup(db)
+            db.close_all()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'operation':<18} {'text p50':>9} {'prepared p50':>13} {'text p95':>9} {'prepared p95':>13}")
+    for op in OPERATIONS:
+        text, prepared = results["text"][op], results["prepared"][op]
+        print(f"{op:<18} {text['p50_ms']:>7.3f}ms {prepared['p50_ms']:>11.3f}ms "
+              f"{text['p95_ms']:>7.3f}ms {prepared['p95_ms']:>11.3f}ms")
+    if "server" in results["prepared"]:
+        print("\nServer, per booking path:")
+        for name in sorted(results["prepared"]["server"]):
+            print(f"  {name:<18} text {results['text']['server'][name]:>10} "
+                  f" prepared {results['prepared']['server'][name]:>10}")
+    print(f"\n✓ Prepared statement cache: {results['prepared']['statements']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
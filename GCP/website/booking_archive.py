@@ -0,0 +1,93 @@
+"""
+Cold storage for archived booking partitions
+Each archived partition is one gzip-compressed NDJSON file plus an entry in
+manifest.json; BookingRepository reads them only when archived data is asked for.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+from models import Booking
+
+ARCHIVE_FIELDS = ("id", "event_id", "user_email", "timestamp", "event_title")
+
+class BookingArchive:
+    """Directory of archived booking partitions"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def manifest(self) -> List[dict]:
+        """Archived partitions, newest first"""
+        try:
+            with open(self.manifest_path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return []
+        return sorted(entries, key=lambda e: e["upper_bound"], reverse=True)
+
+    def _write_manifest(self, entries: List[dict]):
+        self._atomic_write(self.manifest_path, json.dumps(entries, indent=2).encode())
+
+    def _atomic_write(self, path: str, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def write_partition(self, partition: str, upper_bound: str, rows: Iterable[dict]) -> int:
+        """Write one partition's rows (newest first) and record it in the manifest"""
+        os.makedirs(self.directory, exist_ok=True)
+        filename = f"bookings-{partition}.ndjson.gz"
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        count = 0
+        try:
+            with gzip.open(os.fdopen(fd, "wb"), "wt", encoding="utf-8") as f:
+                for row in rows:
+                    record = {name: row.get(name) for name in ARCHIVE_FIELDS}
+                    if isinstance(record["timestamp"], datetime):
+                        record["timestamp"] = record["timestamp"].isoformat()
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    count += 1
+            os.replace(tmp, os.path.join(self.directory, filename))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        entries = [e for e in self.manifest() if e["partition"] != partition]
+        entries.append({"partition": partition, "upper_bound": upper_bound,
+                        "rows": count, "file": filename})
+        self._write_manifest(entries)
+        return count
+
+    def _read_file(self, filename: str) -> Iterator[dict]:
+        with gzip.open(os.path.join(self.directory, filename), "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def bookings(self, user_email: Optional[str] = None) -> Iterator[Booking]:
+        """Archived bookings newest first, optionally for one user"""
+        for entry in self.manifest():
+            for record in self._read_file(entry["file"]):
+                if user_email is not None and record["user_email"] != user_email:
+                    continue
+                yield Booking(
+                    id=record["id"],
+                    event_id=record["event_id"],
+                    user_email=record["user_email"],
+                    timestamp=datetime.fromisoformat(record["timestamp"]),
+                    event_title=record.get("event_title")
+                )
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Static asset build for the presentation tier
+Minifies script.js and styles.css, names them by content hash, rewrites the
+references in index.html and writes gzip variants next to every file. Hashed
+files never change, so they can be cached for a year; index.html is the only
+file browsers revalidate. Also writes the matching nginx and app.yaml rules.
+
+Usage:
+    python build_assets.py [--src DIR] [--out DIR] [--define YOUR_VM_EXTERNAL_IP=1.2.3.4]
+
+Output (default build/):
+    index.html, static/script.<hash>.js, static/styles.<hash>.css, *.gz,
+    manifest.json, nginx-cache.conf, app-handlers.yaml
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ASSETS = ("script.js", "styles.css")
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+def _skip_string(text: str, i: int) -> int:
+    """Index just past the string literal starting at ``i`` (quote or backtick)"""
+    quote = text[i]
+    i += 1
+    while i < len(text) and text[i] != quote:
+        i += 2 if text[i] == "\\" else 1
+    return i + 1
+
+def minify_css(css: str) -> str:
+    """Drop comments and whitespace that doesn't separate tokens"""
+    out, i = [], 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            end = _skip_string(css, i)
+            out.append(css[i:end])
+            i = end
+        elif css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = len(css) if end < 0 else end + 2
+        elif c.isspace():
+            while i < len(css) and css[i].isspace():
+                i += 1
+            previous = out[-1][-1:] if out else ""
+            following = css[i:i + 1]
+            # "a :hover" and "a:hover" differ, so only drop spaces next to punctuation that can't be a selector
+            if previous and following and previous not in "{};,>:" and following not in "{};,>":
+                out.append(" ")
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out).replace(";}", "}").strip()
+
+# After these a "/" starts a regex literal rather than a division
+_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "delete"}
+
+def minify_js(js: str) -> str:
+    """Strip comments and indentation; keeps line breaks so semicolon insertion is unaffected"""
+    out, literals, i = [], [], 0
+
+    def keep(literal: str):
+        # Literals are set aside so trimming lines can't touch a multi-line template
+        out.append(f"\0{len(literals)}\0")
+        literals.append(literal)
+
+    while i < len(js):
+        c = js[i]
+        if c in "\"'`":
+            end = _skip_string(js, i)
+            keep(js[i:end])
+            i = end
+        elif js.startswith("//", i):
+            end = js.find("\n", i)
+            i = len(js) if end < 0 else end
+        elif js.startswith("/*", i):
+            end = js.find("*/", i + 2)
+            i = len(js) if end < 0 else end + 2
+        elif c == "/":
+            before = "".join(out).rstrip()
+            word = re.search(r"[A-Za-z_$]+$", before)
+            if not before or before[-1] in _REGEX_AFTER or (word and word.group() in _REGEX_KEYWORDS):
+                # A regex literal, not division
+                j = i + 1
+                in_class = False
+                while j < len(js) and (js[j] != "/" or in_class):
+                    if js[j] == "\\":
+                        j += 1
+                    elif js[j] == "[":
+                        in_class = True
+                    elif js[j] == "]":
+                        in_class = False
+                    j += 1
+                keep(js[i:j + 1])
+                i = j + 1
+            else:
+                out.append(c)
+                i += 1
+        else:
+            out.append(c)
+            i += 1
+    lines = (line.strip() for line in "".join(out).splitlines())
+    code = "\n".join(line for line in lines if line) + "\n"
+    return re.sub(r"\0(\d+)\0", lambda m: literals[int(m.group(1))], code)
+
+def minify_html(html: str) -> str:
+    """Drop comments and indentation"""
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
+    lines = (line.strip() for line in html.splitlines())
+    return "\n".join(line for line in lines if line) + "\n"
+
+MINIFIERS = {".css": minify_css, ".js": minify_js, ".html": minify_html}
+
+def hashed_name(name: str, content: bytes) -> str:
+    stem, ext = name.rsplit(".", 1)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}.{ext}"
+
+def write_gzip(path: Path):
+    """Precompressed variant for nginx gzip_static (mtime 0 keeps builds reproducible)"""
+    with open(path, "rb") as src, open(f"{path}.gz", "wb") as raw:
+        with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as gz:
+            shutil.copyfileobj(src, gz)
+
+def nginx_rules(root: str = "/var/www/html/lookmyshow") -> str:
+    return f"""# Generated by build_assets.py - include inside the server block
+root {root};
+gzip_static on;
+
+# Fingerprinted assets never change; a new build gets new names
+location /static/ {{
+    add_header Cache-Control "{IMMUTABLE}";
+    try_files $uri =404;
+}}
+
+# index.html points at the current fingerprints, so browsers must revalidate it
+location / {{
+    add_header Cache-Control "{REVALIDATE}";
+    try_files $uri $uri/ /index.html;
+}}
+"""
+
+def app_engine_handlers(build_dir: str = "build") -> str:
+    return f"""handlers:
+- url: /api/.*
+  script: auto
+
+- url: /static/(.*)
+  static_files: {build_dir}/static/\\1
+  upload: {build_dir}/static/.*
+  expiration: "365d"
+  http_headers:
+    Cache-Control: "{IMMUTABLE}"
+
+# No catalog snapshot here (see build_assets --define): a 404 from the API, not index.html
+- url: /catalog/.*
+  script: auto
+
+- url: /.*
+  static_files: {build_dir}/index.html
+  upload: {build_dir}/index.html
+  http_headers:
+    Cache-Control: "{REVALIDATE}"
+"""
+
+def build(src: Path, out: Path, defines: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Build ``src`` into ``out``; returns the manifest (source name -> served path)"""
+    defines = defines or {}
+    if out.exists():
+        shutil.rmtree(out)
+    (out / "static").mkdir(parents=True)
+
+    manifest = {}
+    for name in ASSETS:
+        text = (src / name).read_text(encoding="utf-8")
+        for key, value in defines.items():
+            text = text.replace(key, value)
+        content = MINIFIERS[Path(name).suffix](text).encode("utf-8")
+        served = f"static/{hashed_name(name, content)}"
+        (out / served).write_bytes(content)
+        write_gzip(out / served)
+        manifest[name] = served
+
+    def rewrite(match):
+        # Absolute, since index.html is also served for deeper paths
+        served = manifest.get(match.group(2))
+        return f'{match.group(1)}="/{served}"' if served else match.group(0)
+
+    html = re.sub(r'\b(href|src)="([^"]+)"', rewrite, (src / "index.html").read_text(encoding="utf-8"))
+    (out / "index.html").write_text(minify_html(html), encoding="utf-8")
+    write_gzip(out / "index.html")
+
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    (out / "nginx-cache.conf").write_text(nginx_rules())
+    (out / "app-handlers.yaml").write_text(app_engine_handlers(out.name))
+    return manifest
+
+def main(argv: Optional[List[str]] = None) -> int:
+    here = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Minify, fingerprint and precompress the frontend")
+    parser.add_argument("--src", default=str(here), help="Directory with index.html, script.js, styles.css")
+    parser.add_argument("--out", default=str(here / "build"))
+    parser.add_argument("--define", action="append", default=[], metavar="NAME=VALUE",
+                        help="Replace NAME with VALUE in the assets before hashing")
+    args = parser.parse_args(argv)
+
+    defines = dict(d.split("=", 1) for d in args.define)
+    src, out = Path(args.src), Path(args.out)
+    manifest = build(src, out, defines)
+    for name, served in manifest.items():
+        before = (src / name).stat().st_size
+        after = (out / served).stat().st_size
+        compressed = Path(f"{out / served}.gz").stat().st_size
+        print(f"✓ {name:<11} → {served:<28} {before:>6} B → {after:>6} B ({compressed} B gzipped)")
+    print(f"✓ index.html  → {out / 'index.html'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Publish the events catalog as static JSON for nginx or the static bucket
+Renders the catalog through EventService into an immutable, versioned file
+(events.<version>.json, named by a hash of its content) and then points
+latest.json at it. Browsers fetch the small pointer with revalidation and
+keep the versioned file cached, so catalog reads never reach the Python tier.
+Each file is replaced atomically; the previous versions stay for clients
+still holding an older pointer.
+
+Usage:
+    python catalog_publisher.py --target /var/www/lookmyshow-catalog            # publish once
+    python catalog_publisher.py --target gs://<bucket>/catalog                  # needs google-cloud-storage
+    python catalog_publisher.py --target /var/www/lookmyshow-catalog --watch --interval 300
+
+--watch republishes on every event.changed notification on the EVENT_FANOUT
+log (python event_bus.py publish event.changed ...); --interval republishes
+on a schedule. An unchanged catalog is not rewritten.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Optional
+from event_bus import EVENT_CHANGED, fanout_from_spec
+from services import EventService
+
+logger = logging.getLogger(__name__)
+
+POINTER = "latest.json"
+# Versioned files are immutable; the pointer must be revalidated
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+class DirectoryTarget:
+    """Files in a local directory (the nginx catalog root)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, name: str, data: bytes, cache_control: str):
+        # nginx sets Cache-Control for these paths itself
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, 0o644)  # mkstemp creates 0600; nginx has to read it
+            os.replace(tmp, os.path.join(self.directory, name))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def read(self, name: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def names(self) -> List[str]:
+        return [name for name in os.listdir(self.directory) if not name.startswith(".")]
+
+    def delete(self, name: str):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+class BucketTarget:
+    """Objects under a prefix in a Cloud Storage bucket (single-object writes are atomic there)"""
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        try:
+            from google.cloud import storage
+        except ImportError:
+            raise RuntimeError("Publishing to gs:// needs google-cloud-storage (pip install google-cloud-storage)")
+        self.client = storage.Client()
+        self.bucket = self.client.bucket(bucket)
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+
+    def write(self, name: str, data: bytes, cache_control: str):
+        blob = self.bucket.blob(self.prefix + name)
+        blob.cache_control = cache_control
+        blob.upload_from_string(data, content_type="application/json")
+
+    def read(self, name: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+        try:
+            return self.bucket.blob(self.prefix + name).download_as_bytes()
+        except NotFound:
+            return None
+
+    def names(self) -> List[str]:
+        return [blob.name[len(self.prefix):] for blob in self.client.list_blobs(self.bucket, prefix=self.prefix)]
+
+    def delete(self, name: str):
+        from google.api_core.exceptions import NotFound
+        try:
+            self.bucket.blob(self.prefix + name).delete()
+        except NotFound:
+            pass
+
+def target_from_spec(spec: str):
+    """A BucketTarget for 'gs://bucket/prefix', otherwise a DirectoryTarget"""
+    if spec.startswith("gs://"):
+        bucket, _, prefix = spec[len("gs://"):].partition("/")
+        return BucketTarget(bucket, prefix)
+    return DirectoryTarget(spec)
+
+class CatalogPublisher:
+    """Renders the catalog and publishes it to ``target`` when it changed"""
+
+    def __init__(self, event_service: EventService, target, keep: int = 5):
+        self.event_service = event_service
+        self.target = target
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[dict]:
+        """The catalog exactly as GET /api/events returns it"""
+        return self.event_service.get_all_events()
+
+    def _pointer(self) -> dict:
+        data = self.target.read(POINTER)
+        return json.loads(data) if data else {}
+
+    def publish(self, force: bool = False) -> Optional[str]:
+        """Publish the current catalog; returns its version, or None when it was already published"""
+        with self._lock:
+            events = self.render()
+            body = json.dumps(events, separators=(",", ":"), sort_keys=True).encode("utf-8")
+            version = hashlib.sha256(body).hexdigest()[:12]
+            pointer = self._pointer()
+            if pointer.get("version") == version and not force:
+                return None
+            name = f"events.{version}.json"
+            # The versioned file must exist before anything points at it
+            self.target.write(name, body, IMMUTABLE)
+            history = [v for v in [pointer.get("version")] + pointer.get("previous", []) if v and v != version]
+            self.target.write(POINTER, json.dumps({
+                "version": version,
+                "path": name,
+                "count": len(events),
+                "published_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "previous": history[:self.keep - 1],
+            }).encode("utf-8"), REVALIDATE)
+            self._prune({f"events.{v}.json" for v in [version] + history[:self.keep - 1]})
+            logger.info("Published events catalog %s", version)
+            return version
+
+    def _prune(self, kept: set):
+        for name in self.target.names():
+            if name.startswith("events.") and name.endswith(".json") and name not in kept:
+                self.target.delete(name)
+
+    def run(self, interval: float = 0.0, fanout=None, stop: Optional[threading.Event] = None):
+        """Publish now, then on every event.changed from ``fanout`` and/or every ``interval`` seconds"""
+        stop = stop or threading.Event()
+        changed = threading.Event()
+        if fanout is not None:
+            fanout.start(lambda notification: changed.set() if notification.topic == EVENT_CHANGED else None)
+        try:
+            while not stop.is_set():
+                changed.clear()
+                try:
+                    self.publish()
+                except Exception as e:
+                    # Keep serving the last snapshot; the next change or tick retries
+                    logger.error("Publishing the events catalog failed: %s", e)
+                deadline = time.monotonic() + interval if interval > 0 else None
+                while not stop.is_set() and not changed.is_set():
+                    if deadline is not None and time.monotonic() >= deadline:
+                        break
+                    changed.wait(0.2)
+        finally:
+            if fanout is not None:
+                fanout.stop()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Publish the events catalog as static JSON")
+    parser.add_argument("--target", default=os.getenv("CATALOG_TARGET"),
+                        help="Directory or gs://bucket/prefix (default: $CATALOG_TARGET)")
+    parser.add_argument("--watch", action="store_true", help="Republish on event.changed from EVENT_FANOUT")
+    parser.add_argument("--fanout", default=os.getenv("EVENT_FANOUT"))
+    parser.add_argument("--interval", type=float, default=0.0, help="Also republish every N seconds")
+    parser.add_argument("--keep", type=int, default=5, help="Versions kept for clients with an older pointer")
+    parser.add_argument("--force", action="store_true", help="Rewrite even if unchanged")
+    args = parser.parse_args(argv)
+
+    if not args.target:
+        print("❌ No target: pass --target or set CATALOG_TARGET")
+        return 1
+    from config import load_database_config
+    from data_access import DatabaseConnection, EventRepository
+    from log_setup import configure_logging
+    configure_logging(json_output=False)
+
+    publisher = CatalogPublisher(EventService(EventRepository(DatabaseConnection(load_database_config()))),
+                                 target_from_spec(args.target), args.keep)
+    if not args.watch and args.interval <= 0:
+        version = publisher.publish(force=args.force)
+        print(f"✓ Published catalog {version}" if version else "✓ Catalog unchanged; nothing to publish")
+        return 0
+    fanout = fanout_from_spec(args.fanout) if args.watch else None
+    if args.watch and fanout is None:
+        print("❌ --watch needs the fan-out log: pass --fanout or set EVENT_FANOUT")
+        return 1
+    print(f"👀 Publishing to {args.target}" + (" on event.changed" if fanout else "")
+          + (f" every {args.interval:g}s" if args.interval > 0 else ""))
+    try:
+        publisher.run(args.interval, fanout)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
 
 @dataclass
 class DatabaseConfig:
@@ -9,6 +10,12 @@ class DatabaseConfig:
     password: str
     database: str
     port: int = 3306
+    connect_timeout: int = 5
+    read_timeout: int = 15
+    read_retries: int = 2
+    breaker_failures: int = 5
+    breaker_reset_seconds: float = 30.0
+    statement_cache_size: int = 32
 
 @dataclass
 class APIConfig:
@@ -17,20 +24,153 @@ class APIConfig:
     port: int = 5000
     debug: bool = False
 
-# Database configuration - In production, use environment variables
-DATABASE_CONFIG = DatabaseConfig(
-    host=os.getenv("DB_HOST", "104.198.208.198"),
-    user=os.getenv("DB_USER", "root"),
-    password=os.getenv("DB_PASSWORD", "M7rk|(`J&H1+*I>i"),
-    database=os.getenv("DB_NAME", "eventsdb")
-)
-
-# API configuration
-API_CONFIG = APIConfig(
-    host=os.getenv("API_HOST", "0.0.0.0"),
-    port=int(os.getenv("API_PORT", "5000")),
-    debug=os.getenv("DEBUG", "False").lower() == "true"
-)
-
-# CORS settings
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",") 
\ No newline at end of file
+@dataclass
+class AppConfig:
+    """Everything create_app needs to build the application tier"""
+    database: DatabaseConfig
+    api: APIConfig = field(default_factory=APIConfig)
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+    db_pool_size: int = 5
+    warm_connections: bool = True
+    catalog_cache_ttl: float = 0.0
+    catalog_cache_path: Optional[str] = None
+    bookings_archive_dir: Optional[str] = None
+    request_deadline_seconds: float = 10.0
+    route_deadlines: Dict[str, float] = field(default_factory=dict)
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_burst: int = 10
+    log_window_seconds: float = 60.0
+    trace_sample_ratio: float = 0.0
+    trace_exporter: Optional[str] = None
+    stream_buffer_size: int = 1000
+    stream_client_queue: int = 100
+    stream_max_clients: int = 100
+    stream_heartbeat_seconds: float = 15.0
+    stream_max_seconds: float = 0.0
+    event_fanout: Optional[str] = None
+    booking_shards: List[DatabaseConfig] = field(default_factory=list)
+    profile_token: Optional[str] = None
+    profile_max_seconds: float = 30.0
+    waiting_room_events: List[int] = field(default_factory=list)
+    waiting_room_rate: float = 10.0
+    waiting_room_burst: int = 10
+    waiting_room_secret: Optional[str] = None
+    waiting_room_admit_seconds: float = 300.0
+    admin_token: Optional[str] = None
+    analytics_chunk_size: int = 50000
+    load_target_concurrency: float = 8.0
+    load_target_pool_wait_ms: float = 50.0
+    load_target_queue_ms: float = 100.0
+    load_window_seconds: float = 20.0
+
+    @classmethod
+    def from_env(cls) -> "AppConfig":
+        """Build the configuration from environment variables"""
+        database = load_database_config()
+        return cls(
+            database=database,
+            api=load_api_config(),
+            cors_origins=load_cors_origins(),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            warm_connections=os.getenv("DB_WARMUP", "True").lower() == "true",
+            catalog_cache_ttl=float(os.getenv("CATALOG_CACHE_TTL", "0")),
+            catalog_cache_path=os.getenv("CATALOG_CACHE_PATH"),
+            bookings_archive_dir=os.getenv("BOOKINGS_ARCHIVE_DIR"),
+            request_deadline_seconds=float(os.getenv("REQUEST_DEADLINE_SECONDS", "10")),
+            route_deadlines=parse_route_deadlines(os.getenv("ROUTE_DEADLINES", "")),
+            log_level=os.getenv("LOG_LEVEL", "INFO"),
+            log_json=os.getenv("LOG_FORMAT", "json").lower() == "json",
+            log_burst=int(os.getenv("LOG_BURST", "10")),
+            log_window_seconds=float(os.getenv("LOG_WINDOW_SECONDS", "60")),
+            trace_sample_ratio=float(os.getenv("TRACE_SAMPLE_RATIO", "0")),
+            trace_exporter=os.getenv("TRACE_EXPORTER"),
+            stream_buffer_size=int(os.getenv("STREAM_BUFFER_SIZE", "1000")),
+            stream_client_queue=int(os.getenv("STREAM_CLIENT_QUEUE", "100")),
+            stream_max_clients=int(os.getenv("STREAM_MAX_CLIENTS", "100")),
+            stream_heartbeat_seconds=float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15")),
+            stream_max_seconds=float(os.getenv("STREAM_MAX_SECONDS", "0")),
+            event_fanout=os.getenv("EVENT_FANOUT"),
+            booking_shards=parse_shard_map(os.getenv("BOOKING_SHARDS", ""), database),
+            profile_token=os.getenv("DEBUG_PROFILE_TOKEN") or None,
+            profile_max_seconds=float(os.getenv("DEBUG_PROFILE_MAX_SECONDS", "30")),
+            waiting_room_events=[int(e) for e in os.getenv("WAITING_ROOM_EVENTS", "").split(",") if e.strip()],
+            waiting_room_rate=float(os.getenv("WAITING_ROOM_RATE", "10")),
+            waiting_room_burst=int(os.getenv("WAITING_ROOM_BURST", "10")),
+            waiting_room_secret=os.getenv("WAITING_ROOM_SECRET") or None,
+            waiting_room_admit_seconds=float(os.getenv("WAITING_ROOM_ADMIT_SECONDS", "300")),
+            admin_token=os.getenv("ADMIN_TOKEN") or None,
+            analytics_chunk_size=int(os.getenv("ANALYTICS_CHUNK_SIZE", "50000")),
+            load_target_concurrency=float(os.getenv("LOAD_TARGET_CONCURRENCY", "8")),
+            load_target_pool_wait_ms=float(os.getenv("LOAD_TARGET_POOL_WAIT_MS", "50")),
+            load_target_queue_ms=float(os.getenv("LOAD_TARGET_QUEUE_MS", "100")),
+            load_window_seconds=float(os.getenv("LOAD_WINDOW_SECONDS", "20"))
+        )
+
+def parse_route_deadlines(text: str) -> Dict[str, float]:
+    """Per-route deadlines from 'api.get_bookings=5,api.get_events=2' (endpoint name = seconds)"""
+    deadlines = {}
+    for part in text.split(","):
+        if part.strip():
+            endpoint, _, seconds = part.partition("=")
+            deadlines[endpoint.strip()] = float(seconds)
+    return deadlines
+
+def parse_shard_map(text: str, base: DatabaseConfig) -> List[DatabaseConfig]:
+    """Bookings shards from 'host[:port]/database,...' in shard order; credentials come from ``base``
+
+    The order is the map: a user's bookings live on shard hash(email) % count,
+    so changing the list means running reshard.py.
+    """
+    shards = []
+    for part in text.split(","):
+        if part.strip():
+            address, _, database = part.strip().partition("/")
+            host, _, port = address.partition(":")
+            shards.append(replace(base, host=host, port=int(port) if port else base.port,
+                                  database=database or base.database))
+    return shards
+
+def load_database_config() -> DatabaseConfig:
+    """Database configuration - In production, use environment variables"""
+    return DatabaseConfig(
+        host=os.getenv("DB_HOST", "104.198.208.198"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", "M7rk|(`J&H1+*I>i"),
+        database=os.getenv("DB_NAME", "eventsdb"),
+        port=int(os.getenv("DB_PORT", "3306")),
+        connect_timeout=int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+        read_timeout=int(os.getenv("DB_READ_TIMEOUT", "15")),
+        read_retries=int(os.getenv("DB_READ_RETRIES", "2")),
+        breaker_failures=int(os.getenv("DB_BREAKER_FAILURES", "5")),
+        breaker_reset_seconds=float(os.getenv("DB_BREAKER_RESET_SECONDS", "30")),
+        statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "32"))
+    )
+
+def load_api_config() -> APIConfig:
+    """API configuration"""
+    return APIConfig(
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "5000")),
+        debug=os.getenv("DEBUG", "False").lower() == "true"
+    )
+
+def load_cors_origins() -> List[str]:
+    """CORS settings"""
+    return os.getenv("CORS_ORIGINS", "*").split(",")
+
+# DATABASE_CONFIG, API_CONFIG and CORS_ORIGINS are still importable from this
+# module, but the environment is only read when one of them is first used.
+_LAZY_SETTINGS = {
+    "DATABASE_CONFIG": load_database_config,
+    "API_CONFIG": load_api_config,
+    "CORS_ORIGINS": load_cors_origins,
+}
+
+def __getattr__(name):
+    loader = _LAZY_SETTINGS.get(name)
+    if loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = loader()
+    globals()[name] = value
+    return value
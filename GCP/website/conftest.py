@@ -0,0 +1,33 @@
+"""
+Shared fixtures: the API over a fresh SQLite stand-in database
+"""
+
+import pytest
+from app import create_app
+from config import AppConfig
+from local_db import LocalDatabase
+
+@pytest.fixture
+def database(tmp_path):
+    return LocalDatabase(str(tmp_path / "lookmyshow.db"))
+
+@pytest.fixture
+def db(database):
+    return database.connection_manager(pool_size=2)
+
+@pytest.fixture
+def make_app(database, db):
+    """Build the app over ``database``; keyword arguments override AppConfig fields
+
+    Pass ``db=`` or ``shards=`` to serve through other connection managers.
+    """
+    pooled = db
+
+    def make(db=None, shards=None, **overrides):
+        config = AppConfig(database=database.config(), warm_connections=False, **overrides)
+        return create_app(config, db=db or pooled, shards=shards)
+    return make
+
+@pytest.fixture
+def client(make_app):
+    return make_app().test_client()
@@ -1,139 +1,891 @@
+import contextvars
+import hashlib
+import heapq
+import json
 import mysql.connector
-from typing import List, Optional
+import queue
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 import logging
 from contextlib import contextmanager
-from models import Event, Booking
-from config import DATABASE_CONFIG
+from mysql.connector.connection import MySQLConnection
+from mysql.connector.cursor import MySQLCursorPrepared, MySQLCursorPreparedDict
+from models import Event, Booking, OutboxMessage, QueuePass
+from booking_archive import BookingArchive
+from config import DatabaseConfig, load_database_config
+from resilience import UnavailableError, get_breaker, retry
+import deadlines
+import tracing
+from deadlines import DeadlineExceeded
+
+try:
+    from mysql.connector.connection_cext import CMySQLConnection
+    from mysql.connector.cursor_cext import CMySQLCursorPrepared, CMySQLCursorPreparedDict
+except ImportError:  # the driver was built without its C extension
+    CMySQLConnection = None
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the database (or the network to it) is unhealthy, as opposed to a bad query
+TRANSIENT_ERRORS = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError, TimeoutError)
+
+def database_unavailable(error: Exception) -> UnavailableError:
+    """The 503 a transient database error becomes once it is no longer worth retrying"""
+    return UnavailableError(f"Database unavailable: {error}")
+
+# MySQL error raised when a statement hits MAX_EXECUTION_TIME
+ER_QUERY_TIMEOUT = 3024
+# The server no longer knows a prepared statement id (e.g. the session was reset)
+ER_UNKNOWN_STMT_HANDLER = 1243
+# Duplicate value for a primary or unique key
+ER_DUP_ENTRY = 1062
+_SELECT = re.compile(r"^(\s*SELECT)\b", re.IGNORECASE)
+
+def _set_socket_timeout(conn, seconds: float):
+    """Socket timeout for the pure-Python driver (the C extension has no per-call timeout)"""
+    sock = getattr(getattr(conn, "_socket", None), "sock", None)
+    if sock is not None:
+        sock.settimeout(seconds)
+
+class InstrumentedCursor:
+    """Cursor wrapper that applies the request deadline to every statement
+
+    SELECTs get a MAX_EXECUTION_TIME hint for the time left, so MySQL itself
+    kills a query the client has given up on, and the socket timeout is
+    shortened to match.
+    """
+
+    def __init__(self, cursor, connection: "InstrumentedConnection"):
+        self._cursor = cursor
+        self._connection = connection
+
+    def _run(self, method, operation: str, *args):
+        with tracing.span("sql", statement=" ".join(operation.split())[:500]):
+            return self._run_with_deadline(method, operation, *args)
+
+    def _run_with_deadline(self, method, operation: str, *args, hint: bool = True):
+        if self._connection.on_query is not None:
+            self._connection.on_query()
+        left = deadlines.remaining()
+        if left is not None:
+            if left <= 0:
+                raise DeadlineExceeded("Deadline exceeded before executing statement")
+            if hint:
+                operation = _SELECT.sub(rf"\1 /*+ MAX_EXECUTION_TIME({max(1, int(left * 1000))}) */",
+                                        operation, count=1)
+            _set_socket_timeout(self._connection.raw, min(self._connection.read_timeout, left + 0.5))
+        try:
+            return method(operation, *args)
+        except (mysql.connector.Error, TimeoutError) as e:
+            cancelled = getattr(e, "errno", None) == ER_QUERY_TIMEOUT
+            if isinstance(e, TRANSIENT_ERRORS) and not cancelled:
+                # The socket timed out or dropped mid-statement; the rest of the reply would be
+                # read as the next statement's result, so this session is never reused
+                self._connection.discard()
+            if cancelled or (left is not None and deadlines.remaining() <= 0):
+                raise DeadlineExceeded("Statement cancelled at the request deadline") from e
+            raise
+        finally:
+            if left is not None:
+                _set_socket_timeout(self._connection.raw, self._connection.read_timeout)
+
+    def execute(self, operation: str, *args, **kwargs):
+        return self._run(lambda op, *a: self._cursor.execute(op, *a, **kwargs), operation, *args)
+
+    def executemany(self, operation: str, seq_params):
+        return self._run(self._cursor.executemany, operation, seq_params)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class StatementStats:
+    """Prepared statement cache counters, summed over a DatabaseConnection's connections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "prepares": 0, "evictions": 0, "invalidations": 0}
+
+    def add(self, counter: str, n: int = 1):
+        with self._lock:
+            self.counts[counter] += n
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self.counts)
+        used = stats["hits"] + stats["prepares"]
+        stats["hit_ratio"] = round(stats["hits"] / used, 3) if used else 0.0
+        return stats
+
+class PoolStats:
+    """Connection checkout counters for a DatabaseConnection: how many are in use and how long getting one took
+
+    ``in_use_seconds`` is the time integral of ``in_use``, so the average
+    over any interval is the difference of two readings over its length.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.in_use = 0
+        self._in_use_seconds = 0.0
+        self._changed = clock()
+        self.counts = {"acquired": 0, "opened": 0}
+        self.wait_seconds = 0.0
+
+    def _level(self, delta: int, now: float):
+        self._in_use_seconds += self.in_use * (now - self._changed)
+        self._changed = now
+        self.in_use += delta
+
+    def acquired(self, waited: float):
+        with self._lock:
+            self._level(1, self._clock())
+            self.counts["acquired"] += 1
+            self.wait_seconds += waited
+
+    def released(self):
+        with self._lock:
+            self._level(-1, self._clock())
+
+    def opened(self):
+        with self._lock:
+            self.counts["opened"] += 1
+
+    def totals(self) -> Dict[str, float]:
+        with self._lock:
+            now = self._clock()
+            return dict(self.counts, in_use=self.in_use, wait_seconds=self.wait_seconds,
+                        in_use_seconds=self._in_use_seconds + self.in_use * (now - self._changed))
+
+class _ReusingPreparedCursor:
+    """Re-executes the statement it already prepared without a COM_STMT_RESET first
+
+    mysql-connector 8.1 resets the statement before every execute, one more
+    round-trip per query. The reset only discards long data and an open
+    server-side cursor, and the statement cache uses neither: PreparedCursor
+    sends parameters inline and drains every result.
+    """
+
+    def execute(self, operation, params=None, multi=False):
+        params = params or ()
+        if operation is not self._executed or self._param_count() != len(params):
+            # First use, or let the driver raise its own error
+            return super().execute(operation, params, multi)
+        self._execute_prepared(params)
+
+class _ReusingCursor(_ReusingPreparedCursor, MySQLCursorPrepared):
+    def _param_count(self) -> int:
+        return len(self._prepared["parameters"]) if self._prepared else -1
+
+    def _execute_prepared(self, params):
+        self._handle_result(self._connection.cmd_stmt_execute(
+            self._prepared["statement_id"], data=params, parameters=self._prepared["parameters"]))
+
+class _ReusingDictCursor(_ReusingCursor, MySQLCursorPreparedDict):
+    pass
+
+_REUSING_CURSORS = {(MySQLConnection, False): _ReusingCursor, (MySQLConnection, True): _ReusingDictCursor}
+
+if CMySQLConnection is not None:
+    class _CReusingCursor(_ReusingPreparedCursor, CMySQLCursorPrepared):
+        def _param_count(self) -> int:
+            return self._stmt.param_count if self._stmt else -1
+
+        def _execute_prepared(self, params):
+            self._cnx.handle_unread_result(prepared=True)
+            result = self._cnx.cmd_stmt_execute(self._stmt, *params)
+            if result:
+                self._handle_result(result)
+
+    class _CReusingDictCursor(_CReusingCursor, CMySQLCursorPreparedDict):
+        pass
+
+    _REUSING_CURSORS.update({(CMySQLConnection, False): _CReusingCursor, (CMySQLConnection, True): _CReusingDictCursor})
+
+def _prepared_cursor(conn, dictionary: bool):
+    """A prepared cursor that skips the per-execute reset on the MySQL drivers"""
+    for (driver, wants_dict), cursor_class in _REUSING_CURSORS.items():
+        if wants_dict == dictionary and isinstance(conn, driver):
+            return conn.cursor(cursor_class=cursor_class)
+    return conn.cursor(prepared=True, dictionary=dictionary)
+
+class StatementCache:
+    """Server-side prepared statements of one pooled connection, least recently used evicted first
+
+    Statements belong to the MySQL session, so the cache lives and dies with
+    its connection.
+    """
+
+    def __init__(self, size: int, stats: StatementStats):
+        self.size = size
+        self.stats = stats
+        self._cursors: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get(self, conn, operation: str, dictionary: bool) -> tuple:
+        """(prepared cursor, operation) - the driver only skips re-preparing for the identical string object"""
+        key = (operation, dictionary)
+        entry = self._cursors.get(key)
+        if entry is not None:
+            self._cursors.move_to_end(key)
+            self.stats.add("hits")
+            return entry
+        entry = self._cursors[key] = (_prepared_cursor(conn, dictionary), operation)
+        self.stats.add("prepares")
+        if len(self._cursors) > self.size:
+            _, (evicted, _) = self._cursors.popitem(last=False)
+            self.stats.add("evictions")
+            _close_quietly(evicted)
+        return entry
+
+    def clear(self):
+        """Forget every statement (the session that held them is gone)"""
+        if self._cursors:
+            self.stats.add("invalidations", len(self._cursors))
+        for cursor, _ in self._cursors.values():
+            _close_quietly(cursor)
+        self._cursors.clear()
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+class PreparedCursor(InstrumentedCursor):
+    """Cursor whose statements are prepared once per connection and then only executed
+
+    The per-call MAX_EXECUTION_TIME hint would make every statement text
+    unique, so prepared statements rely on the socket timeout alone for the
+    request deadline; use them for the short, indexed hot-path statements.
+    """
+
+    def __init__(self, statements: StatementCache, connection: "InstrumentedConnection", dictionary: bool):
+        super().__init__(None, connection)
+        self._statements = statements
+        self._dictionary = dictionary
+
+    def execute(self, operation: str, params=()):
+        for attempt in range(2):
+            self._cursor, prepared = self._statements.get(self._connection.raw, operation, self._dictionary)
+            with tracing.span("sql", statement=" ".join(operation.split())[:500], prepared=True):
+                try:
+                    return self._run_with_deadline(self._cursor.execute, prepared, params, hint=False)
+                except mysql.connector.Error as e:
+                    if e.errno != ER_UNKNOWN_STMT_HANDLER or attempt:
+                        raise
+                    self._statements.clear()
+
+    def fetchone(self):
+        # Drain the rest so the next statement on this connection doesn't hit an unread result
+        rows = self._cursor.fetchall()
+        return rows[0] if rows else None
+
+    def executemany(self, operation: str, seq_params):
+        # Batches aren't prepared: the driver rewrites an INSERT batch into one multi-row statement
+        self._cursor = self._connection.raw.cursor(dictionary=self._dictionary)
+        return self._run(self._cursor.executemany, operation, seq_params)
+
+class InstrumentedConnection:
+    """The connection handed to repositories; cursors it creates are instrumented
+
+    ``cursor(prepared=True)`` reuses the connection's prepared statements
+    when it has a statement cache, and is a plain cursor otherwise.
+    """
+
+    def __init__(self, conn, read_timeout: float, statements: Optional[StatementCache] = None,
+                 on_query: Optional[Callable[[], None]] = None):
+        self.raw = conn
+        self.read_timeout = read_timeout
+        self.statements = statements
+        self.on_query = on_query
+        self.discarded = False
+
+    def discard(self):
+        """Drop the socket without a goodbye; the pool sees a closed connection and doesn't take it back"""
+        self.discarded = True
+        try:
+            getattr(self.raw, "shutdown", self.raw.close)()
+        except Exception:
+            pass
+
+    def cursor(self, *args, prepared: bool = False, **kwargs) -> InstrumentedCursor:
+        if prepared and self.statements is not None:
+            return PreparedCursor(self.statements, self, kwargs.get("dictionary", False))
+        return InstrumentedCursor(self.raw.cursor(*args, **kwargs), self)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
 
 class DatabaseConnection:
-    """Database connection manager for the data tier"""
+    """Database connection manager for the data tier
+
+    With ``pool_size`` > 0 up to that many idle connections are kept open and
+    reused across requests instead of reconnecting on every call, and each
+    keeps up to ``statement_cache_size`` prepared statements (0 disables
+    them). ``dialect`` is "mysql" unless ``connect`` points at a stand-in
+    (see local_db.py). ``queries`` counts the statements run through it.
+    ``id_series`` (increment, offset) makes every session hand out
+    AUTO_INCREMENT ids from one residue class (see shard_id_series).
+
+    Every connection goes through the endpoint's circuit breaker, so while
+    the database is down callers get CircuitOpenError immediately instead
+    of waiting for a TCP timeout.
+    """
     
-    def __init__(self):
-        self.config = DATABASE_CONFIG
+    def __init__(self, config: Optional[DatabaseConfig] = None, pool_size: int = 0,
+                 connect: Optional[Callable] = None, dialect: str = "mysql",
+                 id_series: Optional[Tuple[int, int]] = None):
+        self.config = config or load_database_config()
+        self.pool_size = pool_size
+        self.dialect = dialect
+        self.id_series = id_series
+        self._connect = connect or mysql.connector.connect
+        self._idle = queue.LifoQueue(maxsize=pool_size) if pool_size > 0 else None
+        self.statement_stats = StatementStats()
+        self.pool_stats = PoolStats()
+        self.queries = 0
+        self._queries_lock = threading.Lock()
+        self._statements: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.breaker = get_breaker(
+            f"{self.config.host}:{self.config.port}/{self.config.database}",
+            failure_threshold=self.config.breaker_failures,
+            reset_timeout=self.config.breaker_reset_seconds
+        )
+    
+    def _open(self):
+        conn = self._connect(
+            host=self.config.host,
+            user=self.config.user,
+            password=self.config.password,
+            database=self.config.database,
+            port=self.config.port,
+            connection_timeout=self.config.connect_timeout
+        )
+        # The C extension applies connection_timeout to reads as well; the
+        # pure-Python driver clears it after the handshake, so set it on the socket.
+        _set_socket_timeout(conn, self.config.read_timeout)
+        if self.id_series is not None:
+            cursor = conn.cursor()
+            cursor.execute("SET SESSION auto_increment_increment = %d, auto_increment_offset = %d" % self.id_series)
+            cursor.close()
+        return conn
+    
+    def _acquire(self):
+        if self._idle is not None:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if conn.is_connected():
+                    return conn
+                self._forget_statements(conn)
+        # No idle connection: this checkout pays for a connect
+        self.pool_stats.opened()
+        return self._open()
+    
+    def _count_query(self):
+        with self._queries_lock:
+            self.queries += 1
+    
+    def _statement_cache(self, conn) -> Optional[StatementCache]:
+        """The connection's prepared statements; only pooled connections live long enough to reuse them"""
+        if self._idle is None or self.config.statement_cache_size <= 0:
+            return None
+        cache = self._statements.get(conn)
+        if cache is None:
+            cache = self._statements[conn] = StatementCache(self.config.statement_cache_size,
+                                                            self.statement_stats)
+        return cache
+    
+    def _forget_statements(self, conn):
+        # A reconnect starts a new session without the old statements
+        cache = self._statements.pop(conn, None)
+        if cache is not None:
+            cache.clear()
+    
+    def _release(self, conn):
+        if not conn.is_connected():
+            self._forget_statements(conn)
+            return
+        if self._idle is not None:
+            try:
+                # Never hand a connection with an open transaction to the next request
+                conn.rollback()
+                self._idle.put_nowait(conn)
+                return
+            except (queue.Full, mysql.connector.Error):
+                pass
+        self._forget_statements(conn)
+        conn.close()
+    
+    def warm(self) -> int:
+        """Open connections up to the pool size ahead of the first request"""
+        if self._idle is None:
+            return 0
+        opened = 0
+        while not self._idle.full():
+            self.breaker.before_call()
+            try:
+                conn = self._open()
+            except TRANSIENT_ERRORS:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+                break
+            opened += 1
+        return opened
+    
+    def close_all(self):
+        """Close every idle pooled connection"""
+        while self._idle is not None:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._forget_statements(conn)
+            conn.close()
         
     @contextmanager
     def get_connection(self):
         """Context manager for database connections"""
-        conn = None
+        deadlines.check("acquiring a database connection")
+        self.breaker.before_call()
+        conn = wrapped = None
+        healthy = True
         try:
-            conn = mysql.connector.connect(
-                host=self.config.host,
-                user=self.config.user,
-                password=self.config.password,
-                database=self.config.database,
-                port=self.config.port
-            )
-            yield conn
-        except mysql.connector.Error as e:
-            logging.error(f"Database connection error: {e}")
+            with tracing.span("db.acquire", pool_size=self.pool_size):
+                waiting = time.perf_counter()
+                conn = self._acquire()
+            self.pool_stats.acquired(time.perf_counter() - waiting)
+            wrapped = InstrumentedConnection(conn, self.config.read_timeout, self._statement_cache(conn),
+                                             self._count_query)
+            yield wrapped
+        except TRANSIENT_ERRORS as e:
+            healthy = False
+            logger.warning("Database connection error: %s", e)
             raise
         finally:
-            if conn and conn.is_connected():
-                conn.close()
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            if conn is not None:
+                self.pool_stats.released()
+                if wrapped is not None and wrapped.discarded:
+                    self._forget_statements(conn)
+                else:
+                    self._release(conn)
+    
+    def read(self, operation: Callable[..., T]) -> T:
+        """Run an idempotent read ``operation(conn)``, retrying transient failures
+
+        Retries use jittered exponential backoff and stop as soon as the
+        circuit opens. A transient failure that outlasts them raises
+        UnavailableError. Never use this for writes.
+        """
+        def attempt():
+            with self.get_connection() as conn:
+                return operation(conn)
+        try:
+            return retry(attempt, attempts=1 + self.config.read_retries, retry_on=TRANSIENT_ERRORS)
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
+
+# Columns that can be requested with ?fields=, mapped to their SELECT expressions
+EVENT_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "date": "date",
+    "location": "location",
+    "description": "description",
+}
+EVENT_LIST_FIELDS = ("id", "title", "date", "location")
+
+BOOKING_COLUMNS = {
+    "id": "b.id",
+    "event_id": "b.event_id",
+    "user_email": "b.user_email",
+    "timestamp": "b.timestamp",
+    "event_title": "e.title AS event_title",
+}
+
+BY_EMAIL = "WHERE b.user_email = %s"
+
+def select_list(columns: dict, fields: Sequence[str]) -> str:
+    """Build a SELECT column list from requested field names"""
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    if not fields:
+        raise ValueError("At least one field is required")
+    return ", ".join(columns[f] for f in fields)
+
+def _event_from_row(row: dict) -> Event:
+    return Event(
+        id=row.get('id'),
+        title=row.get('title'),
+        date=str(row['date']) if row.get('date') is not None else None,
+        location=row.get('location'),
+        description=row.get('description')
+    )
+
+def _booking_from_row(row: dict) -> Booking:
+    return Booking(
+        id=row.get('id'),
+        event_id=row.get('event_id'),
+        user_email=row.get('user_email'),
+        timestamp=row.get('timestamp'),
+        event_title=row.get('event_title')
+    )
 
 class EventRepository:
     """Repository for Event data operations"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    def __init__(self, db: Optional[DatabaseConnection] = None):
+        self.db = db or DatabaseConnection()
     
-    def get_all_events(self) -> List[Event]:
-        """Retrieve all events from database"""
-        with self.db.get_connection() as conn:
+    @staticmethod
+    def list_sql(fields: Sequence[str] = EVENT_LIST_FIELDS) -> str:
+        return f"SELECT {select_list(EVENT_COLUMNS, fields)} FROM events ORDER BY date ASC"
+    
+    @staticmethod
+    def by_id_sql(fields: Sequence[str] = tuple(EVENT_COLUMNS)) -> str:
+        return f"SELECT {select_list(EVENT_COLUMNS, fields)} FROM events WHERE id = %s"
+    
+    def get_all_events(self, fields: Sequence[str] = EVENT_LIST_FIELDS) -> List[Event]:
+        """Retrieve all events from database, selecting only ``fields``"""
+        sql = self.list_sql(fields)
+        
+        def fetch(conn):
             cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT id, title, date, location FROM events ORDER BY date ASC")
+            cursor.execute(sql)
             rows = cursor.fetchall()
             
-            events = []
-            for row in rows:
-                events.append(Event(
-                    id=row['id'],
-                    title=row['title'],
-                    date=str(row['date']),
-                    location=row['location']
-                ))
-            return events
-    
-    def get_event_by_id(self, event_id: int) -> Optional[Event]:
-        """Retrieve a specific event by ID"""
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT id, title, date, location FROM events WHERE id = %s", (event_id,))
+            return [_event_from_row(row) for row in rows]
+        return self.db.read(fetch)
+    
+    def get_event_by_id(self, event_id: int, fields: Sequence[str] = tuple(EVENT_COLUMNS)) -> Optional[Event]:
+        """Retrieve a specific event by ID, selecting only ``fields``"""
+        sql = self.by_id_sql(fields)
+        
+        def fetch(conn):
+            cursor = conn.cursor(prepared=True, dictionary=True)
+            cursor.execute(sql, (event_id,))
             row = cursor.fetchone()
             
             if row:
-                return Event(
-                    id=row['id'],
-                    title=row['title'],
-                    date=str(row['date']),
-                    location=row['location']
-                )
+                return _event_from_row(row)
             return None
+        return self.db.read(fetch)
+
+def shard_id_series(index: int, count: int) -> Tuple[int, int]:
+    """(auto_increment_increment, auto_increment_offset) for bookings shard ``index`` of ``count``
+
+    Each shard allocates ids from its own residue class, so a booking id is
+    unique across shards; reshard.py keeps ids when it moves rows and raises
+    every target's counter above the ids it copied.
+    """
+    return count, index + 1
+
+class QueuePassUsed(Exception):
+    """The waiting-room pass was already spent on another booking"""
+
+def shard_index(user_email: str, shard_count: int) -> int:
+    """Shard that owns ``user_email`` (case-insensitive, like the column's collation)"""
+    digest = hashlib.sha1(user_email.strip().lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
 
 class BookingRepository:
-    """Repository for Booking data operations"""
+    """Repository for Booking data operations
+
+    Bookings in partitions that were archived to cold storage (see
+    partitions.py) are only read when ``include_archived`` is requested.
+
+    With ``shards``, each booking lives on the shard picked by a hash of its
+    user_email (events are reference data present on every shard). Per-user
+    reads and writes touch one shard; global listings query all shards in
+    parallel and merge their timestamp-ordered results.
+    """
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    def __init__(self, db: Optional[DatabaseConnection] = None, archive: Optional[BookingArchive] = None,
+                 shards: Optional[Sequence[DatabaseConnection]] = None):
+        self.shards = list(shards) if shards else [db or DatabaseConnection()]
+        self.db = self.shards[0]
+        self.archive = archive
+        self._scatter = (ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard")
+                         if len(self.shards) > 1 else None)
     
-    def create_booking(self, event_id: int, user_email: str) -> bool:
-        """Create a new booking"""
+    def shard_for(self, user_email: str) -> DatabaseConnection:
+        return self.shards[shard_index(user_email, len(self.shards))]
+    
+    def create_booking(self, event_id: int, user_email: str, queue_pass: Optional[QueuePass] = None) -> bool:
+        """Create a new booking and its booking.created outbox message in one transaction
+
+        A waiting-room ``queue_pass`` is spent in the same transaction, so it
+        is only used up if the booking commits. Passes are recorded on the
+        first shard: when the booking lands on another one the pass is spent
+        first and handed back if the booking fails. Raises QueuePassUsed when
+        the pass was already spent, by any instance, and UnavailableError when
+        the database can't be reached (writes are never retried).
+        """
+        shard = self.shard_for(user_email)
+        spent_apart = queue_pass is not None and shard is not self.db
+        if spent_apart:
+            try:
+                with self.db.get_connection() as conn:
+                    self._spend(conn.cursor(prepared=True), queue_pass)
+                    conn.commit()
+            except TRANSIENT_ERRORS as e:
+                raise database_unavailable(e) from e
         try:
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
+            with shard.get_connection() as conn:
+                cursor = conn.cursor(prepared=True)
+                if queue_pass is not None and not spent_apart:
+                    self._spend(cursor, queue_pass)
                 cursor.execute(
                     "INSERT INTO bookings (event_id, user_email) VALUES (%s, %s)",
                     (event_id, user_email)
                 )
+                OutboxRepository.enqueue(cursor, BOOKING_CREATED, {
+                    "booking_id": cursor.lastrowid, "event_id": event_id, "user_email": user_email})
                 conn.commit()
-                return True
-        except mysql.connector.Error as e:
-            logging.error(f"Error creating booking: {e}")
+        except QueuePassUsed:
+            raise
+        except (mysql.connector.Error, TimeoutError) as e:
+            logger.error("Error creating booking: %s", e)
+            if spent_apart:
+                self._give_back(queue_pass)
+            if isinstance(e, TRANSIENT_ERRORS):
+                raise database_unavailable(e) from e
             return False
-    
-    def get_all_bookings(self) -> List[Booking]:
-        """Retrieve all bookings with event information"""
+        return True
+
+    @staticmethod
+    def _spend(cursor, queue_pass: QueuePass):
+        try:
+            cursor.execute("INSERT INTO queue_passes (nonce, event_id, expires_at) VALUES (%s, %s, %s)",
+                           (queue_pass.nonce, queue_pass.event_id, queue_pass.expires_at))
+        except mysql.connector.errors.IntegrityError as e:
+            if e.errno == ER_DUP_ENTRY:
+                raise QueuePassUsed(queue_pass.nonce) from None
+            raise
+
+    def _give_back(self, queue_pass: QueuePass):
+        try:
+            with self.db.get_connection() as conn:
+                conn.cursor(prepared=True).execute("DELETE FROM queue_passes WHERE nonce = %s", (queue_pass.nonce,))
+                conn.commit()
+        except mysql.connector.Error as e:
+            logger.warning("Could not hand back queue pass %s: %s", queue_pass.nonce, e)
+
+    def prune_queue_passes(self, now: Optional[float] = None) -> int:
+        """Delete spent passes that have expired; returns how many were removed
+
+        Off the request path: the outbox worker of the first shard runs it.
+        """
         with self.db.get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT b.id, b.event_id, b.user_email, b.timestamp, e.title AS event_title
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM queue_passes WHERE expires_at < %s", (time.time() if now is None else now,))
+            conn.commit()
+            return cursor.rowcount
+    
+    @staticmethod
+    def select_sql(fields: Sequence[str] = tuple(BOOKING_COLUMNS), where: str = "") -> str:
+        """SELECT for booking listings; the events join is only added when event_title is requested"""
+        columns = select_list(BOOKING_COLUMNS, fields)
+        join = "JOIN events e ON b.event_id = e.id" if "event_title" in fields else ""
+        return f"""
+                SELECT {columns}
                 FROM bookings b
-                JOIN events e ON b.event_id = e.id
+                {join}
+                {where}
                 ORDER BY b.timestamp DESC
-            """)
+            """
+    
+    def _with_archived(self, bookings: List[Booking], user_email: Optional[str] = None) -> List[Booking]:
+        """Merge archived bookings into newest-first live ones by timestamp
+
+        A partition with upcoming events stays live after later ones are
+        archived, so archived rows can be newer than live ones.
+        """
+        if self.archive is None:
+            return bookings
+        return list(heapq.merge(bookings, self.archive.bookings(user_email),
+                                key=lambda booking: booking.timestamp, reverse=True))
+    
+    def _gather(self, fetch: Callable[..., List[Booking]]) -> List[Booking]:
+        """Run ``fetch`` on every shard at once and k-way merge the newest-first results"""
+        # Each task runs in a copy of this context, so the request deadline and trace carry over
+        futures = [self._scatter.submit(contextvars.copy_context().run, shard.read, fetch)
+                   for shard in self.shards]
+        results = [future.result() for future in futures]
+        return list(heapq.merge(*results, key=lambda booking: booking.timestamp, reverse=True))
+    
+    def get_all_bookings(self, fields: Sequence[str] = tuple(BOOKING_COLUMNS),
+                         include_archived: bool = False) -> List[Booking]:
+        """Retrieve all bookings with event information"""
+        if (self._scatter is not None or include_archived) and "timestamp" not in fields:
+            # The merges order by timestamp; callers project the extra column away
+            fields = (*fields, "timestamp")
+        sql = self.select_sql(fields)
+        
+        def fetch(conn):
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql)
             rows = cursor.fetchall()
             
-            bookings = []
-            for row in rows:
-                bookings.append(Booking(
-                    id=row['id'],
-                    event_id=row['event_id'],
-                    user_email=row['user_email'],
-                    timestamp=row['timestamp'],
-                    event_title=row['event_title']
-                ))
-            return bookings
+            return [_booking_from_row(row) for row in rows]
+        bookings = self._gather(fetch) if self._scatter is not None else self.db.read(fetch)
+        return self._with_archived(bookings) if include_archived else bookings
     
-    def get_bookings_by_email(self, user_email: str) -> List[Booking]:
+    def get_bookings_by_email(self, user_email: str, fields: Sequence[str] = tuple(BOOKING_COLUMNS),
+                              include_archived: bool = False) -> List[Booking]:
         """Retrieve bookings for a specific user"""
+        if include_archived and "timestamp" not in fields:
+            # Merged with the archive by timestamp; callers project the extra column away
+            fields = (*fields, "timestamp")
+        sql = self.select_sql(fields, BY_EMAIL)
+        
+        def fetch(conn):
+            cursor = conn.cursor(prepared=True, dictionary=True)
+            cursor.execute(sql, (user_email,))
+            rows = cursor.fetchall()
+            
+            return [_booking_from_row(row) for row in rows]
+        bookings = self.shard_for(user_email).read(fetch)
+        return self._with_archived(bookings, user_email) if include_archived else bookings
+
+    def booking_rows(self, fields: Sequence[str] = tuple(BOOKING_COLUMNS), user_email: Optional[str] = None,
+                     include_archived: bool = False) -> List[tuple]:
+        """A booking listing as the cursor's tuples in ``fields`` order, without building Booking objects
+
+        All bookings, or one user's when ``user_email`` is given; newest first either way.
+        """
+        fields = tuple(fields)
+        scatter = self._scatter is not None and user_email is None
+        archived = include_archived and self.archive is not None
+        # The shard and archive merges order by timestamp; the extra column is dropped after them
+        selected = fields if not (scatter or archived) or "timestamp" in fields else (*fields, "timestamp")
+        position = selected.index("timestamp") if scatter or archived else None
+        sql = self.select_sql(selected, BY_EMAIL if user_email is not None else "")
+        params = (user_email,) if user_email is not None else ()
+
+        def fetch(conn):
+            cursor = conn.cursor(prepared=user_email is not None)
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        if scatter:
+            futures = [self._scatter.submit(contextvars.copy_context().run, shard.read, fetch)
+                       for shard in self.shards]
+            rows = heapq.merge(*[future.result() for future in futures], key=lambda row: row[position],
+                               reverse=True)
+        else:
+            db = self.shard_for(user_email) if user_email is not None else self.db
+            rows = db.read(fetch)
+        if archived:
+            rows = heapq.merge(rows, (tuple(getattr(booking, name) for name in selected)
+                                      for booking in self.archive.bookings(user_email)),
+                               key=lambda row: row[position], reverse=True)
+        return list(rows) if selected is fields else [row[:len(fields)] for row in rows]
+
+BOOKING_CREATED = "booking.created"
+
+class OutboxRepository:
+    """Repository for the booking_outbox table, drained by outbox_worker.py
+
+    Messages are claimed with a lease (available_at pushed into the future),
+    so a worker that dies mid-batch only delays them: they are delivered
+    again once the lease runs out.
+    """
+
+    CLAIM_SQL = """
+                SELECT id, topic, payload, attempts, created_at
+                FROM booking_outbox
+                WHERE status = 'pending' AND available_at <= %s
+                ORDER BY available_at, id
+                LIMIT %s
+            """
+
+    def __init__(self, db: Optional[DatabaseConnection] = None):
+        self.db = db or DatabaseConnection()
+
+    @staticmethod
+    def enqueue(cursor, topic: str, payload: dict, now: Optional[float] = None):
+        """Add a message using the caller's cursor, i.e. inside the caller's transaction"""
+        now = time.time() if now is None else now
+        cursor.execute(
+            "INSERT INTO booking_outbox (topic, payload, created_at, available_at) VALUES (%s, %s, %s, %s)",
+            (topic, json.dumps(payload, default=str), now, now)
+        )
+
+    def claim(self, limit: int, lease_seconds: float, now: Optional[float] = None) -> List[OutboxMessage]:
+        """Lease up to ``limit`` due messages, oldest first"""
+        now = time.time() if now is None else now
+        # Concurrent workers skip each other's rows instead of waiting on them (MySQL 8)
+        sql = self.CLAIM_SQL + (" FOR UPDATE SKIP LOCKED" if self.db.dialect == "mysql" else "")
         with self.db.get_connection() as conn:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT b.id, b.event_id, b.user_email, b.timestamp, e.title AS event_title
-                FROM bookings b
-                JOIN events e ON b.event_id = e.id
-                WHERE b.user_email = %s
-                ORDER BY b.timestamp DESC
-            """, (user_email,))
+            cursor.execute(sql, (now, limit))
             rows = cursor.fetchall()
-            
-            bookings = []
-            for row in rows:
-                bookings.append(Booking(
-                    id=row['id'],
-                    event_id=row['event_id'],
-                    user_email=row['user_email'],
-                    timestamp=row['timestamp'],
-                    event_title=row['event_title']
-                ))
-            return bookings 
\ No newline at end of file
+            if rows:
+                cursor.execute(
+                    f"UPDATE booking_outbox SET available_at = %s WHERE id IN ({_placeholders(len(rows))})",
+                    (now + lease_seconds, *[row["id"] for row in rows])
+                )
+            conn.commit()
+        return [OutboxMessage(row["id"], row["topic"], json.loads(row["payload"]), row["attempts"],
+                              row["created_at"]) for row in rows]
+
+    def complete(self, ids: Sequence[int], now: Optional[float] = None):
+        """Mark delivered messages done"""
+        if not ids:
+            return
+        with self.db.get_connection() as conn:
+            conn.cursor().execute(
+                f"UPDATE booking_outbox SET status = 'done', processed_at = %s WHERE id IN ({_placeholders(len(ids))})",
+                (time.time() if now is None else now, *ids)
+            )
+            conn.commit()
+
+    def fail(self, message_id: int, error: str, retry_at: float, dead: bool = False):
+        """Record a failed delivery; retry at ``retry_at`` or give up (status dead)"""
+        with self.db.get_connection() as conn:
+            conn.cursor().execute(
+                "UPDATE booking_outbox SET attempts = attempts + 1, last_error = %s, available_at = %s, "
+                "status = %s WHERE id = %s",
+                (error[:500], retry_at, "dead" if dead else "pending", message_id)
+            )
+            conn.commit()
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Message counts per status and the age of the oldest pending message (the backlog lag)"""
+        now = time.time() if now is None else now
+
+        def fetch(conn):
+            cursor = conn.cursor()
+            cursor.execute("SELECT status, COUNT(*), MIN(created_at) FROM booking_outbox GROUP BY status")
+            return cursor.fetchall()
+        stats = {"pending": 0, "done": 0, "dead": 0, "oldest_pending_age_s": 0.0}
+        for status, count, oldest in self.db.read(fetch):
+            stats[status] = count
+            if status == "pending" and oldest is not None:
+                stats["oldest_pending_age_s"] = round(max(0.0, now - oldest), 3)
+        return stats
+
+def _placeholders(count: int) -> str:
+    return ", ".join(["%s"] * count)
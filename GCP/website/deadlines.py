@@ -0,0 +1,51 @@
+"""
+Request deadlines
+The deadline of the current request lives in a context variable, so the data
+tier can check it before taking a pool slot and turn what is left of it into
+a per-statement MAX_EXECUTION_TIME without threading it through every call.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from resilience import UnavailableError
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(UnavailableError):
+    """The request ran out of time; abandon the remaining work (maps to HTTP 504)"""
+    status_code = 504
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def check(what: str = "request"):
+    """Raise DeadlineExceeded if the current deadline has passed"""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+def set_deadline(seconds: float):
+    """Start a deadline ``seconds`` from now (never extending an outer one); returns a reset token"""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    return _deadline.set(deadline)
+
+def reset(token):
+    _deadline.reset(token)
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Run a block under a deadline"""
+    token = set_deadline(seconds)
+    try:
+        yield
+    finally:
+        reset(token)
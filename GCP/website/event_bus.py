@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+In-process pub/sub behind the /api/stream server-sent events feed
+Every published notification gets an increasing id and is kept in a bounded
+ring buffer, so a client that reconnects with Last-Event-ID gets what it
+missed. Each subscriber has a bounded queue; one that falls behind is
+disconnected (and replays from the buffer on reconnect) rather than letting
+its backlog grow. With a FileFanout, notifications published by any worker
+process on the host reach the subscribers of all of them, with the same ids.
+
+Usage:
+    python event_bus.py publish event.changed '{"event_id": 3}' [--fanout /dev/shm/lookmyshow-events]
+"""
+
+import argparse
+import fcntl
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+BOOKING_CREATED = "booking.created"
+EVENT_CHANGED = "event.changed"
+# Sent instead of a replay when the client missed more than the buffer holds
+RESET = "reset"
+
+@dataclass
+class Notification:
+    id: int
+    topic: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+class Subscription:
+    """One connected client: a bounded queue the bus fills and the response drains"""
+
+    def __init__(self, bus: "EventBus", size: int):
+        self.bus = bus
+        self.queue: "queue.Queue[Notification]" = queue.Queue(size)
+        self.overflowed = False
+
+    def get(self, timeout: float) -> Optional[Notification]:
+        """Next notification, or None after ``timeout`` seconds without one"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class EventBus:
+    """Publishes notifications to subscribers and keeps the last ``buffer_size`` for replay"""
+
+    def __init__(self, buffer_size: int = 1000, client_queue: int = 100, max_clients: int = 100,
+                 fanout: Optional["FileFanout"] = None):
+        self.client_queue = client_queue
+        self.max_clients = max_clients
+        self.fanout = fanout
+        self.published = 0
+        self.disconnected = 0
+        self._buffer: Deque[Notification] = deque(maxlen=buffer_size)
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: Dict[str, List[Callable[[Notification], None]]] = {}
+        self._lock = threading.Lock()
+        self._last_id = 0
+        if fanout is not None:
+            fanout.start(self._deliver)
+
+    def publish(self, topic: str, data: Dict[str, Any]):
+        """Send to every subscriber (of every worker, with a fan-out); never blocks on a slow client"""
+        if self.fanout is not None:
+            self.fanout.publish(topic, data)
+            return
+        self._deliver(Notification(0, topic, data))
+
+    def _deliver(self, notification: Notification):
+        with self._lock:
+            resets = []
+            if self.fanout is None:
+                notification.id = self._last_id + 1
+            elif notification.id <= self._last_id:
+                return
+            elif self._last_id and notification.id > self._last_id + 1:
+                # Notifications were lost before reaching this worker (e.g. the fan-out log
+                # rotated twice between reads): connected and reconnecting clients must refetch
+                logger.warning("Event fan-out skipped ids %d-%d", self._last_id + 1, notification.id - 1)
+                self._buffer.clear()
+                resets.append(Notification(notification.id - 1, RESET, {}))
+            self._last_id = notification.id
+            self._buffer.append(notification)
+            self.published += 1
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners.get(notification.topic, ()))
+        for listener in listeners:
+            try:
+                listener(notification)
+            except Exception as e:
+                logger.warning("Listener for %s failed: %s", notification.topic, e)
+        for subscription in subscribers:
+            try:
+                for queued in resets + [notification]:
+                    subscription.queue.put_nowait(queued)
+            except queue.Full:
+                # The client reconnects with Last-Event-ID and catches up from the buffer
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    def listen(self, topic: str, callback: Callable[[Notification], None]):
+        """Call ``callback`` in the publishing (or fan-out) thread for every ``topic`` notification"""
+        with self._lock:
+            self._listeners.setdefault(topic, []).append(callback)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Optional[Subscription]:
+        """New subscription, primed with what came after ``last_event_id``; None when full"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self, self.client_queue)
+            if last_event_id is not None:
+                for notification in self._replay(last_event_id):
+                    if subscription.queue.full():
+                        # Too much to replay: the client should refetch instead
+                        subscription.queue = queue.Queue(self.client_queue)
+                        subscription.queue.put_nowait(Notification(self._last_id, RESET, {}))
+                        break
+                    subscription.queue.put_nowait(notification)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def _replay(self, last_event_id: int) -> List[Notification]:
+        if last_event_id >= self._last_id:
+            return []
+        if not self._buffer or self._buffer[0].id > last_event_id + 1:
+            return [Notification(self._last_id, RESET, {})]
+        return [n for n in self._buffer if n.id > last_event_id]
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                self.disconnected += subscription.overflowed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "last_id": self._last_id,
+                "buffered": len(self._buffer),
+                "published": self.published,
+                "slow_clients_disconnected": self.disconnected,
+            }
+
+    def stream(self, subscription: Subscription, heartbeat: float = 15.0, max_seconds: float = 0.0,
+               retry_ms: int = 3000, clock: Callable[[], float] = time.monotonic) -> Iterator[str]:
+        """SSE body for ``subscription``: notifications, a comment every ``heartbeat`` seconds
+
+        Ends when the subscription is dropped for falling behind or after
+        ``max_seconds`` (0 means never), and the browser reconnects.
+        """
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            ends = clock() + max_seconds if max_seconds > 0 else None
+            while subscription in self._subscribers or not subscription.queue.empty():
+                wait = heartbeat if ends is None else min(heartbeat, ends - clock())
+                if wait <= 0:
+                    return
+                notification = subscription.get(wait)
+                yield notification.to_sse() if notification else ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+class FileFanout:
+    """Cross-worker fan-out through an append-only log file (put it in /dev/shm)
+
+    Publishers take an flock, assign the next id from a sidecar counter and
+    append a JSON line; every worker tails the file and delivers new lines to
+    its own bus. Once the log passes ``max_bytes`` it is rotated to
+    ``<path>.1`` and a new one started; tailers finish the old file through
+    the handle they hold before moving on, so no line is skipped. Ids keep
+    counting, so Last-Event-ID stays valid across workers and rotations.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.2, max_bytes: int = 1024 * 1024):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._deliver: Optional[Callable[[Notification], None]] = None
+        self._log = None
+        self._partial = b""
+        open(path, "a").close()
+
+    def publish(self, topic: str, data: Dict[str, Any]):
+        with open(self.path + ".lock", "a+") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            lock.seek(0)
+            next_id = int(lock.read() or 0) + 1
+            lock.seek(0)
+            lock.truncate()
+            lock.write(str(next_id))
+            lock.flush()
+            if os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as log:
+                log.write(json.dumps({"id": next_id, "topic": topic, "data": data}, default=str) + "\n")
+
+    def start(self, deliver: Callable[[Notification], None]):
+        """Tail the log from its current end on a background thread"""
+        self._deliver = deliver
+        self._log = open(self.path, "rb")
+        self._log.seek(0, os.SEEK_END)
+        self._thread = threading.Thread(target=self._tail, name="event-fanout", daemon=True)
+        self._thread.start()
+
+    def _tail(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except (OSError, ValueError) as e:
+                logger.warning("Event fan-out read failed: %s", e)
+
+    def _rotated(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._log.fileno()).st_ino
+        except FileNotFoundError:
+            return False  # Between the rename and the next append
+
+    def poll(self):
+        """Deliver the lines appended since the last poll, following the log across a rotation"""
+        while True:
+            # Checked before reading: once the rename is visible nothing more is written to the old file
+            rotated = self._rotated()
+            lines = (self._partial + self._log.read()).split(b"\n")
+            self._partial = lines.pop()
+            for line in lines:
+                if line:
+                    entry = json.loads(line)
+                    self._deliver(Notification(entry["id"], entry["topic"], entry["data"]))
+            if not rotated:
+                return
+            self._log.close()
+            self._log, self._partial = open(self.path, "rb"), b""
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._log is not None:
+            self._log.close()
+
+def fanout_from_spec(spec: Optional[str]) -> Optional[FileFanout]:
+    """A FileFanout for 'file:/path' (prefix optional); None keeps notifications in-process"""
+    if not spec:
+        return None
+    return FileFanout(spec[len("file:"):] if spec.startswith("file:") else spec)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Publish a notification to the API workers' stream")
+    sub = parser.add_subparsers(dest="command", required=True)
+    publish = sub.add_parser("publish")
+    publish.add_argument("topic", help=f"e.g. {EVENT_CHANGED}")
+    publish.add_argument("data", nargs="?", default="{}", help="JSON payload")
+    publish.add_argument("--fanout", default=os.getenv("EVENT_FANOUT"),
+                         help="Fan-out log the workers tail (default: $EVENT_FANOUT)")
+    args = parser.parse_args(argv)
+
+    fanout = fanout_from_spec(args.fanout)
+    if fanout is None:
+        print("❌ No fan-out configured: pass --fanout or set EVENT_FANOUT")
+        return 1
+    fanout.publish(args.topic, json.loads(args.data))
+    print(f"✓ Published {args.topic}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
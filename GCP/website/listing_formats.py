@@ -0,0 +1,78 @@
+"""
+Compact representations for large listings
+The default JSON repeats every key on every row. The columnar layout sends
+each field once, with one array of values per field:
+
+    {"count": 2, "fields": ["id", "timestamp"], "columns": {"id": [7, 6], "timestamp": [1735689600, 1735603200]}}
+
+Timestamps are whole seconds since the Unix epoch (UTC). The same document
+is available as JSON or, when the msgpack package is installed, MessagePack.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional; columnar JSON still works
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.lookmyshow.columnar+json"
+MSGPACK = "application/msgpack"
+# ?format= shorthands for clients that can't set Accept
+FORMAT_NAMES = {"json": JSON, "columnar": COLUMNAR_JSON, "msgpack": MSGPACK}
+
+EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+TIMESTAMP_FIELDS = frozenset({"timestamp"})
+
+def available() -> List[str]:
+    """Media types this worker can produce; on equal quality the first wins, so */* gets plain JSON"""
+    return [JSON, COLUMNAR_JSON] + ([MSGPACK] if msgpack is not None else [])
+
+def negotiate(accept, format_name: Optional[str] = None) -> Optional[str]:
+    """Media type for a listing from ?format= or the Accept header; None when none of them can be served"""
+    if format_name:
+        media_type = FORMAT_NAMES.get(format_name.lower())
+        return media_type if media_type in available() else None
+    if not accept:
+        return JSON
+    return accept.best_match(available())
+
+def _epoch(value) -> Optional[int]:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp())
+        return (value - EPOCH) // _SECOND
+    if value is None:
+        return None
+    return (datetime.fromisoformat(str(value)) - EPOCH) // _SECOND
+
+def columnar(fields: Sequence[str], rows: List[tuple]) -> Dict[str, object]:
+    """The columnar document for ``rows`` (tuples in ``fields`` order)"""
+    columns = [list(values) for values in zip(*rows)] if rows else [[] for _ in fields]
+    for index, name in enumerate(fields):
+        if name in TIMESTAMP_FIELDS:
+            try:
+                # Naive datetimes straight from the cursor, the common case
+                columns[index] = [(value - EPOCH) // _SECOND for value in columns[index]]
+            except TypeError:
+                columns[index] = [_epoch(value) for value in columns[index]]
+    return {"count": len(rows), "fields": list(fields), "columns": dict(zip(fields, columns))}
+
+def encode(document: Dict[str, object], media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(document, use_bin_type=True)
+    return json.dumps(document, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def decode(body: bytes, media_type: str) -> Dict[str, object]:
+    if media_type == MSGPACK:
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+def to_records(document: Dict[str, object]) -> List[dict]:
+    """Row dictionaries back from a columnar document (timestamps stay epoch seconds)"""
+    fields = document["fields"]
+    return [dict(zip(fields, values)) for values in zip(*(document["columns"][name] for name in fields))]
@@ -0,0 +1,179 @@
+"""
+Load signal for autoscaling
+This API spends most of each request waiting on MySQL, so an instance can be
+saturated, with requests piling up behind the connection pool, while CPU
+looks idle. The signal measures what actually runs out, each part as a
+fraction of what one instance should carry:
+
+- concurrency: average requests in flight / LOAD_TARGET_CONCURRENCY
+- pool: average connections checked out / DB_POOL_SIZE (summed over shards)
+- pool_wait: mean time to get a connection / LOAD_TARGET_POOL_WAIT_MS
+- queue: mean time requests waited before a worker took them / LOAD_TARGET_QUEUE_MS
+
+The signal is the largest part, averaged over the last LOAD_WINDOW_SECONDS.
+1.0 means the instance is at its target. Autoscalers aim below that (0.7 in
+the shipped configs) so replicas are added while latency is still flat.
+Queue time comes from the X-Request-Start header set by the proxy in front
+(``proxy_set_header X-Request-Start "t=${msec}";`` in nginx). Google's load
+balancers and App Engine don't set it, so deployments behind them turn the
+part off with LOAD_TARGET_QUEUE_MS=0.
+
+Each process has its own monitor, so a serving process should carry the
+whole instance: one gunicorn worker with as many threads as requests it
+takes (see containerized-gke/Dockerfile), not several sync workers.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+REQUEST_START_HEADER = "X-Request-Start"
+
+def queue_seconds(header: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Time since the proxy received the request, from 't=<epoch>' in seconds, ms or µs"""
+    if not header:
+        return None
+    try:
+        start = float(header.strip().partition("t=")[2] or header)
+    except ValueError:
+        return None
+    if start > 1e14:
+        start /= 1e6
+    elif start > 1e11:
+        start /= 1e3
+    return max(0.0, (now if now is not None else time.time()) - start)
+
+class LoadMonitor:
+    """Tracks requests in flight and queue time, reads the pools' PoolStats, and computes the signal
+
+    ``pools`` returns the DatabaseConnections whose pools count (the main one and any shards).
+    """
+
+    def __init__(self, pools: Callable[[], Iterable], target_concurrency: float = 8.0,
+                 target_pool_wait_ms: float = 50.0, target_queue_ms: float = 100.0,
+                 window_seconds: float = 20.0, clock: Callable[[], float] = time.monotonic):
+        self._pools = pools
+        self.target_concurrency = target_concurrency
+        self.target_pool_wait = target_pool_wait_ms / 1000.0
+        # 0 leaves the queue part out (no proxy in front sets X-Request-Start)
+        self.target_queue = target_queue_ms / 1000.0
+        self.window = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._busy_seconds = 0.0
+        self._created = self._changed = clock()
+        self._requests = 0
+        self._queued = 0
+        self._queue_seconds = 0.0
+        # (time, cumulative totals) readings; the window is the difference of the newest and oldest
+        self._readings = deque()
+
+    def _level(self, delta: int, now: float):
+        self._busy_seconds += self.in_flight * (now - self._changed)
+        self._changed = now
+        self.in_flight += delta
+
+    def started(self, queued: Optional[float] = None):
+        with self._lock:
+            self._level(1, self._clock())
+            self._requests += 1
+            if queued is not None:
+                self._queued += 1
+                self._queue_seconds += queued
+
+    def finished(self):
+        with self._lock:
+            self._level(-1, self._clock())
+
+    def _totals(self, now: float) -> Dict[str, float]:
+        with self._lock:
+            totals = {
+                "in_flight": self.in_flight,
+                "busy_seconds": self._busy_seconds + self.in_flight * (now - self._changed),
+                "requests": self._requests,
+                "queued": self._queued,
+                "queue_seconds": self._queue_seconds,
+            }
+        pool_size = 0
+        for db in self._pools():
+            pool_size += db.pool_size
+            for name, value in db.pool_stats.totals().items():
+                totals["pool_" + name] = totals.get("pool_" + name, 0) + value
+        totals["pool_size"] = pool_size
+        return totals
+
+    def snapshot(self) -> Dict[str, object]:
+        """The signal and its parts over the last window (since start-up until a window has passed)"""
+        now = self._clock()
+        current = self._totals(now)
+        with self._lock:
+            self._readings.append((now, current))
+            # Keep the newest reading at or before the window start as the baseline
+            while len(self._readings) > 2 and self._readings[1][0] <= now - self.window:
+                self._readings.popleft()
+            # Until a second reading exists the window runs from start-up
+            since, baseline = self._readings[0] if len(self._readings) > 1 else (self._created, {})
+        elapsed = max(now - since, 1e-6)
+
+        def delta(name: str) -> float:
+            return current.get(name, 0) - baseline.get(name, 0)
+
+        concurrency = delta("busy_seconds") / elapsed
+        pool_in_use = delta("pool_in_use_seconds") / elapsed
+        acquired = delta("pool_acquired")
+        pool_wait = delta("pool_wait_seconds") / acquired if acquired else 0.0
+        queued = delta("queued")
+        queue = delta("queue_seconds") / queued if queued else 0.0
+        parts = {
+            "concurrency": concurrency / self.target_concurrency,
+            "pool": pool_in_use / current["pool_size"] if current["pool_size"] else 0.0,
+            "pool_wait": pool_wait / self.target_pool_wait,
+        }
+        if self.target_queue > 0:
+            parts["queue"] = queue / self.target_queue
+        return {
+            "signal": round(max(parts.values()), 3),
+            "parts": {name: round(value, 3) for name, value in parts.items()},
+            "window_seconds": round(elapsed, 1),
+            "in_flight": current["in_flight"],
+            "concurrency": round(concurrency, 3),
+            "requests_per_second": round(delta("requests") / elapsed, 2),
+            # Little's law: arrivals per second × seconds queued
+            "queue_depth": round(delta("queued") / elapsed * queue, 3),
+            "queue_ms": round(queue * 1000, 1),
+            "pool": {
+                "size": current["pool_size"],
+                "in_use": current.get("pool_in_use", 0),
+                "average_in_use": round(pool_in_use, 3),
+                "wait_ms": round(pool_wait * 1000, 2),
+                "opened": int(delta("pool_opened")),
+            },
+        }
+
+PROMETHEUS_METRICS = (
+    ("lookmyshow_load_signal", "Largest load part as a fraction of the instance's target (1 = at target)",
+     lambda s: s["signal"]),
+    ("lookmyshow_requests_in_flight", "Requests being served now", lambda s: s["in_flight"]),
+    ("lookmyshow_request_concurrency", "Average requests in flight over the window", lambda s: s["concurrency"]),
+    ("lookmyshow_request_queue_seconds", "Mean time requests waited before a worker took them",
+     lambda s: s["queue_ms"] / 1000),
+    ("lookmyshow_request_queue_depth", "Average requests waiting for a worker (arrival rate x queue time)",
+     lambda s: s["queue_depth"]),
+    ("lookmyshow_db_pool_in_use", "Average database connections checked out over the window",
+     lambda s: s["pool"]["average_in_use"]),
+    ("lookmyshow_db_pool_size", "Pooled database connections per instance", lambda s: s["pool"]["size"]),
+    ("lookmyshow_db_pool_wait_seconds", "Mean time to get a database connection",
+     lambda s: s["pool"]["wait_ms"] / 1000),
+)
+
+def prometheus_text(snapshot: Dict[str, object]) -> str:
+    """The snapshot as Prometheus gauges (text exposition format)"""
+    lines = []
+    for name, help_text, value in PROMETHEUS_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value(snapshot):g}"]
+    lines += ["# HELP lookmyshow_load_part Each part of the load signal", "# TYPE lookmyshow_load_part gauge"]
+    for part, value in snapshot["parts"].items():
+        lines.append(f'lookmyshow_load_part{{part="{part}"}} {value:g}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Load generator for the LookMyShow API
+Drives a weighted mix of event/booking/user requests at a configurable
+concurrency (closed model) or arrival rate (open model) and reports
+throughput, error rate and latency percentiles per endpoint.
+
+Examples:
+    python loadtest.py --local --duration 30 --concurrency 16
+    python loadtest.py --url https://your-app-url --rate 200 --duration 60
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import requests
+
+DEFAULT_MIX = "events=50,event=30,booking=10,user=10"
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies in microseconds
+
+    Values are bucketed with ``precision_bits`` of mantissa, so every bucket is
+    within ~1/2**precision_bits of the recorded value regardless of magnitude,
+    and memory stays bounded however many samples are recorded. Percentiles
+    report the top of their bucket, so they are never below the true value.
+    """
+
+    def __init__(self, precision_bits: int = 7):
+        self.precision_bits = precision_bits
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max = 0
+
+    def _shift(self, value: int) -> int:
+        return max(0, value.bit_length() - self.precision_bits)
+
+    def _bucket(self, value: int) -> int:
+        shift = self._shift(value)
+        return (value >> shift) << shift
+
+    def _bucket_top(self, bucket: int) -> int:
+        """Largest value recorded into ``bucket``"""
+        return bucket + (1 << self._shift(bucket)) - 1
+
+    def record(self, seconds: float):
+        value = max(1, int(seconds * 1_000_000))
+        bucket = self._bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Latency at the given percentile, in milliseconds"""
+        if not self.total:
+            return 0.0
+        target = max(1, int(round(self.total * pct / 100.0 + 0.4999)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self._bucket_top(bucket), self.max) / 1000.0
+        return self.max / 1000.0
+
+@dataclass
+class EndpointStats:
+    """Counters for one endpoint in the request mix"""
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, float]:
+        h = self.histogram
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "throughput_rps": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(h.percentile(50), 3),
+            "p95_ms": round(h.percentile(95), 3),
+            "p99_ms": round(h.percentile(99), 3),
+            "p999_ms": round(h.percentile(99.9), 3),
+            "max_ms": round(h.max / 1000.0, 3),
+        }
+
+class Workload:
+    """The request mix: picks an operation by weight and issues it"""
+
+    def __init__(self, base_url: str, mix: Dict[str, int], event_ids: List[int], seed: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.event_ids = event_ids or [1]
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._booked_emails: List[str] = []
+        self._counter = 0
+        self.operations: Dict[str, Callable[[requests.Session], requests.Response]] = {
+            "events": self._list_events,
+            "event": self._event_detail,
+            "booking": self._create_booking,
+            "user": self._user_bookings,
+            "bookings": self._list_bookings,
+        }
+        unknown = set(mix) - set(self.operations)
+        if unknown:
+            raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+
+    def choose(self) -> str:
+        with self._rng_lock:
+            return self.rng.choices(self.names, self.weights)[0]
+
+    def _pick_event(self) -> int:
+        with self._rng_lock:
+            return self.rng.choice(self.event_ids)
+
+    def _list_events(self, session):
+        return session.get(f"{self.base_url}/api/events", timeout=30)
+
+    def _event_detail(self, session):
+        return session.get(f"{self.base_url}/api/events/{self._pick_event()}", timeout=30)
+
+    def _list_bookings(self, session):
+        return session.get(f"{self.base_url}/api/bookings", timeout=30)
+
+    def _create_booking(self, session):
+        with self._rng_lock:
+            self._counter += 1
+            email = f"load-{self._counter % 1000}@lookmyshow.com"
+            self._booked_emails.append(email)
+            del self._booked_emails[:-1000]
+        return session.post(f"{self.base_url}/api/bookings",
+                            json={"event_id": self._pick_event(), "user_email": email}, timeout=30)
+
+    def _user_bookings(self, session):
+        with self._rng_lock:
+            email = self.rng.choice(self._booked_emails) if self._booked_emails else "load-0@lookmyshow.com"
+        return session.get(f"{self.base_url}/api/bookings/user/{email}", timeout=30)
+
+class LoadRunner:
+    """Runs a workload in the closed model (``rate`` is None) or the open model
+
+    Closed model: ``concurrency`` clients each send their next request as soon
+    as the previous one finishes. Open model: requests arrive as a Poisson
+    process at ``rate`` per second regardless of how fast the server answers,
+    and latency is measured from the scheduled arrival time so queueing delay
+    is not hidden (no coordinated omission).
+    """
+
+    def __init__(self, workload: Workload, concurrency: int = 8, duration: float = 10.0,
+                 rate: Optional[float] = None, clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.workload = workload
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in workload.names}
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.elapsed = 0.0
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _record(self, name: str, started: float, ok: bool):
+        latency = self._clock() - started
+        with self._stats_lock:
+            stats = self.stats[name]
+            stats.requests += 1
+            stats.histogram.record(latency)
+            if not ok:
+                stats.errors += 1
+
+    def _issue(self, name: str, started: float):
+        try:
+            response = self.workload.operations[name](self._session())
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        self._record(name, started, ok)
+
+    def _closed_client(self, deadline: float):
+        while self._clock() < deadline:
+            self._issue(self.workload.choose(), self._clock())
+
+    def run(self) -> "LoadRunner":
+        started = self._clock()
+        deadline = started + self.duration
+        if self.rate is None:
+            threads = [threading.Thread(target=self._closed_client, args=(deadline,), daemon=True)
+                       for _ in range(self.concurrency)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        else:
+            arrivals = random.Random(self.workload.rng.random())
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                next_arrival = started
+                while next_arrival < deadline:
+                    delay = next_arrival - self._clock()
+                    if delay > 0:
+                        self._sleep(delay)
+                    pool.submit(self._issue, self.workload.choose(), next_arrival)
+                    next_arrival += arrivals.expovariate(self.rate)
+        self.elapsed = self._clock() - started
+        return self
+
+    def report(self) -> Dict[str, object]:
+        total = EndpointStats()
+        for stats in self.stats.values():
+            total.requests += stats.requests
+            total.errors += stats.errors
+            total.histogram.merge(stats.histogram)
+        return {
+            "model": "closed" if self.rate is None else "open",
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "duration_s": round(self.elapsed, 3),
+            "total": total.summary(self.elapsed),
+            "endpoints": {name: stats.summary(self.elapsed)
+                          for name, stats in self.stats.items() if stats.requests},
+        }
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """Parse 'events=50,event=30,...' into a weight map"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+def start_local_server(db_path: Optional[str] = None, pool_size: int = 8,
+                       db=None) -> Tuple[str, Callable[[], None]]:
+    """Serve the API from this process against a SQLite stand-in database
+
+    Pass ``db`` to serve through a connection manager the caller keeps
+    (e.g. to read its query counter). Returns the base URL and a function
+    that stops the server.
+    """
+    from werkzeug.serving import make_server
+    from app import create_app
+    from config import AppConfig, APIConfig
+    from local_db import LocalDatabase
+
+    tmpdir = None
+    if db_path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmpdir.name, "lookmyshow.db")
+    database = LocalDatabase(db_path)
+    config = AppConfig(database=database.config(), api=APIConfig(host="127.0.0.1", port=0),
+                       db_pool_size=pool_size, warm_connections=False)
+    flask_app = create_app(config, db=db or database.connection_manager(pool_size))
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="loadtest-server", daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        thread.join()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    return f"http://127.0.0.1:{server.server_port}", stop
+
+def print_report(report: Dict[str, object]):
+    """Print the report as a table"""
+    print(f"\n📊 Load test ({report['model']} model, concurrency {report['concurrency']}"
+          + (f", rate {report['rate']}/s" if report['rate'] else "") + f", {report['duration_s']}s)")
+    header = f"{'endpoint':<10} {'reqs':>8} {'err%':>7} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'p999':>9} {'max':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, s in rows:
+        print(f"{name:<10} {s['requests']:>8} {s['error_rate'] * 100:>6.2f}% {s['throughput_rps']:>9.1f} "
+              f"{s['p50_ms']:>8.2f}ms {s['p95_ms']:>7.2f}ms {s['p99_ms']:>7.2f}ms "
+              f"{s['p999_ms']:>7.2f}ms {s['max_ms']:>7.2f}ms")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the LookMyShow API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:5000", help="Base URL of a running API")
+    target.add_argument("--local", action="store_true", help="Start the API in-process on a SQLite stand-in database")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients (closed model) or worker threads (open model)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--rate", type=float, help="Arrival rate in requests/s (open model); omit for closed model")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted request mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, help="Random seed for a reproducible request sequence")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    stop = None
+    base_url = args.url
+    if args.local:
+        base_url, stop = start_local_server(pool_size=args.concurrency)
+    try:
+        events = requests.get(f"{base_url}/api/events", timeout=10).json()
+        workload = Workload(base_url, parse_mix(args.mix), [e["id"] for e in events], seed=args.seed)
+        report = LoadRunner(workload, args.concurrency, args.duration, args.rate).run().report()
+    finally:
+        if stop:
+            stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if report["total"]["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
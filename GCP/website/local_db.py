@@ -0,0 +1,208 @@
+"""
+SQLite stand-in for the MySQL data tier
+Lets the API, load tests and perf checks run locally without a Cloud SQL instance
+"""
+
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+import mysql.connector
+from config import DatabaseConfig
+from data_access import DatabaseConnection
+from migrate import MigrationRunner
+
+# Same sample data as schema.sql
+SAMPLE_EVENTS = [
+    ('Coldplay Concert', '2025-01-20', 'Mumbai, India', 'Experience the magic of Coldplay live in concert'),
+    ('Comedy Night', '2025-01-25', 'Delhi, India', 'A night full of laughter with top comedians'),
+    ('Art Exhibition', '2025-02-10', 'Bangalore, India', 'Contemporary art exhibition featuring local artists'),
+    ('Tech Conference', '2025-02-15', 'Pune, India', 'Annual technology conference with industry leaders'),
+    ('Music Festival', '2025-03-01', 'Goa, India', 'Three-day music festival featuring multiple genres'),
+]
+
+_PLACEHOLDER = re.compile(r"%s")
+_MAX_EXECUTION_TIME = re.compile(r"MAX_EXECUTION_TIME\((\d+)\)")
+_ID_SERIES = re.compile(r"SET SESSION auto_increment_increment = (\d+), auto_increment_offset = (\d+)")
+_INSERT_COLUMNS = re.compile(r"\s*INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+# Monthly bookings partitions (see 0003_partition_bookings.sql) as ranges of the single SQLite table
+_PARTITION = re.compile(r"\bbookings PARTITION \(p(\d{4})(\d{2})\)")
+_DROP_PARTITION = re.compile(r"\s*ALTER TABLE bookings DROP PARTITION p(\d{4})(\d{2})\s*$")
+
+def _month_range(year: str, month: str) -> str:
+    start = f"{year}-{month}-01"
+    return f"timestamp >= '{start}' AND timestamp < date('{start}', '+1 month')"
+
+def _emulate_partitions(operation: str) -> str:
+    drop = _DROP_PARTITION.match(operation)
+    if drop:
+        return f"DELETE FROM bookings WHERE {_month_range(*drop.groups())}"
+    operation = _PARTITION.sub(lambda m: f"(SELECT * FROM bookings WHERE {_month_range(*m.groups())})", operation)
+    return operation.replace("CURDATE()", "date('now')")
+
+def _convert_timestamp(value: bytes) -> datetime:
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("DATE", lambda value: value.decode())
+
+class LocalCursor:
+    """Cursor with the parts of the mysql.connector cursor API the repositories use"""
+
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False,
+                 connection: Optional["LocalConnection"] = None):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self._connection = connection
+        self._lastrowid = None
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {col[0]: value for col, value in zip(self._cursor.description, row)}
+
+    def _in_series(self, operation: str):
+        """Emulate auto_increment_increment/offset: move a generated id up to the session's series"""
+        insert = _INSERT_COLUMNS.match(operation)
+        row_id = self._cursor.lastrowid
+        if not insert or not row_id or "id" in [c.strip() for c in insert.group(2).split(",")]:
+            return
+        increment, offset = self._connection.id_series
+        placed = row_id + (offset - row_id) % increment
+        if placed != row_id:
+            self._cursor.execute(f"UPDATE {insert.group(1)} SET id = ? WHERE id = ?", (placed, row_id))
+        self._lastrowid = placed
+
+    def execute(self, operation: str, params=()):
+        series = _ID_SERIES.match(operation)
+        if series:
+            self._connection.id_series = (int(series.group(1)), int(series.group(2)))
+            return
+        self._lastrowid = None
+        # Emulate MySQL's MAX_EXECUTION_TIME optimizer hint by interrupting the statement
+        limit = _MAX_EXECUTION_TIME.search(operation)
+        if limit:
+            expires = time.monotonic() + int(limit.group(1)) / 1000.0
+            self._cursor.connection.set_progress_handler(lambda: time.monotonic() > expires, 1000)
+        try:
+            self._cursor.execute(_PLACEHOLDER.sub("?", _emulate_partitions(operation)), tuple(params or ()))
+            if _DROP_PARTITION.match(operation):
+                # DDL commits implicitly in MySQL
+                self._cursor.connection.commit()
+            if self._connection is not None and self._connection.id_series is not None:
+                self._in_series(operation)
+        except sqlite3.OperationalError as e:
+            if limit and "interrupted" in str(e):
+                raise mysql.connector.errors.DatabaseError(
+                    msg="Query execution was interrupted, maximum statement execution time exceeded",
+                    errno=3024) from e
+            raise mysql.connector.errors.DatabaseError(msg=str(e)) from e
+        except sqlite3.IntegrityError as e:
+            # MySQL reports a duplicate key as ER_DUP_ENTRY (1062)
+            duplicate = "UNIQUE constraint failed" in str(e)
+            raise mysql.connector.errors.IntegrityError(msg=str(e), errno=1062 if duplicate else None) from e
+        except sqlite3.Error as e:
+            raise mysql.connector.errors.DatabaseError(msg=str(e)) from e
+        finally:
+            if limit:
+                self._cursor.connection.set_progress_handler(None, 0)
+
+    def executemany(self, operation: str, seq_params):
+        try:
+            self._cursor.executemany(_PLACEHOLDER.sub("?", operation), seq_params)
+        except sqlite3.Error as e:
+            raise mysql.connector.errors.DatabaseError(msg=str(e)) from e
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size: int = 1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._lastrowid if self._lastrowid is not None else self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class LocalConnection:
+    """Connection with the parts of the mysql.connector connection API the data tier uses"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._open = True
+        # (auto_increment_increment, auto_increment_offset) once the session sets them
+        self.id_series = None
+
+    def cursor(self, dictionary: bool = False, **kwargs) -> LocalCursor:
+        return LocalCursor(self._conn.cursor(), dictionary=dictionary, connection=self)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self) -> bool:
+        return self._open
+
+    def close(self):
+        self._open = False
+        self._conn.close()
+
+class LocalDatabase:
+    """A file-backed SQLite database standing in for the MySQL data tier
+
+    Use ``connection_manager()`` to get a DatabaseConnection that the
+    repositories (and create_app) can use unchanged.
+    """
+
+    def __init__(self, path: str, seed: bool = True):
+        self.path = path
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        finally:
+            conn.close()
+        # Schema comes from the same versioned migrations as production (*.sqlite.sql variants)
+        MigrationRunner(self.connection_manager()).up()
+        conn = sqlite3.connect(path)
+        try:
+            if seed and conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0:
+                conn.executemany(
+                    "INSERT INTO events (title, date, location, description) VALUES (?, ?, ?, ?)",
+                    SAMPLE_EVENTS
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self, **kwargs) -> LocalConnection:
+        """Drop-in replacement for mysql.connector.connect"""
+        return LocalConnection(self.path)
+
+    def config(self) -> DatabaseConfig:
+        return DatabaseConfig(host="localhost", user="local", password="", database=self.path)
+
+    def connection_manager(self, pool_size: int = 0, id_series: Optional[Tuple[int, int]] = None) -> DatabaseConnection:
+        return DatabaseConnection(self.config(), pool_size=pool_size, connect=self.connect, dialect="sqlite",
+                                  id_series=id_series)
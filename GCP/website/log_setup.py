@@ -0,0 +1,147 @@
+"""
+Non-blocking logging for the application tier
+Request threads only put records on a bounded queue; a background listener
+formats them (as JSON lines that Cloud Logging understands) and does the I/O.
+Repeated messages are rate limited per call site, so an outage can't turn
+logging into the bottleneck for the requests that still succeed.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Dict, Optional, TextIO, Tuple
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, using the field names Cloud Logging parses"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    """Let ``burst`` records per call site through each ``window``, then 1 in ``sample_every``
+
+    Records are keyed by logger, level and the unformatted message, so callers
+    must pass arguments lazily (``logger.error("failed: %s", e)``) for
+    repeats to be recognised. The next record that gets through reports how
+    many were suppressed in between.
+    """
+
+    MAX_KEYS = 1000
+
+    def __init__(self, burst: int = 10, window: float = 60.0, sample_every: int = 100,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sample_every = max(1, sample_every)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sites: Dict[Tuple[str, int, str], list] = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, str(record.msg))
+        now = self._clock()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                if len(self._sites) >= self.MAX_KEYS:
+                    self._sites.clear()
+                site = self._sites[key] = [now, 0, 0]  # window start, count, suppressed
+            elif now - site[0] >= self.window:
+                site[0], site[1] = now, 0
+            site[1] += 1
+            over = site[1] - self.burst
+            if over <= 0 or over % self.sample_every == 0:
+                record.suppressed = site[2]
+                site[2] = 0
+                return True
+            site[2] += 1
+            self.suppressed += 1
+            return False
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueue without blocking or formatting; count what a full queue drops"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_rate_limit: Optional[RateLimitFilter] = None
+
+def configure_logging(level: str = "INFO", json_output: bool = True, burst: int = 10, window: float = 60.0,
+                      sample_every: int = 100, queue_size: int = 10000,
+                      stream: Optional[TextIO] = None) -> QueueListener:
+    """Route the root logger through a bounded queue to a background listener
+
+    Replaces any earlier configuration (including ``logging.basicConfig``).
+    """
+    global _listener, _handler, _rate_limit
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if json_output
+                        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _rate_limit = RateLimitFilter(burst, window, sample_every)
+    _handler = DroppingQueueHandler(queue.Queue(queue_size))
+    _handler.addFilter(_rate_limit)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Flush queued records and stop the listener (registered to run at exit)"""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+def stats() -> Dict[str, int]:
+    """Records dropped on a full queue and suppressed by the rate limit"""
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "suppressed": _rate_limit.suppressed if _rate_limit else 0,
+    }
+
+atexit.register(stop_logging)
@@ -0,0 +1,8 @@
+"""WSGI entry point - App Engine and gunicorn load ``main:app``"""
+from app import create_app
+from config import AppConfig
+from log_setup import configure_logging
+
+config = AppConfig.from_env()
+configure_logging(config.log_level, config.log_json, config.log_burst, config.log_window_seconds)
+app = create_app(config)
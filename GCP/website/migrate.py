@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the data tier
+Applies migrations/NNNN_name.sql in order and records them in schema_migrations.
+A migration may ship a NNNN_name.<dialect>.sql variant (e.g. .sqlite.sql for
+the local stand-in), which is used instead of the MySQL file for that dialect.
+
+Usage:
+    python migrate.py status
+    python migrate.py up [--target 0002]
+    python migrate.py check-indexes [--min-rows 1000]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+from data_access import DatabaseConnection, EventRepository, BookingRepository, OutboxRepository, BY_EMAIL
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+@dataclass
+class Migration:
+    """One versioned migration file"""
+    version: str
+    name: str
+    path: str
+
+    @property
+    def sql(self) -> str:
+        with open(self.path) as f:
+            return f.read()
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+def split_statements(sql: str) -> List[str]:
+    """Split a migration into statements on ';' at end of line, dropping -- comments"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    statements = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [s.strip() for s in statements if s.strip()]
+
+class MigrationRunner:
+    """Applies pending migrations to one database"""
+
+    def __init__(self, db: DatabaseConnection, directory: str = MIGRATIONS_DIR):
+        self.db = db
+        self.directory = directory
+
+    def discover(self) -> List[Migration]:
+        """All migrations for this database's dialect, in version order"""
+        migrations = []
+        for filename in sorted(os.listdir(self.directory)):
+            match = _FILENAME.match(filename)
+            if not match:
+                continue
+            version, name = match.groups()
+            variant = os.path.join(self.directory, f"{version}_{name}.{self.db.dialect}.sql")
+            path = variant if os.path.exists(variant) else os.path.join(self.directory, filename)
+            migrations.append(Migration(version, name, path))
+        return migrations
+
+    def _ensure_table(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(32) PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+
+    def _table_exists(self, conn, table: str) -> bool:
+        cursor = conn.cursor()
+        if self.db.dialect == "sqlite":
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+        else:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                (table,)
+            )
+        return cursor.fetchone()[0] > 0
+
+    def _record(self, conn, migration: Migration):
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (migration.version, migration.name, migration.checksum)
+        )
+        conn.commit()
+
+    def applied(self) -> Dict[str, str]:
+        """Applied versions mapped to the checksum recorded when they ran"""
+        with self.db.get_connection() as conn:
+            self._ensure_table(conn)
+            cursor = conn.cursor()
+            cursor.execute("SELECT version, checksum FROM schema_migrations")
+            return dict(cursor.fetchall())
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied()
+        return [m for m in self.discover() if m.version not in applied]
+
+    def up(self, target: Optional[str] = None) -> List[Migration]:
+        """Apply pending migrations up to and including ``target``
+
+        A database that already has the baseline tables (created from
+        schema.sql) but no migration history is adopted at 0001.
+        """
+        done = []
+        with self.db.get_connection() as conn:
+            self._ensure_table(conn)
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            migrations = self.discover()
+            if not applied and migrations and self._table_exists(conn, "events"):
+                self._record(conn, migrations[0])
+                applied.add(migrations[0].version)
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+                if target is not None and migration.version > target:
+                    break
+                cursor = conn.cursor()
+                for statement in split_statements(migration.sql):
+                    cursor.execute(statement)
+                conn.commit()
+                self._record(conn, migration)
+                done.append(migration)
+        return done
+
+    def status(self) -> List[Tuple[Migration, str]]:
+        """Each migration with 'applied', 'pending' or 'changed' (edited after it ran)"""
+        applied = self.applied()
+        result = []
+        for migration in self.discover():
+            if migration.version not in applied:
+                state = "pending"
+            elif applied[migration.version] != migration.checksum:
+                state = "changed"
+            else:
+                state = "applied"
+            result.append((migration, state))
+        return result
+
+def repository_queries() -> List[Tuple[str, str, tuple]]:
+    """Every read query the repositories issue, with representative parameters"""
+    return [
+        ("EventRepository.get_all_events", EventRepository.list_sql(), ()),
+        ("EventRepository.get_event_by_id", EventRepository.by_id_sql(), (1,)),
+        ("BookingRepository.get_all_bookings", BookingRepository.select_sql(), ()),
+        ("BookingRepository.get_bookings_by_email",
+         BookingRepository.select_sql(where=BY_EMAIL), ("user@lookmyshow.com",)),
+        ("OutboxRepository.claim", OutboxRepository.CLAIM_SQL, (0, 100)),
+    ]
+
+@dataclass
+class IndexProblem:
+    """A query plan step that scans or sorts a large table"""
+    query: str
+    table: str
+    detail: str
+
+def _plan_table(step: str) -> str:
+    """Table (or alias) from a SQLite plan step: 'SCAN b' or, on older SQLite, 'SCAN TABLE bookings AS b'"""
+    words = step.split()
+    if words[1] == "TABLE":
+        return words[4] if len(words) > 4 and words[3] == "AS" else words[2]
+    return words[1]
+
+def _is_filtered(sql: str) -> bool:
+    """Listing every row may legitimately walk a whole (covering) index; a filtered query may not"""
+    return " WHERE " in f" {sql.upper()} ".replace("\n", " ")
+
+def _table_rows(cursor, table: str) -> int:
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    return cursor.fetchone()[0]
+
+def check_index_coverage(db: DatabaseConnection, min_rows: int = 1000,
+                         queries: Optional[Sequence[Tuple[str, str, tuple]]] = None) -> List[IndexProblem]:
+    """EXPLAIN every repository query and report full scans or filesorts
+
+    Tables with fewer than ``min_rows`` rows are ignored; scanning five
+    events is fine, scanning every booking is not. A full index scan is
+    only accepted for unfiltered listings, which need every row anyway.
+    """
+    problems = []
+    with db.get_connection() as conn:
+        if db.dialect == "sqlite":
+            cursor = conn.cursor()
+            aliases = {"b": "bookings", "e": "events", "bookings": "bookings", "events": "events"}
+            sizes = {table: _table_rows(cursor, table) for table in set(aliases.values())}
+            for name, sql, params in queries or repository_queries():
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                steps = [row[3] for row in cursor.fetchall()]
+                for step in steps:
+                    if not step.startswith("SCAN "):
+                        continue
+                    table = aliases.get(_plan_table(step), _plan_table(step))
+                    if sizes.get(table, 0) < min_rows:
+                        continue
+                    if " USING " not in step:
+                        problems.append(IndexProblem(name, table, "full table scan"))
+                    elif _is_filtered(sql):
+                        problems.append(IndexProblem(name, table, "full index scan"))
+                if any("TEMP B-TREE FOR ORDER BY" in step for step in steps):
+                    big = [t for t in sizes if sizes[t] >= min_rows and t in sql]
+                    if big:
+                        problems.append(IndexProblem(name, ",".join(sorted(big)), "filesort"))
+        else:
+            cursor = conn.cursor(dictionary=True)
+            for name, sql, params in queries or repository_queries():
+                cursor.execute("EXPLAIN " + sql, params)
+                for step in cursor.fetchall():
+                    rows = step.get("rows") or 0
+                    extra = step.get("Extra") or ""
+                    if rows < min_rows:
+                        continue
+                    if step.get("type") == "ALL":
+                        problems.append(IndexProblem(name, step.get("table"), f"full table scan (~{rows} rows)"))
+                    elif step.get("type") == "index" and _is_filtered(sql):
+                        problems.append(IndexProblem(name, step.get("table"), f"full index scan (~{rows} rows)"))
+                    if "filesort" in extra:
+                        problems.append(IndexProblem(name, step.get("table"), f"filesort (~{rows} rows): {extra}"))
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="LookMyShow schema migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show applied and pending migrations")
+    up = sub.add_parser("up", help="Apply pending migrations")
+    up.add_argument("--target", help="Stop after this version")
+    check = sub.add_parser("check-indexes", help="EXPLAIN repository queries and fail on full scans/filesorts")
+    check.add_argument("--min-rows", type=int, default=1000, help="Ignore tables smaller than this")
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    runner = MigrationRunner(db)
+
+    if args.command == "status":
+        for migration, state in runner.status():
+            print(f"{migration.version}  {state:<8} {migration.name}")
+        return 0
+
+    if args.command == "up":
+        applied = runner.up(args.target)
+        for migration in applied:
+            print(f"✓ Applied {migration.version} {migration.name}")
+        if not applied:
+            print("✓ Database is up to date")
+        return 0
+
+    problems = check_index_coverage(db, args.min_rows)
+    for problem in problems:
+        print(f"✗ {problem.query}: {problem.detail} on {problem.table}")
+    if problems:
+        return 1
+    print(f"✓ All {len(repository_queries())} repository queries use indexes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
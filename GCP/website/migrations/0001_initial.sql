@@ -0,0 +1,28 @@
+-- Baseline schema (matches schema.sql). Databases created by hand from
+-- schema.sql are adopted at this version without re-running it.
+
+CREATE TABLE IF NOT EXISTS events (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    date DATE NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_date (date),
+    INDEX idx_location (location),
+    INDEX idx_events_title_date (title, date)
+);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    event_id INT NOT NULL,
+    user_email VARCHAR(255) NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status ENUM('confirmed', 'cancelled') DEFAULT 'confirmed',
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    INDEX idx_user_email (user_email),
+    INDEX idx_event_id (event_id),
+    INDEX idx_timestamp (timestamp),
+    INDEX idx_bookings_email_event (user_email, event_id)
+);
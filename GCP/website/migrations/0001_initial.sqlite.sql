@@ -0,0 +1,26 @@
+-- Baseline schema for the SQLite stand-in (local_db.py)
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    date DATE NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_date ON events(date);
+CREATE INDEX IF NOT EXISTS idx_location ON events(location);
+CREATE INDEX IF NOT EXISTS idx_events_title_date ON events(title, date);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    user_email VARCHAR(255) NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status VARCHAR(16) DEFAULT 'confirmed'
+);
+CREATE INDEX IF NOT EXISTS idx_user_email ON bookings(user_email);
+CREATE INDEX IF NOT EXISTS idx_event_id ON bookings(event_id);
+CREATE INDEX IF NOT EXISTS idx_timestamp ON bookings(timestamp);
+CREATE INDEX IF NOT EXISTS idx_bookings_email_event ON bookings(user_email, event_id);
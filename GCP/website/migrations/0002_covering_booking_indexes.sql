@@ -0,0 +1,12 @@
+-- Covering indexes for the bookings listings (InnoDB secondary indexes carry the id):
+--   get_all_bookings:      ORDER BY timestamp DESC, joins events on event_id
+--   get_bookings_by_email: WHERE user_email = ? ORDER BY timestamp DESC
+-- Both queries read the index in order instead of scanning and filesorting.
+
+CREATE INDEX idx_bookings_ts_cover ON bookings (timestamp, event_id, user_email);
+CREATE INDEX idx_bookings_user_ts ON bookings (user_email, timestamp, event_id);
+
+-- Superseded by the indexes above (same leading columns); dropping them saves a write per booking
+DROP INDEX idx_timestamp ON bookings;
+DROP INDEX idx_user_email ON bookings;
+DROP INDEX idx_bookings_email_event ON bookings;
@@ -0,0 +1,8 @@
+-- SQLite stand-in version of 0002_covering_booking_indexes.sql
+
+CREATE INDEX idx_bookings_ts_cover ON bookings (timestamp, event_id, user_email);
+CREATE INDEX idx_bookings_user_ts ON bookings (user_email, timestamp, event_id);
+
+DROP INDEX idx_timestamp;
+DROP INDEX idx_user_email;
+DROP INDEX idx_bookings_email_event;
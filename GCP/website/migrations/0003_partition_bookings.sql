@@ -0,0 +1,19 @@
+-- Range-partition bookings by month of timestamp (see partitions.py), so
+-- finished months can be archived to cold storage and dropped cheaply.
+-- MySQL partitioned tables can't have foreign keys and every unique key must
+-- include the partitioning column: the event_id FK is dropped (BookingService
+-- already checks the event exists) and the primary key becomes (id, timestamp).
+
+ALTER TABLE bookings DROP FOREIGN KEY bookings_ibfk_1;
+
+ALTER TABLE bookings
+    MODIFY timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, timestamp);
+
+-- Monthly partitions are split off p_future by: python partitions.py ensure
+ALTER TABLE bookings
+    PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+        PARTITION p_history VALUES LESS THAN (UNIX_TIMESTAMP('2025-01-01 00:00:00')),
+        PARTITION p_future VALUES LESS THAN MAXVALUE
+    );
@@ -0,0 +1 @@
+-- SQLite has no table partitioning; the stand-in keeps a single bookings table.
@@ -0,0 +1,19 @@
+-- Transactional outbox: side effects of a booking (confirmation email, analytics,
+-- cache invalidation) are recorded in the same transaction as the booking insert
+-- and delivered later by outbox_worker.py, at least once.
+--   status:       pending -> done, or dead after too many failed attempts
+--   available_at: epoch seconds; pushed forward while a worker holds the lease
+--                 and after a failure (backoff)
+
+CREATE TABLE booking_outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    topic VARCHAR(64) NOT NULL,
+    payload JSON NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    created_at DOUBLE NOT NULL,
+    available_at DOUBLE NOT NULL,
+    processed_at DOUBLE NULL,
+    last_error VARCHAR(500) NULL,
+    INDEX idx_outbox_claim (status, available_at, id)
+);
@@ -0,0 +1,14 @@
+-- Transactional outbox for the SQLite stand-in (see 0004_booking_outbox.sql)
+
+CREATE TABLE booking_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic VARCHAR(64) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    processed_at REAL,
+    last_error VARCHAR(500)
+);
+CREATE INDEX idx_outbox_claim ON booking_outbox (status, available_at, id);
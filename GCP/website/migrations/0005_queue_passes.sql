@@ -0,0 +1,11 @@
+-- Waiting-room admission passes spent on bookings (see waiting_room.py). The pass
+-- is inserted in the booking's transaction and the primary key makes it single-use
+-- across every app instance sharing the waiting-room secret. Rows past expires_at
+-- could no longer be presented anyway and are pruned.
+
+CREATE TABLE queue_passes (
+    nonce VARCHAR(32) PRIMARY KEY,
+    event_id INT NOT NULL,
+    expires_at DOUBLE NOT NULL,
+    INDEX idx_queue_passes_expiry (expires_at)
+);
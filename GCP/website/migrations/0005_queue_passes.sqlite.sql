@@ -0,0 +1,8 @@
+-- Spent waiting-room passes for the SQLite stand-in (see 0005_queue_passes.sql)
+
+CREATE TABLE queue_passes (
+    nonce VARCHAR(32) PRIMARY KEY,
+    event_id INT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX idx_queue_passes_expiry ON queue_passes (expires_at);
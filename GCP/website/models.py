@@ -1,7 +1,13 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from datetime import datetime
 
+def project(data: dict, fields: Optional[Sequence[str]]) -> dict:
+    """Keep only the requested fields (all of them when fields is None)"""
+    if fields is None:
+        return data
+    return {name: data[name] for name in fields}
+
 @dataclass
 class Event:
     """Event data model"""
@@ -11,14 +17,15 @@ class Event:
     location: str
     description: Optional[str] = None
     
-    def to_dict(self) -> dict:
-        return {
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> dict:
+        data = {
             'id': self.id,
             'title': self.title,
             'date': self.date,
             'location': self.location,
             'description': self.description
         }
+        return project(data, fields)
 
 @dataclass
 class Booking:
@@ -29,11 +36,29 @@ class Booking:
     timestamp: datetime
     event_title: Optional[str] = None
     
-    def to_dict(self) -> dict:
-        return {
+    def to_dict(self, fields: Optional[Sequence[str]] = None) -> dict:
+        data = {
             'id': self.id,
             'event_id': self.event_id,
             'user_email': self.user_email,
             'timestamp': self.timestamp.isoformat() if isinstance(self.timestamp, datetime) else str(self.timestamp),
             'event_title': self.event_title
-        } 
\ No newline at end of file
+        }
+        return project(data, fields)
+
+
+@dataclass
+class OutboxMessage:
+    """A pending side effect from the booking_outbox table"""
+    id: int
+    topic: str
+    payload: dict
+    attempts: int
+    created_at: float
+
+@dataclass
+class QueuePass:
+    """A waiting-room admission, spent on exactly one booking (see waiting_room.py)"""
+    nonce: str
+    event_id: int
+    expires_at: float
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Background worker that delivers booking side effects from the outbox
+Runs as its own process, next to (not inside) the API. Messages are claimed in
+batches, handed to every handler registered for their topic and marked done;
+failures are retried with jittered exponential backoff, so delivery is at
+least once and handlers must be idempotent.
+
+Usage:
+    python outbox_worker.py run [--batch-size 100] [--once] [--shard N] [--prune-passes-every 300]
+    python outbox_worker.py stats [--shard N]
+
+With BOOKING_SHARDS set, each shard has its own outbox: run one worker per shard.
+The worker for the main database (or shard 0) also deletes expired waiting-room
+passes, which live there, so bookings never pay for that cleanup.
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from config import AppConfig
+from data_access import BOOKING_CREATED, BookingRepository, DatabaseConnection, OutboxRepository
+from models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+HANDLERS: Dict[str, List[Handler]] = defaultdict(list)
+
+def handler(topic: str) -> Callable[[Handler], Handler]:
+    """Register a function to be called with the payload of every ``topic`` message"""
+    def register(func: Handler) -> Handler:
+        HANDLERS[topic].append(func)
+        return func
+    return register
+
+@handler(BOOKING_CREATED)
+def log_booking(payload: dict):
+    logger.info("Booking %s confirmed for %s (event %s)",
+                payload.get("booking_id"), payload.get("user_email"), payload.get("event_id"))
+
+class OutboxWorker:
+    """Drains the outbox: claim a batch, deliver each message, record the outcome"""
+
+    def __init__(self, repository: OutboxRepository, handlers: Optional[Dict[str, List[Handler]]] = None,
+                 batch_size: int = 100, lease_seconds: float = 60.0, max_attempts: int = 10,
+                 base_backoff: float = 1.0, max_backoff: float = 300.0,
+                 rng: Optional[random.Random] = None, clock: Callable[[], float] = time.time,
+                 prune_passes: Optional[Callable[[float], int]] = None, prune_every: float = 300.0):
+        self.repository = repository
+        self.handlers = HANDLERS if handlers is None else handlers
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._rng = rng or random
+        self._clock = clock
+        self.prune_passes = prune_passes
+        self.prune_every = prune_every
+        self._next_prune = clock()
+        self.started_at = clock()
+        self.batches = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dead = 0
+        self.max_delivery_lag_s = 0.0
+        self._lag_total = 0.0
+
+    def _deliver(self, message: OutboxMessage):
+        handlers = self.handlers.get(message.topic)
+        if not handlers:
+            raise LookupError(f"No handler registered for {message.topic}")
+        for func in handlers:
+            func(message.payload)
+
+    def backoff(self, attempts: int) -> float:
+        """Full-jitter exponential backoff before the next attempt"""
+        return self._rng.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** (attempts - 1))))
+
+    def run_once(self) -> int:
+        """Process one batch; returns how many messages were claimed"""
+        messages = self.repository.claim(self.batch_size, self.lease_seconds, now=self._clock())
+        done = []
+        for message in messages:
+            try:
+                self._deliver(message)
+                done.append(message)
+            except Exception as e:
+                attempts = message.attempts + 1
+                dead = attempts >= self.max_attempts
+                self.repository.fail(message.id, f"{type(e).__name__}: {e}",
+                                     self._clock() + self.backoff(attempts), dead)
+                self.failed += 1
+                self.dead += dead
+                logger.warning("Outbox message %s (%s) failed, attempt %d%s: %s", message.id, message.topic,
+                               attempts, ", giving up" if dead else "", e)
+        now = self._clock()
+        self.repository.complete([message.id for message in done], now=now)
+        for message in done:
+            lag = now - message.created_at
+            self._lag_total += lag
+            self.max_delivery_lag_s = max(self.max_delivery_lag_s, lag)
+        self.delivered += len(done)
+        self.batches += 1 if messages else 0
+        return len(messages)
+
+    def maintain(self) -> int:
+        """Delete expired queue passes when due; returns how many went"""
+        now = self._clock()
+        if self.prune_passes is None or now < self._next_prune:
+            return 0
+        self._next_prune = now + self.prune_every
+        try:
+            return self.prune_passes(now)
+        except Exception as e:
+            logger.warning("Pruning queue passes failed: %s", e)
+            return 0
+
+    def run(self, stop: threading.Event, idle_sleep: float = 1.0, report_every: float = 60.0):
+        """Drain until ``stop`` is set; sleeps only when a batch comes back short"""
+        next_report = self._clock() + report_every
+        while not stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                logger.warning("Outbox batch failed: %s", e)
+                claimed = 0
+            self.maintain()
+            if self._clock() >= next_report:
+                logger.info("Outbox worker: %s", json.dumps(self.metrics()))
+                next_report = self._clock() + report_every
+            if claimed < self.batch_size:
+                stop.wait(idle_sleep)
+
+    def metrics(self) -> Dict[str, float]:
+        """Throughput since start and end-to-end delivery lag (commit of the booking to done)"""
+        elapsed = max(self._clock() - self.started_at, 1e-9)
+        return {
+            "batches": self.batches,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dead": self.dead,
+            "throughput_per_s": round(self.delivered / elapsed, 2),
+            "avg_delivery_lag_s": round(self._lag_total / self.delivered, 3) if self.delivered else 0.0,
+            "max_delivery_lag_s": round(self.max_delivery_lag_s, 3),
+        }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Deliver booking side effects from the outbox")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Drain the outbox")
+    run.add_argument("--batch-size", type=int, default=100)
+    run.add_argument("--lease-seconds", type=float, default=60.0)
+    run.add_argument("--max-attempts", type=int, default=10)
+    run.add_argument("--idle-sleep", type=float, default=1.0, help="Seconds to wait when the outbox is empty")
+    run.add_argument("--once", action="store_true", help="Process a single batch and exit")
+    run.add_argument("--prune-passes-every", type=float, default=300.0,
+                     help="Seconds between deleting expired waiting-room passes (shard 0 or the main database)")
+    stats = sub.add_parser("stats", help="Show backlog size and lag")
+    for command in (run, stats):
+        command.add_argument("--shard", type=int, help="Index into BOOKING_SHARDS (default: the main database)")
+    args = parser.parse_args(argv)
+
+    if args.shard is None:
+        db = DatabaseConnection()
+    else:
+        db = DatabaseConnection(AppConfig.from_env().booking_shards[args.shard])
+    repository = OutboxRepository(db)
+    if args.command == "stats":
+        print(json.dumps(repository.stats(), indent=2))
+        return 0
+
+    from log_setup import configure_logging
+    configure_logging(json_output=False)
+    # Queue passes are recorded on shard 0, or on the main database when bookings aren't sharded
+    passes = BookingRepository(db) if not args.shard else None
+    worker = OutboxWorker(repository, batch_size=args.batch_size, lease_seconds=args.lease_seconds,
+                          max_attempts=args.max_attempts, prune_every=args.prune_passes_every,
+                          prune_passes=passes.prune_queue_passes if passes else None)
+    if args.once:
+        print(f"✓ Processed {worker.run_once()} messages, pruned {worker.maintain()} expired queue passes")
+        return 0
+    stop = threading.Event()
+    try:
+        worker.run(stop, idle_sleep=args.idle_sleep)
+    except KeyboardInterrupt:
+        stop.set()
+    print(json.dumps(worker.metrics(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Maintenance for the monthly partitions of the bookings table (MySQL)
+Keeps empty partitions ready for upcoming months and archives partitions whose
+events are all over to compressed NDJSON, then drops them from the hot table.
+
+Usage:
+    python partitions.py list
+    python partitions.py ensure [--months-ahead 3]
+    python partitions.py archive --older-than-days 90 [--archive-dir DIR] [--dry-run]
+"""
+
+import argparse
+import os
+import re
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from booking_archive import BookingArchive
+from data_access import DatabaseConnection
+
+FUTURE_PARTITION = "p_future"
+_MONTHLY = re.compile(r"^p(\d{4})(\d{2})$")
+
+@dataclass
+class Partition:
+    """One partition of the bookings table"""
+    name: str
+    upper_bound: Optional[datetime]  # None for MAXVALUE
+    rows: int
+
+def month_after(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def partition_name(month: date) -> str:
+    return f"p{month.year:04d}{month.month:02d}"
+
+def list_partitions(db: DatabaseConnection) -> List[Partition]:
+    """Partitions in order, with the server-local upper bound of each"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT PARTITION_NAME,
+                   CASE WHEN PARTITION_DESCRIPTION = 'MAXVALUE' THEN NULL
+                        ELSE FROM_UNIXTIME(PARTITION_DESCRIPTION) END,
+                   TABLE_ROWS
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'bookings'
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """)
+        return [Partition(name, bound, rows or 0) for name, bound, rows in cursor.fetchall()
+                if name is not None]
+
+def plan_future_partitions(partitions: List[Partition], today: date, months_ahead: int = 3) -> Optional[str]:
+    """REORGANIZE statement splitting p_future into monthly partitions through today + months_ahead
+
+    Returns None when the partitions already reach far enough.
+    """
+    bounded = [p.upper_bound for p in partitions if p.upper_bound is not None]
+    if not bounded:
+        raise ValueError("bookings is not partitioned; run migrate.py up first")
+    month = max(bounded).date().replace(day=1)
+    last = today.replace(day=1)
+    for _ in range(months_ahead):
+        last = month_after(last)
+    new = []
+    while month <= last:
+        upper = month_after(month)
+        new.append(f"PARTITION {partition_name(month)} VALUES LESS THAN "
+                   f"(UNIX_TIMESTAMP('{upper.isoformat()} 00:00:00'))")
+        month = upper
+    if not new:
+        return None
+    new.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return (f"ALTER TABLE bookings REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n    "
+            + ",\n    ".join(new) + "\n)")
+
+def ensure_partitions(db: DatabaseConnection, months_ahead: int = 3, today: Optional[date] = None) -> Optional[str]:
+    """Create partitions for upcoming months (run daily; cheap while p_future is empty)"""
+    statement = plan_future_partitions(list_partitions(db), today or date.today(), months_ahead)
+    if statement:
+        with db.get_connection() as conn:
+            conn.cursor().execute(statement)
+    return statement
+
+def archivable_partitions(db: DatabaseConnection, cutoff: datetime) -> List[Partition]:
+    """Partitions that ended before ``cutoff`` and contain no bookings for upcoming events"""
+    candidates = [p for p in list_partitions(db)
+                  if p.name != FUTURE_PARTITION and p.upper_bound is not None and p.upper_bound <= cutoff]
+    ready = []
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        for partition in candidates:
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM bookings PARTITION ({partition.name}) b
+                JOIN events e ON b.event_id = e.id
+                WHERE e.date >= CURDATE()
+            """)
+            if cursor.fetchone()[0] == 0:
+                ready.append(partition)
+    return ready
+
+def archive_partition(db: DatabaseConnection, archive: BookingArchive, partition: Partition,
+                      batch_size: int = 5000) -> int:
+    """Export one partition to the archive, verify the row count, then drop it"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM bookings PARTITION ({partition.name})")
+        expected = cursor.fetchone()[0]
+
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT b.id, b.event_id, b.user_email, b.timestamp, e.title AS event_title
+            FROM bookings PARTITION ({partition.name}) b
+            LEFT JOIN events e ON b.event_id = e.id
+            ORDER BY b.timestamp DESC
+        """)
+
+        def rows():
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield from batch
+
+        written = archive.write_partition(partition.name, partition.upper_bound.isoformat(), rows())
+        if written != expected:
+            raise RuntimeError(f"Archived {written} rows from {partition.name} but it holds {expected}; not dropping")
+        conn.cursor().execute(f"ALTER TABLE bookings DROP PARTITION {partition.name}")
+    return written
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage bookings partitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Show partitions and approximate row counts")
+    ensure = sub.add_parser("ensure", help="Create partitions for upcoming months")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+    archive = sub.add_parser("archive", help="Archive and drop partitions of finished events")
+    archive.add_argument("--older-than-days", type=int, default=90)
+    archive.add_argument("--archive-dir", default=os.getenv("BOOKINGS_ARCHIVE_DIR"))
+    archive.add_argument("--dry-run", action="store_true", help="Only list what would be archived")
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+
+    if args.command == "list":
+        for p in list_partitions(db):
+            bound = p.upper_bound.isoformat() if p.upper_bound else "MAXVALUE"
+            print(f"{p.name:<12} < {bound:<20} ~{p.rows} rows")
+        return 0
+
+    if args.command == "ensure":
+        statement = ensure_partitions(db, args.months_ahead)
+        print(statement or "✓ Partitions already cover the upcoming months")
+        return 0
+
+    if not args.archive_dir:
+        print("❌ Set --archive-dir or BOOKINGS_ARCHIVE_DIR")
+        return 1
+    cutoff = datetime.combine(date.today() - timedelta(days=args.older_than_days), datetime.min.time())
+    ready = archivable_partitions(db, cutoff)
+    if not ready:
+        print("✓ Nothing to archive")
+    for partition in ready:
+        if args.dry_run:
+            print(f"Would archive {partition.name} (~{partition.rows} rows)")
+            continue
+        rows = archive_partition(db, BookingArchive(args.archive_dir), partition)
+        print(f"✓ Archived {partition.name}: {rows} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+End-to-end performance regression gate
+Starts the API in-process on a seeded SQLite stand-in (the migrations' schema
+plus synthetic bookings), drives a fixed, seeded workload and compares
+throughput, p99 latency and database queries per request with the committed
+baseline in perf_baseline.json. Exits 1 when any of them regresses past its
+threshold, so an N+1 query or a lost index fails the build.
+
+Usage:
+    python perf_gate.py                         # compare with perf_baseline.json
+    python perf_gate.py --update-baseline       # record a new baseline (commit it)
+    python perf_gate.py --bookings 100000 --duration 5
+
+Seeded databases are cached per (bookings, users, seed, migrations) under
+--cache-dir, so only the first run pays for generating them.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import requests
+from local_db import LocalDatabase
+from loadtest import LoadRunner, Workload, parse_mix, start_local_server
+from migrate import MIGRATIONS_DIR
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baseline.json")
+DEFAULT_MIX = "events=40,event=30,booking=10,user=20"
+# Sequential requests per operation when counting queries
+PROBE_REQUESTS = 20
+
+def seed_bookings(path: str, count: int, users: int, seed: int = 42, batch_size: int = 50000):
+    """Append ``count`` deterministic bookings spread over ``users`` users, the events and a year"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    try:
+        event_ids = [row[0] for row in conn.execute("SELECT id FROM events")]
+        for offset in range(0, count, batch_size):
+            rows = [(rng.choice(event_ids), f"user{rng.randrange(users)}@lookmyshow.com",
+                     (start + timedelta(seconds=rng.randrange(365 * 86400))).strftime("%Y-%m-%d %H:%M:%S"),
+                     "confirmed")
+                    for _ in range(min(batch_size, count - offset))]
+            conn.executemany("INSERT INTO bookings (event_id, user_email, timestamp, status) VALUES (?, ?, ?, ?)",
+                             rows)
+            conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.commit()
+    finally:
+        conn.close()
+
+def _schema_digest() -> str:
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        with open(os.path.join(MIGRATIONS_DIR, name), "rb") as f:
+            digest.update(name.encode() + f.read())
+    return digest.hexdigest()[:12]
+
+def seeded_database(cache_dir: str, bookings: int, users: int, seed: int) -> str:
+    """Path of a cached seeded database, generating it on first use"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"perf-{bookings}-{users}-{seed}-{_schema_digest()}.db")
+    if not os.path.exists(path):
+        print(f"⏳ Seeding {bookings} bookings for {users} users...")
+        started = time.perf_counter()
+        building = path + ".building"
+        for leftover in (building, building + "-wal", building + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        LocalDatabase(building)
+        seed_bookings(building, bookings, users, seed)
+        os.replace(building, path)
+        print(f"✓ Seeded in {time.perf_counter() - started:.1f}s → {path}")
+    return path
+
+class GateWorkload(Workload):
+    """The load test mix, with user lookups spread over the seeded users"""
+
+    def __init__(self, base_url: str, mix: Dict[str, int], event_ids: List[int], users: int, seed: int):
+        super().__init__(base_url, mix, event_ids, seed=seed)
+        self.users = users
+
+    def _user_bookings(self, session):
+        with self._rng_lock:
+            user = self.rng.randrange(self.users)
+        return session.get(f"{self.base_url}/api/bookings/user/user{user}@lookmyshow.com", timeout=30)
+
+def measure(db_path: str, mix: Dict[str, int], users: int, concurrency: int, duration: float,
+            seed: int) -> Dict[str, object]:
+    """Queries per request for each operation, then throughput and latency under load"""
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    database = LocalDatabase(db_path, seed=False)
+    db = database.connection_manager(pool_size=concurrency)
+    base_url, stop = start_local_server(db_path, pool_size=concurrency, db=db)
+    try:
+        event_ids = [e["id"] for e in requests.get(f"{base_url}/api/events", timeout=30).json()]
+        workload = GateWorkload(base_url, mix, event_ids, users, seed)
+        session = requests.Session()
+        queries = {}
+        for name in workload.names:
+            before = db.queries
+            for _ in range(PROBE_REQUESTS):
+                workload.operations[name](session).raise_for_status()
+            queries[name] = round((db.queries - before) / PROBE_REQUESTS, 2)
+        report = LoadRunner(workload, concurrency, duration).run().report()
+    finally:
+        stop()
+    return {
+        "throughput_rps": report["total"]["throughput_rps"],
+        "p99_ms": report["total"]["p99_ms"],
+        "error_rate": report["total"]["error_rate"],
+        "queries_per_request": queries,
+        "endpoints": {name: {"p99_ms": s["p99_ms"], "throughput_rps": s["throughput_rps"]}
+                      for name, s in report["endpoints"].items()},
+    }
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], max_throughput_drop: float,
+            max_p99_rise: float, max_extra_queries: float) -> List[tuple]:
+    """(metric, baseline, current, limit, ok) for every gated metric"""
+    checks = []
+    limit = baseline["throughput_rps"] * (1 - max_throughput_drop)
+    checks.append(("throughput_rps", baseline["throughput_rps"], current["throughput_rps"], round(limit, 2),
+                   current["throughput_rps"] >= limit))
+    limit = baseline["p99_ms"] * (1 + max_p99_rise)
+    checks.append(("p99_ms", baseline["p99_ms"], current["p99_ms"], round(limit, 3), current["p99_ms"] <= limit))
+    checks.append(("error_rate", 0.0, current["error_rate"], 0.0, current["error_rate"] == 0))
+    for name, expected in baseline["queries_per_request"].items():
+        actual = current["queries_per_request"].get(name)
+        limit = expected + max_extra_queries
+        checks.append((f"queries/{name}", expected, actual, limit, actual is not None and actual <= limit))
+    return checks
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail when the API got slower than the committed baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the measured numbers as the baseline")
+    parser.add_argument("--bookings", type=int, help="Synthetic bookings to seed (default: the baseline's, else 1M)")
+    parser.add_argument("--users", type=int, help="Distinct users in the synthetic bookings (default: 50k)")
+    parser.add_argument("--duration", type=float, help="Seconds of load (default: the baseline's, else 10)")
+    parser.add_argument("--concurrency", type=int, help="Closed-model clients (default: the baseline's, else 4)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "lookmyshow-perf"))
+    parser.add_argument("--max-throughput-drop", type=float, default=0.25, help="Allowed fractional drop")
+    parser.add_argument("--max-p99-rise", type=float, default=0.5, help="Allowed fractional rise")
+    parser.add_argument("--max-extra-queries", type=float, default=0.0, help="Allowed extra queries per request")
+    parser.add_argument("--json", action="store_true", help="Print the measurement as JSON")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        print(f"❌ No baseline at {args.baseline}; record one with --update-baseline")
+        return 1
+    workload = dict((baseline or {}).get("workload", {}))
+    for key, default in (("bookings", 1_000_000), ("users", 50_000), ("duration", 10.0), ("concurrency", 4)):
+        workload[key] = getattr(args, key) or workload.get(key, default)
+    workload.setdefault("mix", DEFAULT_MIX)
+    workload["seed"] = args.seed
+
+    seeded = seeded_database(args.cache_dir, workload["bookings"], workload["users"], args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The workload writes bookings, so every run starts from a fresh copy
+        db_path = os.path.join(tmp, "lookmyshow.db")
+        shutil.copyfile(seeded, db_path)
+        current = measure(db_path, parse_mix(workload["mix"]), workload["users"], workload["concurrency"],
+                          workload["duration"], args.seed)
+
+    if args.json:
+        print(json.dumps(current, indent=2))
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"workload": workload, "metrics": current,
+                       "recorded_on": {"python": platform.python_version(), "machine": platform.machine(),
+                                       "cpus": os.cpu_count()}}, f, indent=2)
+            f.write("\n")
+        print(f"✓ Baseline written to {args.baseline}")
+        return 0
+
+    if baseline["workload"] != workload:
+        print("⚠️  Workload differs from the baseline's; the comparison is only indicative")
+    checks = compare(current, baseline["metrics"], args.max_throughput_drop, args.max_p99_rise,
+                     args.max_extra_queries)
+    print(f"\n{'metric':<22} {'baseline':>10} {'current':>10} {'limit':>10}")
+    for metric, expected, actual, limit, ok in checks:
+        print(f"{metric:<22} {expected:>10} {actual:>10} {limit:>10}  {'✓' if ok else '❌ regressed'}")
+    failed = [check[0] for check in checks if not check[4]]
+    if failed:
+        print(f"\n❌ Performance regressed: {', '.join(failed)}")
+        return 1
+    print("\n✓ Within the baseline's thresholds")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
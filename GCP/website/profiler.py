@@ -0,0 +1,119 @@
+"""
+On-demand sampling profiler for a live worker
+Periodically reads every thread's Python stack (sys._current_frames) and
+counts identical stacks, so the output is collapsed-stack text that
+flamegraph.pl or speedscope load directly, plus the functions that were on
+CPU (self) or on the stack (total) most often. Nothing runs until a profile
+is requested; the sampling thread exists only for that window.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+def in_request(frame) -> bool:
+    """True when the stack is inside Flask's request handling (a request thread at work)"""
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "wsgi_app" and f"{os.sep}flask{os.sep}" in code.co_filename:
+            return True
+        frame = frame.f_back
+    return False
+
+class StackSampler:
+    """Samples the stacks of the selected threads every ``interval`` seconds
+
+    ``thread_id`` restricts sampling to one thread (request-level mode);
+    otherwise every thread passing ``thread_filter`` is sampled, except the
+    sampling thread itself.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None,
+                 thread_filter: Optional[Callable] = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.thread_filter = thread_filter
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.threads = set()
+        self.started = self.ended = None
+        self._names: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            # Semicolons separate frames in the collapsed format
+            name = self._names[code] = (f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                                        f"{code.co_firstlineno})").replace(";", ":")
+        return name
+
+    def _stack(self, frame) -> str:
+        names = []
+        while frame is not None:
+            names.append(self._name(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def sample_once(self):
+        me = threading.get_ident()
+        frames = sys._current_frames()
+        if self.thread_id is not None:
+            frames = {self.thread_id: frames[self.thread_id]} if self.thread_id in frames else {}
+        for ident, frame in frames.items():
+            if ident == me or (self.thread_filter is not None and not self.thread_filter(frame)):
+                continue
+            self.stacks[self._stack(frame)] += 1
+            self.samples += 1
+            self.threads.add(ident)
+
+    def run(self, seconds: float):
+        """Sample from the calling thread for ``seconds``"""
+        self.started = time.perf_counter()
+        ends = self.started + seconds
+        while not self._stop.is_set() and time.perf_counter() < ends:
+            self.sample_once()
+            self._stop.wait(self.interval)
+        self.ended = time.perf_counter()
+
+    def start(self):
+        """Sample from a background thread until stop()"""
+        self._thread = threading.Thread(target=self.run, args=(float("inf"),), name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        """One 'frame;frame;frame count' line per distinct stack, heaviest first"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = 20) -> Dict[str, List[dict]]:
+        """Functions by samples where they were running (self) and anywhere on the stack (total)"""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+
+        def rows(counter):
+            return [{"function": name, "samples": n, "percent": round(100.0 * n / self.samples, 1)}
+                    for name, n in counter.most_common(limit)]
+        return {"self": rows(own), "total": rows(total)}
+
+    def report(self, limit: int = 20) -> dict:
+        return {
+            "duration_s": round((self.ended or time.perf_counter()) - (self.started or time.perf_counter()), 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "threads": len(self.threads),
+            "top": self.top(limit),
+            "collapsed": self.collapsed(),
+        }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Move bookings onto the shards that own them under a new shard map
+Also the backfill from an unsharded database: pass it as the only source.
+Rows are copied to their new shard with their ids before they are deleted
+from the old one, and a row whose id is already on the target is not copied
+again, so an interrupted run can simply be repeated. Afterwards every
+target's AUTO_INCREMENT counter is raised above the largest id scanned; with
+each shard allocating from its own series (see shard_id_series), ids stay
+unique across shards. An id on the target that belongs to a different
+booking is reported as a conflict and its source row is left in place.
+
+Usage:
+    python reshard.py --to "db1:3306/eventsdb,db2:3306/eventsdb" [--from "db0/eventsdb"] [--dry-run]
+
+--from defaults to BOOKING_SHARDS (or the main database when unset) and --to
+is required; switch BOOKING_SHARDS to the new map once a pass finds nothing
+left to move. Bookings written to the old map meanwhile are picked up by a
+second pass.
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+from config import load_database_config, parse_shard_map
+from data_access import DatabaseConnection, shard_index
+
+COPY_COLUMNS = ("id", "event_id", "user_email", "timestamp", "status")
+
+def _placeholders(count: int) -> str:
+    return ", ".join(["%s"] * count)
+
+@dataclass
+class ReshardResult:
+    scanned: int = 0
+    moved: int = 0
+    already_copied: int = 0
+    # Source ids held by a different booking on the target; left on the source
+    conflicts: List[int] = field(default_factory=list)
+    max_id: int = 0
+    # (source shard, target shard) -> rows
+    routes: Dict[tuple, int] = field(default_factory=lambda: defaultdict(int))
+
+def _same_database(a: DatabaseConnection, b: DatabaseConnection) -> bool:
+    return (a.config.host, a.config.port, a.config.database) == (b.config.host, b.config.port, b.config.database)
+
+def _copy(target: DatabaseConnection, rows: List[dict]) -> Tuple[List[int], int]:
+    """Insert rows whose id the target doesn't have yet
+
+    Returns the ids now on the target (safe to delete from the source) and
+    how many of them were already there.
+    """
+    with target.get_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT id, user_email, event_id FROM bookings WHERE id IN ({_placeholders(len(rows))})",
+                       [row["id"] for row in rows])
+        existing = {found["id"]: found for found in cursor.fetchall()}
+        copied, present = [], 0
+        for row in rows:
+            found = existing.get(row["id"])
+            if found is not None:
+                if (found["user_email"], found["event_id"]) == (row["user_email"], row["event_id"]):
+                    copied.append(row["id"])
+                    present += 1
+                continue
+            cursor.execute(
+                f"INSERT INTO bookings ({', '.join(COPY_COLUMNS)}) VALUES ({_placeholders(len(COPY_COLUMNS))})",
+                (row["id"], row["event_id"], row["user_email"], str(row["timestamp"]), row["status"])
+            )
+            copied.append(row["id"])
+        conn.commit()
+    return copied, present
+
+def _raise_id_counter(target: DatabaseConnection, max_id: int):
+    """Make the target allocate ids above ``max_id``, so new bookings never reuse a moved booking's id"""
+    with target.get_connection() as conn:
+        cursor = conn.cursor()
+        if target.dialect == "sqlite":
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = 'bookings'", (max_id,))
+            if not cursor.rowcount:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('bookings', %s)", (max_id,))
+        else:
+            # Never lowers the counter: MySQL keeps it above the largest id in the table
+            cursor.execute(f"ALTER TABLE bookings AUTO_INCREMENT = {int(max_id) + 1}")
+        conn.commit()
+
+def reshard(sources: Sequence[DatabaseConnection], targets: Sequence[DatabaseConnection],
+            batch_size: int = 500, dry_run: bool = False) -> ReshardResult:
+    """Move every booking on ``sources`` that hashes to a different database under ``targets``"""
+    result = ReshardResult()
+    for source_index, source in enumerate(sources):
+        last_id = 0
+        while True:
+            with source.get_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(f"SELECT {', '.join(COPY_COLUMNS)} FROM bookings "
+                               "WHERE id > %s ORDER BY id LIMIT %s", (last_id, batch_size))
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            result.scanned += len(rows)
+            result.max_id = max(result.max_id, last_id)
+
+            moves: Dict[int, List[dict]] = defaultdict(list)
+            for row in rows:
+                target_index = shard_index(row["user_email"], len(targets))
+                if not _same_database(source, targets[target_index]):
+                    moves[target_index].append(row)
+            for target_index, batch in moves.items():
+                result.routes[(source_index, target_index)] += len(batch)
+                result.moved += len(batch)
+                if dry_run:
+                    continue
+                copied, present = _copy(targets[target_index], batch)
+                result.already_copied += present
+                result.conflicts += sorted({row["id"] for row in batch} - set(copied))
+                if copied:
+                    with source.get_connection() as conn:
+                        conn.cursor().execute(f"DELETE FROM bookings WHERE id IN ({_placeholders(len(copied))})",
+                                              copied)
+                        conn.commit()
+    if result.max_id and not dry_run:
+        for target in targets:
+            _raise_id_counter(target, result.max_id)
+    return result
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move bookings to the shards that own them")
+    parser.add_argument("--from", dest="sources", default=os.getenv("BOOKING_SHARDS", ""),
+                        help="Current shard map, 'host[:port]/database,...' (default: BOOKING_SHARDS or DB_HOST)")
+    parser.add_argument("--to", dest="targets", required=True, help="New shard map, in shard order")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would move")
+    args = parser.parse_args(argv)
+
+    base = load_database_config()
+    sources = [DatabaseConnection(c) for c in parse_shard_map(args.sources, base)] or [DatabaseConnection(base)]
+    targets = [DatabaseConnection(c) for c in parse_shard_map(args.targets, base)]
+    if not targets:
+        print("❌ --to needs at least one shard")
+        return 1
+
+    result = reshard(sources, targets, args.batch_size, args.dry_run)
+    verb = "Would move" if args.dry_run else "Moved"
+    for (source, target), rows in sorted(result.routes.items()):
+        print(f"  {sources[source].config.host}/{sources[source].config.database} → "
+              f"{targets[target].config.host}/{targets[target].config.database}: {rows}")
+    print(f"✓ Scanned {result.scanned} bookings. {verb} {result.moved}"
+          + (f" ({result.already_copied} were already on their new shard)" if result.already_copied else ""))
+    if result.conflicts:
+        print(f"❌ {len(result.conflicts)} ids are taken by other bookings on their new shard and were left "
+              f"in place: {', '.join(map(str, result.conflicts[:20]))}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Failure handling for calls to the data tier
+A per-endpoint circuit breaker that fails fast while the database is down,
+and bounded retries with jittered exponential backoff for idempotent reads.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+class UnavailableError(Exception):
+    """The data tier can't serve this request right now (maps to HTTP 503)"""
+    status_code: int = 503
+    retry_after: int = 1
+
+class CircuitOpenError(UnavailableError):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for {endpoint}; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures
+
+    While open every call fails immediately. After ``reset_timeout`` seconds
+    one trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may proceed"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - self._clock()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.endpoint, max(remaining, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "endpoint": self.endpoint,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """The shared breaker for an endpoint (one per host:port/database per process)
+
+    The first caller's settings win; a later caller asking for different
+    ones gets the existing breaker and a warning.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(endpoint, failure_threshold, reset_timeout)
+        elif (breaker.failure_threshold, breaker.reset_timeout) != (failure_threshold, reset_timeout):
+            logger.warning("Circuit breaker for %s already has failure_threshold=%s, reset_timeout=%ss; "
+                           "ignoring %s, %ss", endpoint, breaker.failure_threshold, breaker.reset_timeout,
+                           failure_threshold, reset_timeout)
+        return breaker
+
+def retry(operation: Callable[[], T], attempts: int = 3, base_delay: float = 0.05, max_delay: float = 1.0,
+          retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+          rng: Optional[random.Random] = None, sleep: Callable[[float], None] = time.sleep) -> T:
+    """Call ``operation`` up to ``attempts`` times with full-jitter exponential backoff
+
+    Only use this for idempotent operations. UnavailableError is never retried.
+    """
+    rng = rng or random
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except UnavailableError:
+            raise
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            sleep(rng.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+    raise AssertionError("unreachable")
@@ -1,5 +1,7 @@
 -- LookMyShow Database Schema for Three-Tier Architecture
 -- Data Tier: MySQL database schema
+-- One-shot bootstrap with sample data. Schema changes live in migrations/;
+-- after running this, apply them with: python migrate.py up
 
 -- Create database (if not exists)
 CREATE DATABASE IF NOT EXISTS eventsdb;
@@ -3,27 +3,173 @@ const API_BASE_URL = window.location.hostname === 'localhost'
     ? 'http://localhost:5000/api' 
     : '/api'; // Use relative path for production deployment
 
+// Static events catalog from catalog_publisher.py (nginx /catalog/ or the static bucket);
+// build with --define /catalog/latest.json=<url> to read it from elsewhere, or =api-only to
+// always use the API (the App Engine build does: its /.* handler answers with index.html)
+const CATALOG_API_ONLY = 'api-only';
+const CATALOG_URL = window.location.hostname === 'localhost' ? CATALOG_API_ONLY : '/catalog/latest.json';
+
+// Presentation Tier - Data Layer
+// Keeps the last response per path (and its ETag) in localStorage so a page
+// load renders immediately and then revalidates with a cheap 304. Concurrent
+// requests for the same path share one fetch.
+class ApiCache {
+    constructor(baseUrl, storage, prefix = 'lookmyshow:') {
+        this.baseUrl = baseUrl;
+        this.storage = storage;
+        this.prefix = prefix;
+        this.inFlight = new Map();
+    }
+
+    // Reading window.localStorage throws (SecurityError) when the browser blocks
+    // site data; the page then works without a cache instead of failing to start
+    store() {
+        if (this.storage === undefined) {
+            try {
+                this.storage = window.localStorage;
+            } catch (error) {
+                console.warn('Response cache unavailable:', error);
+                this.storage = null;
+            }
+        }
+        return this.storage;
+    }
+
+    read(path) {
+        if (!this.store()) return null;
+        try {
+            const entry = JSON.parse(this.storage.getItem(this.prefix + path));
+            return entry && 'body' in entry ? entry : null;
+        } catch (error) {
+            return null; // Storage disabled or entry corrupt: behave as uncached
+        }
+    }
+
+    write(path, etag, body) {
+        if (!this.store()) return;
+        try {
+            this.storage.setItem(this.prefix + path, JSON.stringify({ etag, body }));
+        } catch (error) {
+            console.warn('Response cache unavailable:', error);
+        }
+    }
+
+    // Latest body for path, revalidated against the server
+    get(path) {
+        if (!this.inFlight.has(path)) {
+            const request = this.revalidate(path).finally(() => this.inFlight.delete(path));
+            this.inFlight.set(path, request);
+        }
+        return this.inFlight.get(path);
+    }
+
+    async revalidate(path) {
+        const cached = this.read(path);
+        const headers = cached && cached.etag ? { 'If-None-Match': cached.etag } : {};
+        // no-store: the ETag handling here replaces the browser's HTTP cache
+        const response = await fetch(`${this.baseUrl}${path}`, { headers, cache: 'no-store' });
+        if (response.status === 304 && cached) {
+            return cached.body;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const body = await response.json();
+        this.write(path, response.headers.get('ETag'), body);
+        return body;
+    }
+
+    // Render the stored copy at once (if any), then again only if the server's differs
+    async load(path, render) {
+        const cached = this.read(path);
+        if (cached) {
+            render(cached.body);
+        }
+        let body;
+        try {
+            body = await this.get(path);
+        } catch (error) {
+            if (!cached) throw error;
+            console.warn(`Showing cached ${path}:`, error); // Stale beats an error page
+            return;
+        }
+        if (!cached || JSON.stringify(body) !== JSON.stringify(cached.body)) {
+            render(body);
+        }
+    }
+
+    // Apply a local change to the stored copy; the ETag is dropped so the next get refetches
+    update(path, change) {
+        const cached = this.read(path);
+        const body = change(cached ? cached.body : []);
+        this.write(path, null, body);
+        return body;
+    }
+}
+
 // Presentation Tier - Event Management
 class EventManager {
     constructor() {
         this.eventList = document.querySelector(".event-list");
         this.bookingList = document.querySelector(".booking-list");
+        this.api = new ApiCache(API_BASE_URL);
+        // Bookings made from this page, so their stream echo isn't listed twice
+        this.ownBookings = new Set();
+    }
+
+    // Live updates over /api/stream; EventSource reconnects with Last-Event-ID by itself
+    subscribe() {
+        if (!window.EventSource) return;
+        const stream = new EventSource(`${API_BASE_URL}/stream`);
+        stream.addEventListener('booking.created', message => {
+            const booking = JSON.parse(message.data);
+            const key = `${booking.event_id}|${booking.user_email}`;
+            if (this.ownBookings.delete(key)) return;
+            this.addBooking(booking);
+        });
+        // Give the catalog publisher a moment to write the new snapshot, and spread the refetches
+        stream.addEventListener('event.changed', () => setTimeout(() => this.loadEvents(), 1000 + Math.random() * 2000));
+        // Missed more than the server buffers: revalidate both lists
+        stream.addEventListener('reset', () => {
+            this.loadEvents();
+            this.loadBookings();
+        });
+    }
+
+    addBooking(booking) {
+        this.renderBookings(this.api.update('/bookings', bookings => [booking, ...bookings]));
     }
 
     async loadEvents() {
         try {
-            const response = await fetch(`${API_BASE_URL}/events`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+            const events = await this.loadCatalogSnapshot();
+            if (events) {
+                this.renderEvents(events);
+                return;
             }
-            const events = await response.json();
-            this.renderEvents(events);
+        } catch (error) {
+            console.warn('Catalog snapshot unavailable, asking the API:', error);
+        }
+        try {
+            await this.api.load('/events', events => this.renderEvents(events));
         } catch (error) {
             console.error('Error loading events:', error);
             this.showError('Failed to load events. Please try again later.');
         }
     }
 
+    // The pointer is revalidated on every load; the versioned file it names never
+    // changes, so after the first visit it comes from the browser cache
+    async loadCatalogSnapshot() {
+        if (CATALOG_URL === CATALOG_API_ONLY) return null;
+        const pointer = await fetch(CATALOG_URL, { cache: 'no-cache' });
+        if (!pointer.ok) throw new Error(`HTTP error! status: ${pointer.status}`);
+        const latest = await pointer.json();
+        const snapshot = await fetch(new URL(latest.path, new URL(CATALOG_URL, window.location.href)));
+        if (!snapshot.ok) throw new Error(`HTTP error! status: ${snapshot.status}`);
+        return snapshot.json();
+    }
+
     renderEvents(events) {
         if (!this.eventList) return;
         
@@ -55,40 +201,82 @@ class EventManager {
             return;
         }
 
+        // Registered before the request: the stream's echo can beat the response
+        const key = `${eventId}|${email}`;
+        this.ownBookings.add(key);
         try {
-            const response = await fetch(`${API_BASE_URL}/bookings`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    event_id: eventId,
-                    user_email: email
-                })
-            });
+            let response = await this.postBooking(eventId, email);
+            let result = await response.json();
 
-            const result = await response.json();
+            // Flash on-sales only take bookings from clients the waiting room has admitted
+            if (!response.ok && result.waiting_room) {
+                const token = await this.waitForAdmission(eventId, eventTitle);
+                response = await this.postBooking(eventId, email, token);
+                result = await response.json();
+            }
             
             if (response.ok) {
                 alert(`Success! ${result.message}`);
-                this.loadBookings(); // Refresh bookings
+                // Show the new booking without refetching the whole list
+                this.addBooking({
+                    event_id: eventId,
+                    event_title: result.event_title,
+                    user_email: result.user_email,
+                    timestamp: new Date().toISOString()
+                });
             } else {
+                this.ownBookings.delete(key);
                 alert(`Error: ${result.error || 'Booking failed'}`);
             }
         } catch (error) {
+            this.ownBookings.delete(key);
             console.error('Error booking ticket:', error);
             alert('Booking failed. Please try again later.');
         }
     }
 
-    async loadBookings() {
+    postBooking(eventId, email, queueToken) {
+        const headers = { 'Content-Type': 'application/json' };
+        if (queueToken) headers['X-Queue-Token'] = queueToken;
+        return fetch(`${API_BASE_URL}/bookings`, {
+            method: 'POST',
+            headers,
+            body: JSON.stringify({
+                event_id: eventId,
+                user_email: email
+            })
+        });
+    }
+
+    // Join the event's queue and poll (answered from memory) until it's our turn
+    async waitForAdmission(eventId, eventTitle) {
+        const banner = document.createElement('p');
+        banner.className = 'waiting-room';
+        this.eventList.before(banner);
         try {
-            const response = await fetch(`${API_BASE_URL}/bookings`);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+            const url = `${API_BASE_URL}/waiting-room/${eventId}`;
+            const joined = await fetch(url, { method: 'POST' });
+            let status = await joined.json();
+            if (!joined.ok) throw new Error(status.error || 'Could not join the queue');
+            const token = status.token;
+            while (!status.admitted) {
+                banner.textContent = `You're in the queue for ${eventTitle}: ` +
+                    `${status.position} ahead of you, about ${Math.ceil(status.wait_seconds)}s to go.`;
+                const delay = Math.min(30, Math.max(1, status.wait_seconds / 4));
+                await new Promise(resolve => setTimeout(resolve, delay * 1000));
+                const polled = await fetch(url, { headers: { 'X-Queue-Token': token } });
+                status = await polled.json();
+                if (!polled.ok) throw new Error(status.error || 'Lost our place in the queue');
             }
-            const bookings = await response.json();
-            this.renderBookings(bookings);
+            return token;
+        } finally {
+            banner.remove();
+        }
+    }
+
+    async loadBookings() {
+        try {
+            await this.api.load('/bookings', bookings => this.renderBookings(bookings));
         } catch (error) {
             console.error('Error loading bookings:', error);
             if (this.bookingList) {
@@ -141,5 +329,6 @@ document.addEventListener("DOMContentLoaded", () => {
     eventManager = new EventManager();
     eventManager.loadEvents();
     eventManager.loadBookings();
+    eventManager.subscribe();
 });
 
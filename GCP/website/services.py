@@ -1,48 +1,96 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from datetime import datetime, timezone
 import logging
 import re
-from data_access import EventRepository, BookingRepository
-from models import Event, Booking
+from data_access import (EventRepository, BookingRepository, BOOKING_COLUMNS, EVENT_COLUMNS, EVENT_LIST_FIELDS,
+                         TRANSIENT_ERRORS, QueuePassUsed, database_unavailable, select_list)
+from event_bus import BOOKING_CREATED, EventBus
+from models import Event, Booking, QueuePass, project
+from shared_cache import SharedSnapshot
+from resilience import UnavailableError
+from tracing import traced
+
+logger = logging.getLogger(__name__)
 
 class EventService:
     """Business logic for event management"""
     
-    def __init__(self):
-        self.event_repository = EventRepository()
+    def __init__(self, event_repository: Optional[EventRepository] = None,
+                 catalog_cache: Optional[SharedSnapshot] = None):
+        self.event_repository = event_repository or EventRepository()
+        self.catalog_cache = catalog_cache
+    
+    def _load_all_events(self) -> List[Dict[str, Any]]:
+        events = self.event_repository.get_all_events()
+        return [event.to_dict() for event in events]
     
-    def get_all_events(self) -> List[Dict[str, Any]]:
-        """Get all events with business logic applied"""
+    @traced()
+    def get_all_events(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Get all events with business logic applied
+
+        Served from the cross-worker catalog snapshot when one is configured;
+        otherwise ``fields`` is pushed down into the SQL column list. Either way
+        only the listing's columns can be requested: the snapshot doesn't hold
+        descriptions, which come from get_event_by_id.
+        """
         try:
-            events = self.event_repository.get_all_events()
-            return [event.to_dict() for event in events]
+            if fields is not None:
+                select_list(EVENT_COLUMNS, fields)
+                detail_only = [f for f in fields if f not in EVENT_LIST_FIELDS]
+                if detail_only:
+                    raise ValueError(f"Field(s) only available on a single event: {', '.join(detail_only)}")
+            if self.catalog_cache is not None:
+                events = self.catalog_cache.get(self._load_all_events)
+                return events if fields is None else [project(event, fields) for event in events]
+            if fields is None:
+                return self._load_all_events()
+            return [event.to_dict(fields) for event in self.event_repository.get_all_events(fields)]
+        except ValueError as e:
+            logger.debug("Invalid fields: %s", e)
+            raise
+        except UnavailableError:
+            raise
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
         except Exception as e:
-            logging.error(f"Error retrieving events: {e}")
-            raise Exception("Failed to retrieve events")
+            raise Exception("Failed to retrieve events") from e
     
-    def get_event_by_id(self, event_id: int) -> Optional[Dict[str, Any]]:
-        """Get a specific event by ID"""
+    @traced()
+    def get_event_by_id(self, event_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get a specific event by ID, including its description"""
         try:
             if event_id <= 0:
                 raise ValueError("Event ID must be positive")
             
-            event = self.event_repository.get_event_by_id(event_id)
-            return event.to_dict() if event else None
+            if fields is None:
+                event = self.event_repository.get_event_by_id(event_id)
+            else:
+                event = self.event_repository.get_event_by_id(event_id, fields)
+            return event.to_dict(fields) if event else None
         except ValueError as e:
-            logging.error(f"Invalid event ID: {e}")
+            logger.debug("Invalid event ID: %s", e)
+            raise
+        except UnavailableError:
             raise
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
         except Exception as e:
-            logging.error(f"Error retrieving event {event_id}: {e}")
-            raise Exception("Failed to retrieve event")
+            raise Exception("Failed to retrieve event") from e
 
 class BookingService:
     """Business logic for booking management"""
     
-    def __init__(self):
-        self.booking_repository = BookingRepository()
-        self.event_repository = EventRepository()
+    def __init__(self, booking_repository: Optional[BookingRepository] = None,
+                 event_repository: Optional[EventRepository] = None,
+                 publisher: Optional[EventBus] = None):
+        self.booking_repository = booking_repository or BookingRepository()
+        self.event_repository = event_repository or EventRepository()
+        self.publisher = publisher
     
-    def create_booking(self, event_id: int, user_email: str) -> Dict[str, Any]:
-        """Create a new booking with validation"""
+    @traced()
+    def create_booking(self, event_id: int, user_email: str,
+                       queue_pass: Optional[QueuePass] = None) -> Dict[str, Any]:
+        """Create a new booking with validation, spending ``queue_pass`` when the event has a waiting room"""
         try:
             # Validate input
             if not self._validate_event_id(event_id):
@@ -52,15 +100,23 @@ class BookingService:
                 raise ValueError("Invalid email address")
             
             # Check if event exists
-            event = self.event_repository.get_event_by_id(event_id)
+            event = self.event_repository.get_event_by_id(event_id, ("id", "title"))
             if not event:
                 raise ValueError("Event not found")
             
             # Create booking
-            success = self.booking_repository.create_booking(event_id, user_email)
+            success = self.booking_repository.create_booking(event_id, user_email, queue_pass)
             if not success:
                 raise Exception("Failed to create booking")
             
+            if self.publisher is not None:
+                self.publisher.publish(BOOKING_CREATED, {
+                    "event_id": event_id,
+                    "event_title": event.title,
+                    "user_email": user_email,
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                })
+            
             return {
                 "message": "Booking confirmed",
                 "event_title": event.title,
@@ -68,35 +124,79 @@ class BookingService:
             }
             
         except ValueError as e:
-            logging.error(f"Validation error: {e}")
+            logger.debug("Validation error: %s", e)
             raise
+        except (UnavailableError, QueuePassUsed):
+            raise
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
         except Exception as e:
-            logging.error(f"Error creating booking: {e}")
-            raise Exception("Booking failed")
+            raise Exception("Booking failed") from e
     
-    def get_all_bookings(self) -> List[Dict[str, Any]]:
-        """Get all bookings"""
+    @traced()
+    def get_all_bookings(self, fields: Optional[Sequence[str]] = None,
+                         include_archived: bool = False) -> List[Dict[str, Any]]:
+        """Get all bookings, including archived partitions only when asked"""
         try:
-            bookings = self.booking_repository.get_all_bookings()
-            return [booking.to_dict() for booking in bookings]
+            if fields is None:
+                bookings = self.booking_repository.get_all_bookings(include_archived=include_archived)
+            else:
+                bookings = self.booking_repository.get_all_bookings(fields, include_archived=include_archived)
+            return [booking.to_dict(fields) for booking in bookings]
+        except ValueError as e:
+            logger.debug("Invalid fields: %s", e)
+            raise
+        except UnavailableError:
+            raise
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
         except Exception as e:
-            logging.error(f"Error retrieving bookings: {e}")
-            raise Exception("Failed to retrieve bookings")
+            raise Exception("Failed to retrieve bookings") from e
     
-    def get_user_bookings(self, user_email: str) -> List[Dict[str, Any]]:
-        """Get bookings for a specific user"""
+    @traced()
+    def get_user_bookings(self, user_email: str, fields: Optional[Sequence[str]] = None,
+                          include_archived: bool = False) -> List[Dict[str, Any]]:
+        """Get bookings for a specific user, including archived partitions only when asked"""
         try:
             if not self._validate_email(user_email):
                 raise ValueError("Invalid email address")
             
-            bookings = self.booking_repository.get_bookings_by_email(user_email)
-            return [booking.to_dict() for booking in bookings]
+            if fields is None:
+                bookings = self.booking_repository.get_bookings_by_email(
+                    user_email, include_archived=include_archived)
+            else:
+                bookings = self.booking_repository.get_bookings_by_email(
+                    user_email, fields, include_archived=include_archived)
+            return [booking.to_dict(fields) for booking in bookings]
+        except ValueError as e:
+            logger.debug("Validation error: %s", e)
+            raise
+        except UnavailableError:
+            raise
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
+        except Exception as e:
+            raise Exception("Failed to retrieve user bookings") from e
+    
+    @traced()
+    def get_booking_rows(self, fields: Optional[Sequence[str]] = None, include_archived: bool = False,
+                         user_email: Optional[str] = None) -> Tuple[List[str], List[tuple]]:
+        """Field names and row tuples of a booking listing (all bookings, or one user's), for columnar responses"""
+        try:
+            if user_email is not None and not self._validate_email(user_email):
+                raise ValueError("Invalid email address")
+            fields = list(BOOKING_COLUMNS) if fields is None else list(fields)
+            select_list(BOOKING_COLUMNS, fields)
+            return fields, self.booking_repository.booking_rows(fields, user_email, include_archived)
         except ValueError as e:
-            logging.error(f"Validation error: {e}")
+            logger.debug("Validation error: %s", e)
+            raise
+        except UnavailableError:
             raise
+        except TRANSIENT_ERRORS as e:
+            raise database_unavailable(e) from e
         except Exception as e:
-            logging.error(f"Error retrieving user bookings: {e}")
-            raise Exception("Failed to retrieve user bookings")
+            raise Exception("Failed to retrieve bookings") from e
     
     def _validate_event_id(self, event_id: int) -> bool:
         """Validate event ID"""
@@ -0,0 +1,207 @@
+"""
+Cross-worker shared-memory cache
+Holds a versioned, serialized snapshot (e.g. the events catalog) in an mmap'd
+file so every worker process on a host reads the same copy and only one of
+them refreshes it from the database.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# magic, sequence, version, active slot, length of slot 0, length of slot 1, refreshed_at
+_HEADER = struct.Struct("<4s4xQQQQQd")
+_MAGIC = b"LMS2"
+# The sequence counter is odd while a writer is rewriting the header (a seqlock)
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 8
+# Header reads that find a writer mid-update before giving up on the snapshot
+_HEADER_READ_ATTEMPTS = 10000
+
+def default_segment_path(name: str) -> str:
+    """Place segments in /dev/shm (RAM-backed) when available"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"lookmyshow-{name}")
+
+class SharedSnapshot:
+    """A double-buffered snapshot in a shared-memory segment
+
+    The writer serializes into the inactive slot and then flips the header,
+    so readers never block: they check the version in the header and only
+    decode the slot when it changed since their last read. The header is
+    guarded by a sequence counter: writers make it odd before rewriting the
+    header and even after, and readers retry while it is odd or changed
+    under them, so they never act on a half-written header. Refreshes are
+    serialized across processes with an flock on a sidecar lock file, so
+    only one process hits the database per expiry; header writes take a
+    POSIX record lock on the same file (independent of the flock on Linux).
+    """
+
+    def __init__(self, path: str, ttl: float = 30.0, slot_size: int = 4 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.slot_size = slot_size
+        self.refreshes = 0
+        self._local_version = 0
+        self._local_value: Any = None
+        self._thread_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        size = _HEADER.size + 2 * slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _header(self):
+        """(version, active slot, its length, refreshed_at), all from the same header write"""
+        for attempt in range(_HEADER_READ_ATTEMPTS):
+            if self._mm[:4] != _MAGIC:
+                return 0, 0, 0, 0.0
+            before = _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0]
+            if before % 2 == 0:
+                _, _, version, active, len0, len1, refreshed_at = _HEADER.unpack_from(self._mm, 0)
+                if _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0] == before:
+                    return version, active, (len0, len1)[active], refreshed_at
+            if attempt % 100 == 99:
+                time.sleep(0)
+        # A writer died mid-update: treat the segment as empty so the next get() republishes
+        logger.warning("Snapshot header in %s stayed locked; ignoring it", self.path)
+        return 0, 0, 0, 0.0
+
+    @contextmanager
+    def _writer(self):
+        """Serialize writers across threads and processes (a POSIX lock, separate from the refresh flock)"""
+        with self._write_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN)
+
+    def _current(self):
+        """Header fields after the magic and sequence, or None for an empty segment (hold _writer)"""
+        magic, _, *fields = _HEADER.unpack_from(self._mm, 0)
+        return fields if magic == _MAGIC else None
+
+    def _write_header(self, version: int, active: int, len0: int, len1: int, refreshed_at: float):
+        """Rewrite the header inside an odd sequence number (hold _writer)"""
+        seq = _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0] if self._mm[:4] == _MAGIC else 0
+        # Already odd if a previous writer died mid-update
+        seq |= 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, seq)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, seq, version, active, len0, len1, refreshed_at)
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, seq + 1)
+
+    @property
+    def version(self) -> int:
+        return self._header()[0]
+
+    def _slot_offset(self, slot: int) -> int:
+        return _HEADER.size + slot * self.slot_size
+
+    def _copy(self, slot: int, length: int) -> bytes:
+        offset = self._slot_offset(slot)
+        return self._mm[offset:offset + length]
+
+    def read(self) -> Optional[Any]:
+        """Return the current snapshot, decoding it only if its version changed"""
+        while True:
+            version, active, length, _ = self._header()
+            if version == 0:
+                return None
+            if version == self._local_version:
+                return self._local_value
+            payload = self._copy(active, length)
+            # Any publish during the copy may have been the second of two that reused this slot
+            if self._header()[0] == version:
+                break
+        with self._thread_lock:
+            if version > self._local_version:
+                self._local_value = json.loads(payload)
+                self._local_version = version
+            return self._local_value
+
+    def publish(self, value: Any) -> int:
+        """Serialize ``value`` into the inactive slot and make it current"""
+        payload = json.dumps(value, separators=(",", ":")).encode()
+        if len(payload) > self.slot_size:
+            raise ValueError(f"Snapshot of {len(payload)} bytes exceeds slot size {self.slot_size}")
+        with self._writer():
+            version, active, len0, len1, _ = self._current() or (0, 1, 0, 0, 0.0)
+            slot = 1 - active
+            offset = self._slot_offset(slot)
+            # Readers only look at the active slot, so the payload is written outside the odd window
+            self._mm[offset:offset + len(payload)] = payload
+            lengths = (len(payload), len1) if slot == 0 else (len0, len(payload))
+            self._write_header(version + 1, slot, lengths[0], lengths[1], time.time())
+        self.refreshes += 1
+        return version + 1
+
+    def invalidate(self):
+        """Mark the snapshot stale so the next reader refreshes it"""
+        with self._writer():
+            current = self._current()
+            if current is not None:
+                self._write_header(*current[:4], 0.0)
+
+    def _is_fresh(self) -> bool:
+        version, _, _, refreshed_at = self._header()
+        return version > 0 and time.time() - refreshed_at < self.ttl
+
+    def get(self, loader: Callable[[], Any]) -> Any:
+        """Return the snapshot, refreshing it with ``loader`` when it has expired
+
+        If another process is already refreshing, a stale snapshot is served
+        instead of waiting; only a process with no snapshot at all waits.
+        """
+        if self._is_fresh():
+            return self.read()
+        have_stale = self.version > 0
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | (fcntl.LOCK_NB if have_stale else 0))
+        except BlockingIOError:
+            return self.read()
+        try:
+            if not self._is_fresh():
+                try:
+                    self.publish(loader())
+                except ValueError as e:
+                    logger.warning("Not caching snapshot in %s: %s", self.path, e)
+                    return loader()
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        return self.read()
+
+    def stats(self) -> dict:
+        version, _, length, refreshed_at = self._header()
+        return {
+            "version": version,
+            "bytes": length,
+            "age_s": round(time.time() - refreshed_at, 3) if version else None,
+            "refreshes_by_this_process": self.refreshes,
+        }
+
+    def close(self):
+        self._mm.close()
+        os.close(self._lock_fd)
+
+def catalog_segment_name(host: str, database: str) -> str:
+    """Segment name unique to one database, so separate deployments on a host don't collide"""
+    digest = hashlib.sha1(f"{host}/{database}".encode()).hexdigest()[:12]
+    return f"events-catalog-{digest}"
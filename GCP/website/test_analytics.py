@@ -0,0 +1,105 @@
+"""
+Tests for the vectorized booking analytics
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+import pytest
+import analytics
+from analytics import DAY, DistinctSketch, demand_report, email_hashes
+from app import ADMIN_TOKEN_HEADER
+from data_access import BookingRepository, EventRepository
+from local_db import LocalDatabase
+from perf_gate import seed_bookings
+
+NOW = datetime(2025, 1, 1).timestamp() - datetime(1970, 1, 1).timestamp()  # naive UTC
+
+@pytest.fixture
+def database(tmp_path):
+    database = LocalDatabase(str(tmp_path / "lookmyshow.db"))
+    seed_bookings(database.path, 5000, users=700, seed=7)
+    return database
+
+def _rows(db):
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT b.event_id, b.timestamp, b.user_email FROM bookings b")
+        bookings = cursor.fetchall()
+        cursor.execute("SELECT id, date FROM events")
+        return bookings, dict(cursor.fetchall())
+
+def _report(db, **kwargs):
+    return demand_report(BookingRepository(db), EventRepository(db), now=NOW, **kwargs)
+
+def test_vectorized_report_matches_a_row_by_row_count(db):
+    report = _report(db, days=60, bin_seconds=6 * 3600, horizon_days=30, utc_offset_minutes=330, chunk_size=700)
+    bookings, event_dates = _rows(db)
+    end = datetime(2025, 1, 1, 0, 0, 1)
+    start = end - timedelta(days=60)
+    recent = [b for b in bookings if start <= b[1] < end]
+
+    assert report["bookings"] == len(recent) and report["skipped"] == 0
+    velocity = Counter(int((ts - start).total_seconds()) // (6 * 3600) for _, ts, _ in recent)
+    assert report["velocity"]["counts"] == [velocity[i] for i in range(len(report["velocity"]["counts"]))]
+    heatmap = Counter(((ts + timedelta(minutes=330)).weekday(), (ts + timedelta(minutes=330)).hour)
+                      for _, ts, _ in recent)
+    assert report["heatmap"]["counts"] == [[heatmap[(d, h)] for h in range(24)] for d in range(7)]
+
+    for event in report["fill_curves"]["events"]:
+        mine = [ts for event_id, ts, _ in recent if event_id == event["event_id"]]
+        ahead = [(datetime.fromisoformat(event_dates[event["event_id"]]) - ts.replace(hour=0, minute=0,
+                                                                                    second=0)).days
+                 for ts in mine]
+        assert event["bookings"] == len(mine)
+        assert event["fill_curve"][0] == 1.0
+        assert event["fill_curve"][7] == round(sum(a >= 7 for a in ahead) / len(mine), 4)
+        # Fewer than the sketch size: distinct buyers are exact
+        assert event["buyers"] == len({email for event_id, _, email in recent if event_id == event["event_id"]})
+
+def test_results_do_not_depend_on_the_chunk_size(db):
+    whole = _report(db, days=None, chunk_size=100000)
+    for chunk_size in (1, 333, 4999):
+        report = _report(db, days=None, chunk_size=chunk_size)
+        assert report["chunks"] == -(-5000 // chunk_size)
+        for key in ("bookings", "buyers", "velocity", "heatmap", "fill_curves"):
+            assert report[key] == whole[key]
+    bookings, _ = _rows(db)
+    assert whole["bookings"] == 5000 and whole["buyers"] == len({email for _, _, email in bookings})
+
+def test_distinct_sketch_estimates_large_counts():
+    sketch = DistinctSketch(k=1024)
+    hashes = email_hashes([f"user{i}@lookmyshow.com" for i in range(200000)])
+    for lo in range(0, len(hashes), 30000):
+        sketch.add(hashes[lo:lo + 30000])
+    sketch.add(email_hashes(["USER1@LookMyShow.com"]))
+    assert abs(sketch.estimate() - 200000) / 200000 < 0.1
+
+@pytest.fixture
+def admin(make_app):
+    return make_app(admin_token="s3cret").test_client()
+
+def test_admin_endpoint_needs_the_token(client, admin):
+    assert client.get("/api/admin/analytics").status_code == 404
+    assert admin.get("/api/admin/analytics").status_code == 403
+    assert admin.get("/api/admin/analytics", headers={ADMIN_TOKEN_HEADER: "wrong"}).status_code == 403
+    bad = admin.get("/api/admin/analytics?bin_minutes=0", headers={ADMIN_TOKEN_HEADER: "s3cret"})
+    assert bad.status_code == 400
+
+    response = admin.get("/api/admin/analytics?days=0&bin_minutes=1440",
+                         headers={ADMIN_TOKEN_HEADER: "s3cret"})
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["bookings"] == 5000 and report["window"]["bin_seconds"] == DAY
+    assert sum(map(sum, report["heatmap"]["counts"])) == 5000
+    assert {e["title"] for e in report["fill_curves"]["events"]} >= {"Coldplay Concert"}
+
+def test_admin_endpoint_maps_deadlines_and_failures(admin, monkeypatch):
+    headers = {ADMIN_TOKEN_HEADER: "s3cret"}
+    expired = admin.get("/api/admin/analytics", headers=dict(headers, **{"X-Request-Timeout-Ms": "0"}))
+    assert expired.status_code == 504 and expired.get_json() == {"error": "Request deadline exceeded"}
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(analytics, "demand_report", broken)
+    failed = admin.get("/api/admin/analytics", headers=headers)
+    assert failed.status_code == 500 and "boom" not in failed.get_data(as_text=True)
@@ -0,0 +1,53 @@
+"""
+API tests against the SQLite stand-in database
+"""
+
+def test_event_detail_includes_description(client):
+    event = client.get("/api/events/1").get_json()
+    assert event["description"] == "Experience the magic of Coldplay live in concert"
+
+def test_event_list_sparse_fieldset(client):
+    events = client.get("/api/events?fields=id,title,date").get_json()
+    assert len(events) == 5
+    assert all(set(e) == {"id", "title", "date"} for e in events)
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/api/events?fields=id,secret")
+    assert response.status_code == 400
+    assert "secret" in response.get_json()["error"]
+
+def test_event_list_rejects_detail_only_fields(client):
+    response = client.get("/api/events?fields=id,description")
+    assert response.status_code == 400
+    assert "description" in response.get_json()["error"]
+
+def test_booking_listings_sparse_fieldset(client):
+    assert client.post("/api/bookings", json={"event_id": 2, "user_email": "fan@lookmyshow.com"}).status_code == 201
+
+    bookings = client.get("/api/bookings?fields=id,user_email").get_json()
+    assert bookings == [{"id": 1, "user_email": "fan@lookmyshow.com"}]
+
+    mine = client.get("/api/bookings/user/fan@lookmyshow.com?fields=event_title").get_json()
+    assert mine == [{"event_title": "Comedy Night"}]
+
+def test_default_representation_is_unchanged(client):
+    client.post("/api/bookings", json={"event_id": 1, "user_email": "fan@lookmyshow.com"})
+    booking = client.get("/api/bookings").get_json()[0]
+    assert set(booking) == {"id", "event_id", "user_email", "timestamp", "event_title"}
+    event = client.get("/api/events").get_json()[0]
+    assert set(event) == {"id", "title", "date", "location", "description"}
+
+def test_listings_revalidate_with_etag(client):
+    first = client.get("/api/events")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    unchanged = client.get("/api/events", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b""
+
+    before = client.get("/api/bookings").headers["ETag"]
+    client.post("/api/bookings", json={"event_id": 1, "user_email": "fan@lookmyshow.com"})
+    changed = client.get("/api/bookings", headers={"If-None-Match": before})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != before
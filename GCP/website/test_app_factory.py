@@ -0,0 +1,47 @@
+"""
+Tests for the application factory and its lazily built services
+"""
+
+import threading
+from app import ServiceContainer, create_app
+from config import AppConfig, DatabaseConfig
+
+def _config(**overrides) -> AppConfig:
+    # Nothing listens here: any attempt to connect would fail the test
+    database = DatabaseConfig(host="127.0.0.1", port=9, user="app", password="", database="eventsdb")
+    return AppConfig(database=database, warm_connections=False, **overrides)
+
+def test_create_app_builds_nothing_until_first_use():
+    app = create_app(_config())
+    container = app.extensions["lookmyshow"]
+    assert isinstance(container, ServiceContainer)
+    assert (container._db, container._event_service, container._booking_service) == (None, None, None)
+    assert container.shards is None
+
+def test_services_are_built_once_and_share_one_connection_manager():
+    container = ServiceContainer(_config(db_pool_size=3))
+    events = container.event_service
+    bookings = container.booking_service
+    assert container.event_service is events and container.booking_service is bookings
+    assert events.event_repository.db is container.db is bookings.booking_repository.db
+    assert bookings.event_repository.db is container.db and container.db.pool_size == 3
+    # Building the services opened no connections
+    assert container.db.queries == 0 and container.db.pool_stats.totals()["opened"] == 0
+
+def test_concurrent_first_use_builds_a_single_instance():
+    shard = DatabaseConfig(host="127.0.0.1", port=9, user="app", password="", database="shard0")
+    container = ServiceContainer(_config(booking_shards=[shard]))
+    barrier = threading.Barrier(8)
+    built = []
+
+    def first_request():
+        barrier.wait()
+        built.append((container.booking_service, container.event_service))
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(built) == 8 and len(set(built)) == 1
+    assert built[0][0].booking_repository.shards == container.shards
+    assert [s.config.database for s in container.shards] == ["shard0"]
@@ -0,0 +1,75 @@
+"""
+Tests for the static asset build (minify, fingerprint, precompress)
+"""
+
+import gzip
+import shutil
+import subprocess
+from pathlib import Path
+import pytest
+from build_assets import app_engine_handlers, build, minify_css, minify_js
+
+HERE = Path(__file__).resolve().parent
+
+@pytest.fixture
+def built(tmp_path):
+    out = tmp_path / "build"
+    return out, build(HERE, out)
+
+def test_assets_are_fingerprinted_and_referenced(built):
+    out, manifest = built
+    html = (out / "index.html").read_text()
+    for name, served in manifest.items():
+        assert served.startswith("static/") and served != f"static/{name}"
+        assert f'="/{served}"' in html
+        assert gzip.decompress((out / f"{served}.gz").read_bytes()) == (out / served).read_bytes()
+    assert 'href="#events"' in html
+
+def test_build_is_reproducible_and_content_addressed(tmp_path, built):
+    _, first = built
+    assert build(HERE, tmp_path / "again") == first
+    for source in ("index.html", "script.js", "styles.css"):
+        shutil.copy(HERE / source, tmp_path / source)
+    with open(tmp_path / "styles.css", "a") as f:
+        f.write("\n.new { color: red; }\n")
+    changed = build(tmp_path, tmp_path / "changed")
+    assert changed["styles.css"] != first["styles.css"]
+    assert changed["script.js"] == first["script.js"]
+
+def test_defines_are_applied_before_hashing(tmp_path, built):
+    _, plain = built
+    manifest = build(HERE, tmp_path / "defined", {"/api": "/v2/api"})
+    assert manifest["script.js"] != plain["script.js"]
+    assert "/v2/api" in (tmp_path / "defined" / manifest["script.js"]).read_text()
+
+def test_catalog_snapshot_is_switched_off_with_its_sentinel(tmp_path):
+    manifest = build(HERE, tmp_path / "api-only", {"/catalog/latest.json": "api-only"})
+    script = (tmp_path / "api-only" / manifest["script.js"]).read_text()
+    assert "/catalog/latest.json" not in script
+    assert "CATALOG_URL = window.location.hostname === 'localhost' ? CATALOG_API_ONLY : 'api-only'" in script
+
+def test_minify_css_keeps_selector_semantics():
+    css = "/* header */\na :hover , b > c {\n  color: red;\n  margin: 0 auto;\n}\n"
+    assert minify_css(css) == "a :hover,b>c{color:red;margin:0 auto}"
+
+def test_minify_js_keeps_strings_regexes_and_templates():
+    js = """// config
+const re = /^[^\\s@]+@[^\\s@]+\\.[^\\s@]+$/;  // email
+const url = "http://example.com/api"; /* block */
+const html = `
+    <p>${a / b}</p>
+`;
+"""
+    minified = minify_js(js)
+    assert "/^[^\\s@]+@[^\\s@]+\\.[^\\s@]+$/;" in minified
+    assert '"http://example.com/api"' in minified
+    assert "`\n    <p>${a / b}</p>\n`" in minified
+    assert "config" not in minified and "block" not in minified
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+def test_minified_script_is_valid_javascript(built):
+    out, manifest = built
+    subprocess.run(["node", "--check", str(out / manifest["script.js"])], check=True)
+
+def test_app_yaml_uses_generated_cache_rules():
+    assert app_engine_handlers() in (HERE / "app.yaml").read_text()
@@ -0,0 +1,73 @@
+"""
+Tests for the static events catalog publisher
+"""
+
+import json
+import os
+import threading
+import time
+from catalog_publisher import POINTER, CatalogPublisher, DirectoryTarget
+from data_access import EventRepository
+from event_bus import EVENT_CHANGED, FileFanout
+from services import EventService
+
+def _publisher(db, directory, keep: int = 5) -> CatalogPublisher:
+    return CatalogPublisher(EventService(EventRepository(db)), DirectoryTarget(str(directory)), keep)
+
+def _retitle(db, event_id: int, title: str):
+    with db.get_connection() as conn:
+        conn.cursor().execute("UPDATE events SET title = %s WHERE id = %s", (title, event_id))
+        conn.commit()
+
+def _read(directory, name: str):
+    with open(os.path.join(directory, name)) as f:
+        return json.load(f)
+
+def test_snapshot_matches_the_api(db, client, tmp_path):
+    out = tmp_path / "catalog"
+    version = _publisher(db, out).publish()
+
+    pointer = _read(out, POINTER)
+    assert pointer["version"] == version and pointer["path"] == f"events.{version}.json"
+    assert pointer["count"] == 5 and pointer["previous"] == []
+    assert _read(out, pointer["path"]) == client.get("/api/events").get_json()
+    # Written atomically (no temporary files left) and readable by the web server
+    assert sorted(os.listdir(out)) == sorted([POINTER, pointer["path"]])
+    assert os.stat(out / POINTER).st_mode & 0o044 == 0o044
+
+def test_only_changes_are_published_and_old_versions_are_pruned(db, tmp_path):
+    out = tmp_path / "catalog"
+    publisher = _publisher(db, out, keep=3)
+    first = publisher.publish()
+    assert publisher.publish() is None
+
+    versions = [first]
+    for i in range(4):
+        _retitle(db, 1, f"Coldplay Concert ({i + 2})")
+        versions.append(publisher.publish())
+    pointer = _read(out, POINTER)
+    assert pointer["version"] == versions[-1] and pointer["previous"] == versions[-2:-4:-1]
+    assert sorted(n for n in os.listdir(out) if n != POINTER) == sorted(f"events.{v}.json" for v in versions[-3:])
+    assert _read(out, pointer["path"])[0]["title"] == "Coldplay Concert (5)"
+
+def test_watch_republishes_on_event_changed(db, tmp_path):
+    out = tmp_path / "catalog"
+    fanout_path = str(tmp_path / "events.log")
+    publisher, stop = _publisher(db, out), threading.Event()
+    worker = threading.Thread(target=publisher.run,
+                              kwargs={"fanout": FileFanout(fanout_path, poll_interval=0.02), "stop": stop})
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not os.path.exists(out / POINTER) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        first = _read(out, POINTER)["version"]
+
+        _retitle(db, 2, "Ed Sheeran Live (extra show)")
+        FileFanout(fanout_path).publish(EVENT_CHANGED, {"event_id": 2})
+        while _read(out, POINTER)["version"] == first and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+        worker.join()
+    assert _read(out, POINTER)["previous"] == [first]
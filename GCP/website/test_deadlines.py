@@ -0,0 +1,83 @@
+"""
+Tests for request deadlines and their propagation to statement timeouts
+The SQLite stand-in honours the MAX_EXECUTION_TIME hint the way MySQL does.
+"""
+
+import time
+import mysql.connector
+import pytest
+import deadlines
+from config import parse_route_deadlines
+from data_access import EventRepository
+from deadlines import DeadlineExceeded
+
+# Counts forever; only a statement timeout stops it
+ENDLESS = ("SELECT (WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) "
+           "SELECT COUNT(*) FROM n)")
+
+def test_select_gets_remaining_time_as_max_execution_time(database):
+    statements = []
+    db = database.connection_manager()
+    with deadlines.deadline(2.0), db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor._cursor.execute = lambda operation, *args: statements.append(operation)
+        cursor.execute("SELECT id FROM events")
+        cursor.execute("INSERT INTO events (title) VALUES (%s)", ("x",))
+
+    hint = statements[0].split("MAX_EXECUTION_TIME(")[1].split(")")[0]
+    assert 1500 < int(hint) <= 2000
+    assert "MAX_EXECUTION_TIME" not in statements[1]
+
+def test_expired_deadline_fails_before_taking_a_connection(database):
+    opened = []
+    db = database.connection_manager()
+    db._connect = lambda **kw: opened.append(1)
+    with deadlines.deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            EventRepository(db).get_all_events()
+    assert opened == []
+
+def test_slow_statement_is_cancelled_at_the_deadline(database):
+    db = database.connection_manager()
+    started = time.monotonic()
+    with deadlines.deadline(0.2), db.get_connection() as conn:
+        with pytest.raises(DeadlineExceeded):
+            conn.cursor().execute(ENDLESS)
+    assert time.monotonic() - started < 1.0
+
+@pytest.mark.parametrize("error", [TimeoutError("timed out"),
+                                   mysql.connector.errors.OperationalError(msg="Lost connection", errno=2013)])
+def test_connection_whose_socket_timed_out_is_not_reused(database, error):
+    db = database.connection_manager(pool_size=1)
+    EventRepository(db).get_event_by_id(1)
+
+    def time_out(operation, *args):
+        time.sleep(0.06)
+        raise error
+    with pytest.raises(DeadlineExceeded):
+        with deadlines.deadline(0.05), db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor._cursor.execute = time_out
+            cursor.execute("SELECT id FROM events")
+    assert not conn.raw.is_connected()
+
+    # The next request opens a fresh session instead of reading the abandoned reply
+    assert EventRepository(db).get_event_by_id(1).title == "Coldplay Concert"
+    assert db.pool_stats.totals()["opened"] == 2
+
+def test_nested_deadline_never_extends_the_outer_one():
+    with deadlines.deadline(0.5):
+        with deadlines.deadline(60):
+            assert deadlines.remaining() <= 0.5
+    assert deadlines.remaining() is None
+
+def test_client_timeout_header_maps_to_504(client):
+    response = client.get("/api/events", headers={"X-Request-Timeout-Ms": "0"})
+    assert response.status_code == 504
+    assert response.get_json() == {"error": "Request deadline exceeded"}
+    assert client.get("/api/events").status_code == 200
+
+def test_route_deadlines_apply_per_endpoint(make_app):
+    client = make_app(route_deadlines=parse_route_deadlines("api.get_events=0, api.get_event=5")).test_client()
+    assert client.get("/api/events").status_code == 504
+    assert client.get("/api/events/1").status_code == 200
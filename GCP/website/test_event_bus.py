@@ -0,0 +1,114 @@
+"""
+Tests for the server-sent events feed and its pub/sub
+"""
+
+import pytest
+from event_bus import BOOKING_CREATED, RESET, EventBus, FileFanout
+
+def test_replays_missed_notifications_from_last_event_id():
+    bus = EventBus(buffer_size=10)
+    for i in range(5):
+        bus.publish(BOOKING_CREATED, {"n": i})
+
+    subscription = bus.subscribe(last_event_id=3)
+    assert [subscription.get(0).id for _ in range(2)] == [4, 5]
+    assert subscription.get(0) is None
+
+def test_resets_a_client_that_missed_more_than_the_buffer():
+    bus = EventBus(buffer_size=3)
+    for i in range(10):
+        bus.publish(BOOKING_CREATED, {"n": i})
+
+    assert bus.subscribe(last_event_id=2).get(0).topic == RESET
+    assert bus.subscribe(last_event_id=7).get(0).id == 8
+
+def test_slow_client_is_disconnected_without_blocking_others():
+    bus = EventBus(client_queue=2)
+    slow, fast = bus.subscribe(), bus.subscribe()
+    for i in range(3):
+        bus.publish(BOOKING_CREATED, {"n": i})
+        fast.get(0)
+
+    assert bus.stats()["clients"] == 1
+    assert bus.stats()["slow_clients_disconnected"] == 1
+    # What it had queued is still delivered before the stream ends
+    chunks = list(bus.stream(slow, heartbeat=0.01))
+    assert [chunk.split("\n")[0] for chunk in chunks[1:]] == ["id: 1", "id: 2"]
+
+def test_stream_sends_heartbeats_and_ends_after_max_seconds():
+    bus = EventBus()
+    chunks = list(bus.stream(bus.subscribe(), heartbeat=0.01, max_seconds=0.05))
+    assert chunks[0].startswith("retry:")
+    assert ": keep-alive\n\n" in chunks
+    assert bus.stats()["clients"] == 0
+
+def test_file_fanout_reaches_every_worker_with_the_same_ids(tmp_path):
+    path = str(tmp_path / "events")
+    workers = [EventBus(fanout=FileFanout(path, poll_interval=0.01)) for _ in range(2)]
+    subscriptions = [bus.subscribe() for bus in workers]
+
+    workers[0].publish(BOOKING_CREATED, {"event_id": 1})
+    workers[1].publish(BOOKING_CREATED, {"event_id": 2})
+
+    for subscription in subscriptions:
+        received = [subscription.get(2) for _ in range(2)]
+        assert [(n.id, n.data["event_id"]) for n in received] == [(1, 1), (2, 2)]
+    for bus in workers:
+        bus.fanout.stop()
+
+def test_rotated_fanout_log_loses_no_lines(tmp_path):
+    path = str(tmp_path / "events")
+    bus = EventBus(fanout=FileFanout(path, poll_interval=3600, max_bytes=200))
+    subscription = bus.subscribe()
+    for i in range(6):
+        # Each line is ~70 bytes, so the log rotates once while the tailer is idle
+        bus.fanout.publish(BOOKING_CREATED, {"event_id": i})
+    bus.fanout.poll()
+
+    received = [subscription.get(0) for _ in range(6)]
+    assert [(n.id, n.data["event_id"]) for n in received] == [(i + 1, i) for i in range(6)]
+    assert subscription.get(0) is None
+    bus.fanout.stop()
+
+def test_ids_lost_between_reads_reset_the_clients(tmp_path):
+    path = str(tmp_path / "events")
+    bus = EventBus(fanout=FileFanout(path, poll_interval=3600, max_bytes=200))
+    subscription = bus.subscribe()
+    bus.fanout.publish(BOOKING_CREATED, {"event_id": 0})
+    bus.fanout.poll()
+    # Two rotations before the next read: the middle file is gone
+    for i in range(1, 12):
+        bus.fanout.publish(BOOKING_CREATED, {"event_id": i})
+    bus.fanout.poll()
+
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.get(0))
+    # The tailer finishes the file it had open, then finds ids missing before the current one
+    reset = next(i for i, n in enumerate(received) if n.topic == RESET)
+    assert [n.id for n in received[:reset]] == list(range(1, reset + 1))
+    assert received[reset].id == received[reset + 1].id - 1 > reset
+    assert [n.id for n in received[reset + 1:]][-1] == 12
+    # Reconnecting from before the gap refetches instead of replaying a partial history
+    assert bus.subscribe(last_event_id=1).get(0).topic == RESET
+    bus.fanout.stop()
+
+@pytest.fixture
+def app(make_app):
+    return make_app(stream_heartbeat_seconds=0.01, stream_max_seconds=0.2)
+
+def test_booking_is_pushed_to_stream_clients(app):
+    client = app.test_client()
+    client.post("/api/bookings", json={"event_id": 2, "user_email": "fan@lookmyshow.com"})
+
+    response = client.get("/api/stream", headers={"Last-Event-ID": "0"})
+    assert response.mimetype == "text/event-stream"
+    body = response.get_data(as_text=True)
+    assert "id: 1\nevent: booking.created\n" in body
+    assert '"event_title": "Comedy Night"' in body
+
+def test_stream_refuses_clients_over_the_limit(app):
+    app.extensions["lookmyshow"].events.max_clients = 0
+    response = app.test_client().get("/api/stream")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
@@ -0,0 +1,85 @@
+"""
+Tests for the columnar and MessagePack booking listings
+"""
+
+from datetime import datetime, timezone
+import pytest
+import listing_formats
+from data_access import BookingRepository
+from local_db import LocalDatabase
+
+COLUMNAR = {"Accept": listing_formats.COLUMNAR_JSON}
+
+def _epoch(iso: str) -> int:
+    return int(datetime.fromisoformat(iso).replace(tzinfo=timezone.utc).timestamp())
+
+def _book(db, email: str, timestamp: str, event_id: int = 1):
+    with db.get_connection() as conn:
+        conn.cursor().execute("INSERT INTO bookings (event_id, user_email, timestamp) VALUES (%s, %s, %s)",
+                              (event_id, email, timestamp))
+        conn.commit()
+
+@pytest.fixture
+def client(db, make_app):
+    for i, email in enumerate(["ann@lookmyshow.com", "bob@lookmyshow.com", "ann@lookmyshow.com"]):
+        _book(db, email, f"2025-01-0{i + 1} 10:00:00", event_id=i + 1)
+    return make_app().test_client()
+
+def test_columnar_listing_matches_the_row_json(client):
+    rows = client.get("/api/bookings").get_json()
+    response = client.get("/api/bookings", headers=COLUMNAR)
+    assert response.mimetype == listing_formats.COLUMNAR_JSON
+    assert "Accept" in response.headers["Vary"]
+
+    document = response.get_json(force=True)
+    assert document["count"] == 3
+    assert document["fields"] == ["id", "event_id", "user_email", "timestamp", "event_title"]
+    assert document["columns"]["event_id"] == [3, 2, 1]
+    records = listing_formats.to_records(document)
+    assert records == [dict(row, timestamp=_epoch(row["timestamp"])) for row in rows]
+    assert len(response.data) < len(client.get("/api/bookings").data)
+
+def test_columnar_user_listing_with_fields_and_format_parameter(client):
+    response = client.get("/api/bookings/user/ann@lookmyshow.com?fields=id,timestamp&format=columnar")
+    assert response.get_json(force=True) == {
+        "count": 2, "fields": ["id", "timestamp"],
+        "columns": {"id": [3, 1], "timestamp": [_epoch("2025-01-03T10:00:00"), _epoch("2025-01-01T10:00:00")]}}
+
+    assert client.get("/api/bookings/user/not-an-email", headers=COLUMNAR).status_code == 400
+    assert client.get("/api/bookings?fields=secret", headers=COLUMNAR).status_code == 400
+
+def test_plain_json_stays_the_default(client):
+    for headers in ({}, {"Accept": "*/*"}, {"Accept": "text/html,application/xhtml+xml,*/*;q=0.8"}):
+        response = client.get("/api/bookings", headers=headers)
+        assert response.mimetype == "application/json"
+        assert isinstance(response.get_json(), list)
+
+def test_columnar_listing_revalidates_with_its_own_etag(client):
+    etag = client.get("/api/bookings", headers=COLUMNAR).headers["ETag"]
+    assert etag != client.get("/api/bookings").headers["ETag"]
+    assert client.get("/api/bookings", headers=dict(COLUMNAR, **{"If-None-Match": etag})).status_code == 304
+
+def test_msgpack_listing(client):
+    pytest.importorskip("msgpack")
+    response = client.get("/api/bookings", headers={"Accept": listing_formats.MSGPACK})
+    assert response.mimetype == listing_formats.MSGPACK
+    document = listing_formats.decode(response.data, listing_formats.MSGPACK)
+    assert document == client.get("/api/bookings", headers=COLUMNAR).get_json(force=True)
+
+def test_msgpack_is_not_acceptable_without_the_package(client, monkeypatch):
+    monkeypatch.setattr(listing_formats, "msgpack", None)
+    response = client.get("/api/bookings", headers={"Accept": listing_formats.MSGPACK})
+    assert response.status_code == 406
+    assert listing_formats.MSGPACK not in response.get_json()["available"]
+    assert client.get("/api/bookings?format=msgpack").status_code == 406
+
+def test_sharded_rows_are_merged_newest_first(tmp_path):
+    shards = [LocalDatabase(str(tmp_path / f"shard{i}.db")).connection_manager(pool_size=2) for i in range(3)]
+    repository = BookingRepository(shards=shards)
+    for day in range(1, 10):
+        email = f"fan{day}@lookmyshow.com"
+        _book(repository.shard_for(email), email, f"2025-01-0{day} 10:00:00")
+
+    rows = repository.booking_rows(("user_email",))
+    assert rows == [(f"fan{day}@lookmyshow.com",) for day in range(9, 0, -1)]
+    assert repository.booking_rows(("user_email", "event_id"), "fan4@lookmyshow.com") == [("fan4@lookmyshow.com", 1)]
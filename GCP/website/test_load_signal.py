@@ -0,0 +1,103 @@
+"""
+Tests for the autoscaling load signal
+"""
+
+import threading
+import time
+from data_access import DatabaseConnection, PoolStats
+from load_signal import REQUEST_START_HEADER, LoadMonitor, prometheus_text, queue_seconds
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakePool:
+    def __init__(self, clock, pool_size: int = 4):
+        self.pool_size = pool_size
+        self.pool_stats = PoolStats(clock)
+
+def test_signal_is_the_most_saturated_part_over_the_window():
+    clock = FakeClock()
+    pool = FakePool(clock)
+    monitor = LoadMonitor(lambda: [pool], target_concurrency=8, target_pool_wait_ms=50, target_queue_ms=100,
+                          window_seconds=10, clock=clock)
+    for _ in range(4):
+        monitor.started(queued=0.02)
+    pool.pool_stats.acquired(0.01)
+    pool.pool_stats.acquired(0.01)
+    clock.now += 10
+    snapshot = monitor.snapshot()
+    # 4 of 8 requests, 2 of 4 connections, 10 of 50ms pool wait, 20 of 100ms queued
+    assert snapshot["parts"] == {"concurrency": 0.5, "pool": 0.5, "pool_wait": 0.2, "queue": 0.2}
+    assert snapshot["signal"] == 0.5 and snapshot["in_flight"] == 4
+    assert snapshot["queue_depth"] == round(4 / 10 * 0.02, 3)
+
+    # Connections now take 200ms each: the pool wait part leads, whatever the CPU does
+    for _ in range(4):
+        monitor.finished()
+    pool.pool_stats.released()
+    pool.pool_stats.released()
+    pool.pool_stats.acquired(0.2)
+    pool.pool_stats.released()
+    clock.now += 10
+    snapshot = monitor.snapshot()
+    assert snapshot["parts"]["pool_wait"] == 4.0 and snapshot["signal"] == 4.0
+    assert snapshot["parts"]["concurrency"] == 0.0 and snapshot["window_seconds"] == 10
+
+def test_queue_part_is_left_out_without_a_target():
+    clock = FakeClock()
+    monitor = LoadMonitor(lambda: [], target_concurrency=8, target_queue_ms=0, window_seconds=10, clock=clock)
+    monitor.started()
+    clock.now += 10
+    snapshot = monitor.snapshot()
+    assert set(snapshot["parts"]) == {"concurrency", "pool", "pool_wait"}
+    assert snapshot["signal"] == 0.125 and snapshot["queue_ms"] == 0.0
+
+def test_queue_time_from_request_start_header():
+    now = 1_700_000_000.0
+    assert queue_seconds("t=1699999999.75", now) == 0.25
+    assert queue_seconds("t=1699999999750", now) == 0.25
+    assert queue_seconds("t=1699999999750000", now) == 0.25
+    assert queue_seconds("1700000001", now) == 0.0
+    assert queue_seconds("garbage", now) is None and queue_seconds(None, now) is None
+
+def test_slow_database_raises_the_signal_while_cpu_is_idle(database, make_app):
+    def slow_connect(**kwargs):
+        time.sleep(0.1)  # a connect stuck behind a saturated database
+        return database.connect(**kwargs)
+    db = DatabaseConnection(database.config(), pool_size=1, connect=slow_connect, dialect="sqlite")
+    app = make_app(db=db, load_target_pool_wait_ms=20)
+
+    def client_loop():
+        client = app.test_client()
+        for _ in range(3):
+            client.get("/api/bookings", headers={REQUEST_START_HEADER: f"t={time.time() - 0.01:.3f}"})
+    threads = [threading.Thread(target=client_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    client = app.test_client()
+    snapshot = client.get("/api/metrics/load").get_json()
+    # Four clients share one pooled connection, so the overflow waits on slow connects
+    assert snapshot["pool"]["opened"] >= 4 and snapshot["pool"]["wait_ms"] > 20
+    assert snapshot["parts"]["pool_wait"] > 1
+    assert snapshot["signal"] == max(snapshot["parts"].values())
+    assert snapshot["parts"]["queue"] > 0 and snapshot["in_flight"] == 0
+    assert snapshot["requests_per_second"] > 0
+
+    text = client.get("/api/metrics/load?format=prometheus")
+    assert text.mimetype == "text/plain"
+    assert "# TYPE lookmyshow_load_signal gauge" in text.get_data(as_text=True)
+    assert 'lookmyshow_load_part{part="pool_wait"}' in text.get_data(as_text=True)
+
+def test_prometheus_text_has_every_gauge():
+    clock = FakeClock()
+    monitor = LoadMonitor(lambda: [], clock=clock)
+    clock.now += 1
+    lines = prometheus_text(monitor.snapshot()).splitlines()
+    assert "lookmyshow_load_signal 0" in lines and "lookmyshow_db_pool_size 0" in lines
@@ -0,0 +1,71 @@
+"""
+Tests for the load generator
+Runs a short closed-model load against the API on a SQLite stand-in database; the open model runs on a fake clock
+"""
+
+from types import SimpleNamespace
+import pytest
+from loadtest import LatencyHistogram, LoadRunner, Workload, parse_mix, start_local_server
+
+@pytest.fixture(scope="module")
+def local_server():
+    base_url, stop = start_local_server(pool_size=4)
+    yield base_url
+    stop()
+
+def test_histogram_percentiles_are_within_bucket_precision():
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000.0)
+
+    assert histogram.total == 1000
+    for pct, expected in ((50, 500), (95, 950), (99, 990), (99.9, 999)):
+        # The top of the bucket: never below the true value, at most one bucket above it
+        assert expected <= histogram.percentile(pct) <= expected * (1 + 2 ** -6)
+    assert histogram.percentile(100) == 1000
+
+def test_histogram_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.001)
+    b.record(0.100)
+    a.merge(b)
+    assert a.total == 2
+    assert a.percentile(100) == pytest.approx(100, rel=0.01)
+
+def test_parse_mix():
+    assert parse_mix("events=5, booking=1") == {"events": 5, "booking": 1}
+    with pytest.raises(ValueError):
+        Workload("http://localhost", {"nope": 1}, [1])
+
+def test_closed_model_against_local_server(local_server):
+    workload = Workload(local_server, parse_mix("events=3,event=3,booking=2,user=2"), [1, 2, 3], seed=7)
+    report = LoadRunner(workload, concurrency=4, duration=1.0).run().report()
+
+    assert report["model"] == "closed"
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert set(report["endpoints"]) == {"events", "event", "booking", "user"}
+    assert report["total"]["p50_ms"] <= report["total"]["p99_ms"] <= report["total"]["p999_ms"]
+
+class FakeClock:
+    """Time that only moves when the runner sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+def test_open_model_holds_arrival_rate():
+    workload = Workload("http://localhost", parse_mix("events=1"), [1], seed=7)
+    workload.operations["events"] = lambda session: SimpleNamespace(status_code=200)
+    clock = FakeClock()
+    report = LoadRunner(workload, concurrency=4, duration=60.0, rate=50, clock=clock, sleep=clock.sleep).run().report()
+
+    assert report["model"] == "open"
+    assert report["total"]["errors"] == 0
+    assert report["total"]["requests"] == pytest.approx(50 * 60, rel=0.05)
+    assert 59.9 < report["duration_s"] <= 60.0
@@ -0,0 +1,77 @@
+"""
+Tests for queued JSON logging and per-call-site rate limiting
+"""
+
+import io
+import json
+import logging
+import time
+import pytest
+import log_setup
+from log_setup import DroppingQueueHandler, JsonFormatter, RateLimitFilter
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    log_setup.stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+def _record(msg, *args, level=logging.ERROR):
+    return logging.LogRecord("services", level, __file__, 1, msg, args, None)
+
+def test_rate_limit_passes_burst_then_samples_and_reports_suppressed():
+    now = [0.0]
+    limit = RateLimitFilter(burst=3, window=60, sample_every=5, clock=lambda: now[0])
+    passed = [limit.filter(_record("Error retrieving event %s: %s", i, "timeout")) for i in range(12)]
+    assert passed == [True] * 3 + [False] * 4 + [True] + [False] * 4
+    assert limit.suppressed == 8
+
+    now[0] = 61.0
+    record = _record("Error retrieving event %s: %s", 99, "timeout")
+    assert limit.filter(record)
+    assert record.suppressed == 4
+
+def test_rate_limit_keys_on_unformatted_message():
+    limit = RateLimitFilter(burst=1, window=60)
+    assert limit.filter(_record("Database connection error: %s", "refused"))
+    assert not limit.filter(_record("Database connection error: %s", "reset"))
+    assert limit.filter(_record("Error creating booking: %s", "refused"))
+
+def test_json_formatter_emits_cloud_logging_fields():
+    record = _record("Error in %s: %s", "get_events", "boom")
+    record.suppressed = 7
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["severity"] == "ERROR"
+    assert entry["message"] == "Error in get_events: boom"
+    assert entry["suppressed"] == 7
+
+def test_full_queue_drops_instead_of_blocking():
+    import queue
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(_record("spam %s", i))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+def test_slow_output_does_not_slow_the_logging_thread(restore_root_logger):
+    class SlowStream(io.StringIO):
+        def write(self, text):
+            time.sleep(0.05)
+            return super().write(text)
+
+    stream = SlowStream()
+    log_setup.configure_logging(burst=1000, stream=stream)
+    logger = logging.getLogger("booking")
+
+    started = time.perf_counter()
+    for i in range(20):
+        logger.error("Booking %d failed: %s", i, "database unavailable")
+    assert time.perf_counter() - started < 0.05
+
+    log_setup.stop_logging()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [entry["message"] for entry in lines][-1] == "Booking 19 failed: database unavailable"
+    assert len(lines) == 20
@@ -0,0 +1,67 @@
+"""
+Tests for the migration runner and the EXPLAIN index-coverage check (SQLite stand-in)
+"""
+
+import sqlite3
+import pytest
+from data_access import DatabaseConnection
+from local_db import LocalConnection, LocalDatabase
+from migrate import MigrationRunner, check_index_coverage, split_statements
+
+@pytest.fixture
+def database(tmp_path):
+    return LocalDatabase(str(tmp_path / "lookmyshow.db"))
+
+def _seed_bookings(db, count):
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO bookings (event_id, user_email) VALUES (%s, %s)",
+            [(i % 5 + 1, f"user{i}@lookmyshow.com") for i in range(count)]
+        )
+        conn.commit()
+
+def test_split_statements_ignores_comments():
+    sql = "-- a comment; with a semicolon\nCREATE INDEX a ON t (x);\n\nDROP INDEX b ON t;\n"
+    assert split_statements(sql) == ["CREATE INDEX a ON t (x)", "DROP INDEX b ON t"]
+
+def test_all_migrations_applied_and_rerun_is_a_noop(database):
+    runner = MigrationRunner(database.connection_manager())
+    assert [state for _, state in runner.status()] == ["applied"] * len(runner.discover())
+    assert runner.up() == []
+
+def test_database_created_from_schema_sql_is_adopted(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE events (id INTEGER PRIMARY KEY, title TEXT, date DATE, location TEXT, description TEXT);
+        CREATE TABLE bookings (id INTEGER PRIMARY KEY, event_id INT, user_email TEXT, timestamp TIMESTAMP);
+        CREATE INDEX idx_user_email ON bookings(user_email);
+        CREATE INDEX idx_timestamp ON bookings(timestamp);
+        CREATE INDEX idx_bookings_email_event ON bookings(user_email, event_id);
+    """)
+    conn.close()
+
+    runner = MigrationRunner(DatabaseConnection(connect=lambda **kwargs: LocalConnection(path), dialect="sqlite"))
+    applied = [m.version for m in runner.up()]
+    assert applied[0] == "0002"
+    assert "0001" not in applied
+    assert [state for _, state in runner.status()] == ["applied"] * len(runner.discover())
+
+def test_repository_queries_use_indexes(database):
+    db = database.connection_manager()
+    _seed_bookings(db, 1500)
+    assert check_index_coverage(db, min_rows=1000) == []
+
+def test_missing_covering_index_is_reported(database):
+    db = database.connection_manager()
+    _seed_bookings(db, 1500)
+    with db.get_connection() as conn:
+        conn.cursor().execute("DROP INDEX idx_bookings_user_ts")
+        conn.commit()
+
+    problems = check_index_coverage(db, min_rows=1000)
+    assert [(p.query, p.table) for p in problems] == [("BookingRepository.get_bookings_by_email", "bookings")]
+
+def test_small_tables_are_ignored(database):
+    assert check_index_coverage(database.connection_manager(), min_rows=1000) == []
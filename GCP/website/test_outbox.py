@@ -0,0 +1,113 @@
+"""
+Tests for the booking outbox and its worker, against the SQLite stand-in
+"""
+
+import random
+import pytest
+from data_access import BOOKING_CREATED, BookingRepository, OutboxRepository
+from local_db import LocalDatabase
+from models import QueuePass
+from outbox_worker import OutboxWorker
+
+@pytest.fixture
+def db(tmp_path):
+    return LocalDatabase(str(tmp_path / "lookmyshow.db")).connection_manager()
+
+def _worker(db, handlers, **kwargs):
+    clock = kwargs.pop("clock", None) or [1000.0]
+    worker = OutboxWorker(OutboxRepository(db), handlers, rng=random.Random(1), clock=lambda: clock[0], **kwargs)
+    return worker, clock
+
+def test_booking_and_outbox_message_commit_together(db):
+    bookings = BookingRepository(db)
+    assert bookings.create_booking(1, "fan@lookmyshow.com")
+
+    messages = OutboxRepository(db).claim(10, lease_seconds=30)
+    assert [m.topic for m in messages] == [BOOKING_CREATED]
+    assert messages[0].payload == {"booking_id": bookings.get_all_bookings()[0].id,
+                                   "event_id": 1, "user_email": "fan@lookmyshow.com"}
+
+def test_failed_booking_insert_leaves_no_message(db):
+    with db.get_connection() as conn:
+        conn.cursor().execute("CREATE UNIQUE INDEX uniq_email ON bookings (user_email)")
+        conn.commit()
+    bookings = BookingRepository(db)
+    assert bookings.create_booking(1, "fan@lookmyshow.com")
+    assert not bookings.create_booking(2, "fan@lookmyshow.com")
+    assert OutboxRepository(db).stats()["pending"] == 1
+
+def test_worker_delivers_in_batches_and_reports_throughput_and_lag(db):
+    for i in range(5):
+        BookingRepository(db).create_booking(1, f"fan{i}@lookmyshow.com")
+    received = []
+    worker, clock = _worker(db, {BOOKING_CREATED: [received.append]}, batch_size=2)
+    clock[0] = 10 ** 10
+
+    assert [worker.run_once() for _ in range(4)] == [2, 2, 1, 0]
+    assert [p["user_email"] for p in received] == [f"fan{i}@lookmyshow.com" for i in range(5)]
+    stats = OutboxRepository(db).stats(now=clock[0])
+    assert stats["pending"] == 0 and stats["done"] == 5
+    metrics = worker.metrics()
+    assert metrics["batches"] == 3 and metrics["delivered"] == 5
+    assert metrics["max_delivery_lag_s"] > 0
+
+def test_failures_back_off_then_succeed_or_go_dead(db):
+    repository = OutboxRepository(db)
+    with db.get_connection() as conn:
+        repository.enqueue(conn.cursor(), "flaky", {"n": 1}, now=0)
+        repository.enqueue(conn.cursor(), "broken", {"n": 2}, now=0)
+        conn.commit()
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) < 3:
+            raise ConnectionError("smtp down")
+
+    def broken(payload):
+        raise ValueError("bad payload")
+
+    worker, clock = _worker(db, {"flaky": [flaky], "broken": [broken]}, max_attempts=3, base_backoff=10)
+    clock[0] = 100.0
+    for _ in range(10):
+        worker.run_once()
+        clock[0] += 60  # past any backoff or lease
+
+    assert len(calls) == 3
+    stats = repository.stats(now=clock[0])
+    assert (stats["done"], stats["dead"], stats["pending"]) == (1, 1, 0)
+    assert worker.metrics()["dead"] == 1
+
+def test_unacknowledged_batch_is_redelivered_after_lease(db):
+    BookingRepository(db).create_booking(1, "fan@lookmyshow.com")
+    repository = OutboxRepository(db)
+    now = 10 ** 10
+    assert len(repository.claim(10, lease_seconds=30, now=now)) == 1  # worker dies here
+    assert repository.claim(10, lease_seconds=30, now=now + 10) == []
+    assert len(repository.claim(10, lease_seconds=30, now=now + 31)) == 1
+
+def test_message_without_handler_is_retried(db):
+    BookingRepository(db).create_booking(1, "fan@lookmyshow.com")
+    worker, clock = _worker(db, {})
+    clock[0] = 10 ** 10
+    worker.run_once()
+    assert worker.failed == 1
+    assert OutboxRepository(db).stats(now=clock[0])["pending"] == 1
+
+def test_worker_prunes_expired_queue_passes_on_schedule(db):
+    bookings = BookingRepository(db)
+    assert bookings.create_booking(1, "fan@lookmyshow.com", QueuePass("a1b2c3", 1, 900.0))
+    assert bookings.create_booking(1, "other@lookmyshow.com", QueuePass("d4e5f6", 1, 2000.0))
+    worker, clock = _worker(db, {}, prune_passes=bookings.prune_queue_passes, prune_every=300.0)
+
+    assert worker.maintain() == 1
+    assert worker.maintain() == 0  # not due yet
+    clock[0] = 2400.0
+    assert worker.maintain() == 1
+
+def test_failed_prune_is_logged_and_retried_later(db, caplog):
+    def broken(now):
+        raise RuntimeError("database is away")
+    worker, clock = _worker(db, {}, prune_passes=broken, prune_every=300.0)
+    assert worker.maintain() == 0
+    assert "Pruning queue passes failed: database is away" in caplog.text
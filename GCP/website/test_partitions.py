@@ -0,0 +1,132 @@
+"""
+Tests for bookings partition planning and transparent reads of archived partitions
+"""
+
+from datetime import date, datetime
+import pytest
+import partitions
+from booking_archive import BookingArchive
+from data_access import BookingRepository
+from local_db import LocalDatabase
+from partitions import Partition, archivable_partitions, archive_partition, plan_future_partitions
+
+DECEMBER = Partition("p202412", datetime(2025, 1, 1), 2)
+
+def _book(db, event_id: int, email: str, timestamp: str):
+    with db.get_connection() as conn:
+        conn.cursor().execute("INSERT INTO bookings (event_id, user_email, timestamp) VALUES (%s, %s, %s)",
+                              (event_id, email, timestamp))
+        conn.commit()
+
+def _timestamps(db) -> list:
+    def fetch(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT timestamp FROM bookings ORDER BY timestamp")
+        return [row[0].strftime("%Y-%m-%d") for row in cursor.fetchall()]
+    return db.read(fetch)
+
+@pytest.fixture
+def history(tmp_path):
+    """Bookings in November, December and January"""
+    db = LocalDatabase(str(tmp_path / "lookmyshow.db")).connection_manager()
+    _book(db, 1, "nov@lookmyshow.com", "2024-11-30 23:59:59")
+    _book(db, 1, "fan@lookmyshow.com", "2024-12-01 00:00:00")
+    _book(db, 2, "other@lookmyshow.com", "2024-12-20 10:00:00")
+    _book(db, 2, "jan@lookmyshow.com", "2025-01-01 00:00:00")
+    return db
+
+def test_plan_splits_future_partition_by_month():
+    partitions = [Partition("p_history", datetime(2025, 1, 1), 10), Partition("p_future", None, 0)]
+    statement = plan_future_partitions(partitions, today=date(2025, 2, 14), months_ahead=1)
+
+    assert statement.startswith("ALTER TABLE bookings REORGANIZE PARTITION p_future INTO")
+    assert "PARTITION p202501 VALUES LESS THAN (UNIX_TIMESTAMP('2025-02-01 00:00:00'))" in statement
+    assert "PARTITION p202502 VALUES LESS THAN (UNIX_TIMESTAMP('2025-03-01 00:00:00'))" in statement
+    assert "PARTITION p202503 VALUES LESS THAN (UNIX_TIMESTAMP('2025-04-01 00:00:00'))" in statement
+    assert "p202504" not in statement
+    assert statement.rstrip(")\n").endswith("PARTITION p_future VALUES LESS THAN MAXVALUE")
+
+def test_plan_is_noop_when_partitions_reach_far_enough():
+    partitions = [Partition("p202504", datetime(2025, 5, 1), 0), Partition("p_future", None, 0)]
+    assert plan_future_partitions(partitions, today=date(2025, 2, 14), months_ahead=2) is None
+
+def test_plan_requires_partitioned_table():
+    with pytest.raises(ValueError):
+        plan_future_partitions([], today=date(2025, 2, 14))
+
+def test_archived_bookings_are_read_only_when_asked(tmp_path):
+    database = LocalDatabase(str(tmp_path / "lookmyshow.db"))
+    archive = BookingArchive(str(tmp_path / "archive"))
+    archive.write_partition("p202412", "2025-01-01T00:00:00", [
+        {"id": 2, "event_id": 1, "user_email": "fan@lookmyshow.com",
+         "timestamp": datetime(2024, 12, 20, 10, 0), "event_title": "Coldplay Concert"},
+        {"id": 1, "event_id": 2, "user_email": "other@lookmyshow.com",
+         "timestamp": datetime(2024, 12, 1, 9, 0), "event_title": "Comedy Night"},
+    ])
+    repository = BookingRepository(database.connection_manager(), archive)
+    repository.create_booking(3, "fan@lookmyshow.com")
+
+    assert [b.id for b in repository.get_all_bookings()] == [1]
+    assert [b.id for b in repository.get_all_bookings(include_archived=True)] == [1, 2, 1]
+
+    mine = repository.get_bookings_by_email("fan@lookmyshow.com", include_archived=True)
+    assert [(b.event_id, b.timestamp.year) for b in mine][1:] == [(1, 2024)]
+    assert mine[1].to_dict(["event_title", "timestamp"]) == {
+        "event_title": "Coldplay Concert", "timestamp": "2024-12-20T10:00:00"}
+
+def test_archived_bookings_newer_than_live_ones_are_merged_in_order(tmp_path, history):
+    # January was archived while December, with an upcoming event, stayed live
+    archive = BookingArchive(str(tmp_path / "archive"))
+    archive.write_partition("p202502", "2025-03-01T00:00:00", [
+        {"id": 9, "event_id": 1, "user_email": "fan@lookmyshow.com",
+         "timestamp": datetime(2025, 2, 10, 12, 0), "event_title": "Coldplay Concert"}])
+    repository = BookingRepository(history, archive)
+
+    listing = repository.get_all_bookings(["user_email"], include_archived=True)
+    assert [b.timestamp.strftime("%Y-%m-%d") for b in listing] == [
+        "2025-02-10", "2025-01-01", "2024-12-20", "2024-12-01", "2024-11-30"]
+    assert repository.booking_rows(["id", "user_email"], include_archived=True)[:2] == [
+        (9, "fan@lookmyshow.com"), (4, "jan@lookmyshow.com")]
+    mine = repository.booking_rows(["id"], "fan@lookmyshow.com", include_archived=True)
+    assert mine == [(9,), (2,)]
+
+def test_rewriting_a_partition_replaces_its_manifest_entry(tmp_path):
+    archive = BookingArchive(str(tmp_path))
+    archive.write_partition("p202411", "2024-12-01T00:00:00", [])
+    archive.write_partition("p202412", "2025-01-01T00:00:00", [])
+    archive.write_partition("p202411", "2024-12-01T00:00:00", [])
+    assert [e["partition"] for e in archive.manifest()] == ["p202412", "p202411"]
+
+def test_archive_partition_exports_verifies_and_drops(tmp_path, history):
+    archive = BookingArchive(str(tmp_path / "archive"))
+    assert archive_partition(history, archive, DECEMBER, batch_size=1) == 2
+
+    assert archive.manifest()[0]["partition"] == "p202412"
+    assert [(b.user_email, b.event_title) for b in archive.bookings()] == [
+        ("other@lookmyshow.com", "Comedy Night"), ("fan@lookmyshow.com", "Coldplay Concert")]
+    # Only December was dropped
+    assert _timestamps(history) == ["2024-11-30", "2025-01-01"]
+
+def test_partition_is_kept_when_the_export_is_short(tmp_path, history):
+    class ShortArchive(BookingArchive):
+        def write_partition(self, partition, upper_bound, rows):
+            return super().write_partition(partition, upper_bound, list(rows)[1:])
+
+    with pytest.raises(RuntimeError, match="Archived 1 rows from p202412 but it holds 2"):
+        archive_partition(history, ShortArchive(str(tmp_path / "archive")), DECEMBER)
+    assert len(_timestamps(history)) == 4
+
+def test_only_finished_partitions_without_upcoming_events_are_archivable(history, monkeypatch):
+    layout = [Partition("p202411", datetime(2024, 12, 1), 1), DECEMBER,
+              Partition("p202501", datetime(2025, 2, 1), 1), Partition("p_future", None, 0)]
+    monkeypatch.setattr(partitions, "list_partitions", lambda db: layout)
+    assert [p.name for p in archivable_partitions(history, datetime(2025, 1, 15))] == ["p202411", "p202412"]
+
+    # A December booking for an event that hasn't happened yet keeps December in the hot table
+    with history.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO events (title, date, location) VALUES (%s, %s, %s)",
+                       ("Reunion Tour", "2099-01-01", "Mumbai, India"))
+        conn.commit()
+    _book(history, cursor.lastrowid, "early@lookmyshow.com", "2024-12-24 09:00:00")
+    assert [p.name for p in archivable_partitions(history, datetime(2025, 1, 15))] == ["p202411"]
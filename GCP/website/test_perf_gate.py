@@ -0,0 +1,52 @@
+"""
+Tests for the performance regression gate
+Runs the gate's measurement on a small seeded stand-in database
+"""
+
+import sqlite3
+from data_access import EventRepository
+from perf_gate import compare, measure, seed_bookings, seeded_database
+from services import BookingService
+
+MIX = {"events": 1, "event": 1, "booking": 1, "user": 1}
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT event_id, user_email, timestamp FROM bookings ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+def test_seeded_bookings_are_reproducible(tmp_path):
+    first = seeded_database(str(tmp_path / "a"), 500, 20, seed=7)
+    second = seeded_database(str(tmp_path / "b"), 500, 20, seed=7)
+    assert len(_rows(first)) == 500
+    assert _rows(first) == _rows(second)
+    assert len({email for _, email, _ in _rows(first)}) <= 20
+
+def test_compare_flags_each_regression():
+    baseline = {"throughput_rps": 100.0, "p99_ms": 10.0, "error_rate": 0.0, "queries_per_request": {"user": 1.0}}
+    current = {"throughput_rps": 70.0, "p99_ms": 16.0, "error_rate": 0.0, "queries_per_request": {"user": 2.0}}
+    failed = [c[0] for c in compare(current, baseline, 0.25, 0.5, 0.0) if not c[4]]
+    assert failed == ["throughput_rps", "p99_ms", "queries/user"]
+    assert all(c[4] for c in compare(baseline, baseline, 0.25, 0.5, 0.0))
+
+def test_gate_counts_queries_and_catches_n_plus_one(tmp_path, monkeypatch):
+    path = seeded_database(str(tmp_path), 2000, 50, seed=1)
+    before = measure(path, MIX, users=50, concurrency=2, duration=0.3, seed=1)
+    assert before["queries_per_request"] == {"events": 1.0, "event": 1.0, "booking": 3.0, "user": 1.0}
+    assert before["error_rate"] == 0.0
+
+    # Look up each booking's event separately: one extra query per booking
+    original = BookingService.get_user_bookings
+
+    def n_plus_one(self, user_email, fields=None, include_archived=False):
+        bookings = original(self, user_email, fields, include_archived)
+        for booking in bookings:
+            EventRepository(self.event_repository.db).get_event_by_id(booking["event_id"])
+        return bookings
+    monkeypatch.setattr(BookingService, "get_user_bookings", n_plus_one)
+
+    after = measure(path, MIX, users=50, concurrency=2, duration=0.3, seed=1)
+    failed = [c[0] for c in compare(after, before, 1.0, 100.0, 0.0) if not c[4]]
+    assert failed == ["queries/user"]
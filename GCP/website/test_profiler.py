@@ -0,0 +1,83 @@
+"""
+Tests for the sampling profiler and its debug endpoints
+"""
+
+import threading
+import time
+import pytest
+from profiler import StackSampler
+from services import EventService
+
+TOKEN = "s3cret"
+
+def burn(seconds: float):
+    ends = time.perf_counter() + seconds
+    while time.perf_counter() < ends:
+        pass
+
+@pytest.fixture
+def app(make_app):
+    return make_app(profile_token=TOKEN)
+
+@pytest.fixture
+def slow_events(monkeypatch):
+    original = EventService.get_all_events
+
+    def get_all_events(self, fields=None):
+        burn(0.05)
+        return original(self, fields)
+    monkeypatch.setattr(EventService, "get_all_events", get_all_events)
+
+def test_sampler_collapses_stacks_and_ranks_functions():
+    worker = threading.Thread(target=burn, args=(0.3,))
+    worker.start()
+    sampler = StackSampler(interval=0.002, thread_id=worker.ident)
+    sampler.run(0.2)
+    worker.join()
+
+    report = sampler.report()
+    assert report["samples"] > 10 and report["threads"] == 1
+    assert report["top"]["self"][0]["function"].startswith("burn (test_profiler.py:")
+    stack, count = report["collapsed"].splitlines()[0].rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("burn ") and int(count) > 0
+
+def test_profile_endpoint_is_disabled_without_a_token(client):
+    assert client.get("/api/debug/profile?seconds=0").status_code == 404
+    # and no profiling hooks run for normal requests
+    assert "X-Profile-Id" not in client.get("/api/events", headers={"X-Debug-Profile": "x"}).headers
+
+def test_profile_endpoint_requires_the_token(app):
+    client = app.test_client()
+    assert client.get("/api/debug/profile?seconds=0", headers={"X-Debug-Token": "wrong"}).status_code == 403
+
+def test_window_profile_samples_request_threads(app, slow_events):
+    stop = threading.Event()
+
+    def traffic():
+        client = app.test_client()
+        while not stop.is_set():
+            client.get("/api/events")
+    worker = threading.Thread(target=traffic)
+    worker.start()
+    try:
+        report = app.test_client().get("/api/debug/profile?seconds=0.3&interval_ms=2",
+                                       headers={"X-Debug-Token": TOKEN}).get_json()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert report["samples"] > 0
+    assert "get_events (app.py:" in report["collapsed"]
+    # The profiling request's own thread is not sampled
+    assert "profile (app.py:" not in report["collapsed"]
+
+def test_request_profile_is_kept_under_its_id(app, slow_events):
+    client = app.test_client()
+    response = client.get("/api/events", headers={"X-Debug-Profile": TOKEN})
+    profile_id = response.headers["X-Profile-Id"]
+
+    report = client.get(f"/api/debug/profile/requests/{profile_id}", headers={"X-Debug-Token": TOKEN}).get_json()
+    assert report["request"] == "GET /api/events?"
+    assert report["threads"] == 1
+    assert any(row["function"].startswith("burn ") for row in report["top"]["self"])
+    assert "X-Profile-Id" not in client.get("/api/events", headers={"X-Debug-Profile": "wrong"}).headers
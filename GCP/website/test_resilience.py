@@ -0,0 +1,157 @@
+"""
+Tests for timeouts, retries and the circuit breaker in the data access layer
+A local TCP server stands in for a flapping Cloud SQL instance: it either drops
+every connection or accepts it and never answers.
+"""
+
+import logging
+import socket
+import threading
+import time
+import pytest
+from app import create_app
+from config import AppConfig, DatabaseConfig
+from data_access import TRANSIENT_ERRORS, BookingRepository, DatabaseConnection, EventRepository
+from resilience import CircuitBreaker, CircuitOpenError, UnavailableError, get_breaker, retry
+
+class FlakyServer:
+    """Accepts TCP connections and then drops ("drop") or ignores ("stall") them"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.accepted = 0
+        self._held = []
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(64)
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.accepted += 1
+            if self.mode == "drop":
+                conn.close()
+            else:
+                self._held.append(conn)
+
+    def close(self):
+        self._sock.close()
+        for conn in self._held:
+            conn.close()
+
+@pytest.fixture(params=["drop", "stall"])
+def flaky(request):
+    server = FlakyServer(request.param)
+    yield server
+    server.close()
+
+def _db(server, **overrides):
+    settings = dict(connect_timeout=1, read_timeout=1, read_retries=2, breaker_failures=100)
+    settings.update(overrides)
+    config = DatabaseConfig(host="127.0.0.1", user="root", password="", database=f"db{id(server)}",
+                            port=server.port, **settings)
+    return DatabaseConnection(config)
+
+def test_reads_time_out_and_are_retried(flaky):
+    started = time.monotonic()
+    with pytest.raises(UnavailableError) as raised:
+        EventRepository(_db(flaky)).get_all_events()
+
+    assert isinstance(raised.value.__cause__, TRANSIENT_ERRORS)
+    assert flaky.accepted == 3
+    assert time.monotonic() - started < 6
+
+def test_writes_are_not_retried(flaky):
+    with pytest.raises(UnavailableError):
+        BookingRepository(_db(flaky)).create_booking(1, "fan@lookmyshow.com")
+    assert flaky.accepted == 1
+
+def test_open_circuit_fails_fast_without_connecting():
+    server = FlakyServer("stall")
+    try:
+        db = _db(server, read_retries=0, breaker_failures=2)
+        repository = EventRepository(db)
+        for _ in range(2):
+            with pytest.raises(UnavailableError) as raised:
+                repository.get_all_events()
+            assert not isinstance(raised.value, CircuitOpenError)
+
+        started = time.monotonic()
+        with pytest.raises(CircuitOpenError):
+            repository.get_all_events()
+        assert time.monotonic() - started < 0.1
+        assert server.accepted == 2
+        assert db.breaker.snapshot()["state"] == "open"
+    finally:
+        server.close()
+
+def test_api_returns_503_and_health_reports_open_circuit():
+    server = FlakyServer("drop")
+    try:
+        db = _db(server, read_retries=0, breaker_failures=1)
+        client = create_app(AppConfig(database=db.config, warm_connections=False), db=db).test_client()
+
+        # Connect failures with the circuit still closed, then the open circuit: both are 503s
+        for _ in range(2):
+            response = client.get("/api/events")
+            assert response.status_code == 503
+            assert int(response.headers["Retry-After"]) >= 1
+        assert server.accepted == 1
+
+        response = client.post("/api/bookings", json={"event_id": 1, "user_email": "fan@lookmyshow.com"})
+        assert response.status_code == 503
+
+        health = client.get("/api/health").get_json()
+        assert health["status"] == "degraded"
+        assert health["database"]["circuit"]["state"] == "open"
+    finally:
+        server.close()
+
+def test_conflicting_breaker_settings_are_warned_about(caplog):
+    first = get_breaker("warn-test:3306/db", failure_threshold=3, reset_timeout=10)
+    with caplog.at_level(logging.WARNING, logger="resilience"):
+        assert get_breaker("warn-test:3306/db", failure_threshold=3, reset_timeout=10) is first
+        assert not caplog.records
+        assert get_breaker("warn-test:3306/db", failure_threshold=5, reset_timeout=10) is first
+    assert first.failure_threshold == 3
+    assert "ignoring 5" in caplog.text
+
+def test_half_open_trial_closes_or_reopens_circuit():
+    now = [0.0]
+    breaker = CircuitBreaker("db", failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 10.0
+    breaker.before_call()  # the single trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20.0
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_retry_backoff_is_jittered_and_bounded():
+    delays = []
+    calls = []
+
+    def flaky_op():
+        calls.append(1)
+        if len(calls) < 4:
+            raise TimeoutError()
+        return "ok"
+
+    assert retry(flaky_op, attempts=4, base_delay=0.1, max_delay=0.25, sleep=delays.append) == "ok"
+    assert len(delays) == 3
+    assert all(0 <= d <= cap for d, cap in zip(delays, (0.1, 0.2, 0.25)))
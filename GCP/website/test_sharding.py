@@ -0,0 +1,131 @@
+"""
+Tests for hash-sharded bookings against several SQLite stand-ins
+"""
+
+from datetime import datetime
+import pytest
+from config import DatabaseConfig, parse_shard_map
+from data_access import BookingRepository, shard_id_series, shard_index
+from local_db import LocalDatabase
+from reshard import reshard
+
+EMAILS = [f"fan{i}@lookmyshow.com" for i in range(12)]
+
+@pytest.fixture
+def shards(tmp_path):
+    return [LocalDatabase(str(tmp_path / f"shard{i}.db")).connection_manager(pool_size=2) for i in range(3)]
+
+def _count(db) -> int:
+    def fetch(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM bookings")
+        return cursor.fetchone()[0]
+    return db.read(fetch)
+
+def _insert(db, email: str, timestamp: str, event_id: int = 1, booking_id: int = None):
+    with db.get_connection() as conn:
+        if booking_id is None:
+            conn.cursor().execute("INSERT INTO bookings (event_id, user_email, timestamp) VALUES (%s, %s, %s)",
+                                  (event_id, email, timestamp))
+        else:
+            conn.cursor().execute("INSERT INTO bookings (id, event_id, user_email, timestamp) "
+                                  "VALUES (%s, %s, %s, %s)", (booking_id, event_id, email, timestamp))
+        conn.commit()
+
+def _ids(db) -> set:
+    def fetch(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM bookings")
+        return {row[0] for row in cursor.fetchall()}
+    return db.read(fetch)
+
+def test_shard_map_parses_hosts_ports_and_databases():
+    base = DatabaseConfig(host="main", user="app", password="secret", database="eventsdb")
+    shards = parse_shard_map("10.0.0.1:3307/bookings0, 10.0.0.2", base)
+    assert [(s.host, s.port, s.database, s.user) for s in shards] == [
+        ("10.0.0.1", 3307, "bookings0", "app"), ("10.0.0.2", 3306, "eventsdb", "app")]
+
+def test_user_bookings_live_on_one_shard(shards):
+    repository = BookingRepository(shards=shards)
+    for email in EMAILS:
+        assert repository.create_booking(2, email)
+
+    assert shard_index("Fan3@LookMyShow.com", 3) == shard_index("fan3@lookmyshow.com", 3)
+    for email in EMAILS:
+        owner = shards[shard_index(email, 3)]
+        assert [b.user_email for b in BookingRepository(owner).get_bookings_by_email(email)] == [email]
+        assert [b.event_title for b in repository.get_bookings_by_email(email)] == ["Comedy Night"]
+    assert all(_count(shard) > 0 for shard in shards)
+
+def test_global_listing_merges_shards_newest_first(shards):
+    for day, email in enumerate(EMAILS, start=1):
+        _insert(shards[shard_index(email, 3)], email, f"2025-01-{day:02d} 12:00:00")
+
+    bookings = BookingRepository(shards=shards).get_all_bookings(("user_email",))
+    assert [b.user_email for b in bookings] == EMAILS[::-1]
+    assert bookings[0].timestamp == datetime(2025, 1, 12, 12)
+
+def test_reshard_backfills_and_is_repeatable(tmp_path, shards):
+    legacy = LocalDatabase(str(tmp_path / "legacy.db")).connection_manager()
+    for day, email in enumerate(EMAILS, start=1):
+        _insert(legacy, email, f"2025-01-{day:02d} 12:00:00")
+    # Two tickets bought in the same second are two bookings, not one
+    _insert(legacy, EMAILS[1], "2025-01-02 12:00:00")
+    legacy_ids = _ids(legacy)
+
+    dry = reshard([legacy], shards, batch_size=5, dry_run=True)
+    assert (dry.scanned, dry.moved, _count(legacy)) == (13, 13, 13)
+
+    # A copy that landed before an interrupted run deleted its source row
+    first = EMAILS[0]
+    _insert(shards[shard_index(first, 3)], first, "2025-01-01 12:00:00", booking_id=1)
+
+    result = reshard([legacy], shards, batch_size=5)
+    assert (result.moved, result.already_copied, result.conflicts) == (13, 1, [])
+    assert _count(legacy) == 0
+    assert set().union(*(_ids(shard) for shard in shards)) == legacy_ids
+    assert sum(_count(shard) for shard in shards) == 13
+    assert len(BookingRepository(shards=shards).get_bookings_by_email(EMAILS[1])) == 2
+    assert reshard([legacy], shards).moved == 0
+
+    # Growing from three shards to four only moves the users whose owner changed
+    bigger = shards + [LocalDatabase(str(tmp_path / "shard3.db")).connection_manager()]
+    changed = sum(shard_index(e, 3) != shard_index(e, 4) for e in EMAILS + EMAILS[1:2])
+    assert reshard(shards, bigger).moved == changed
+    repository = BookingRepository(shards=bigger)
+    assert all(len(repository.get_bookings_by_email(e)) == (2 if e == EMAILS[1] else 1) for e in EMAILS)
+
+def test_booking_ids_stay_unique_across_shards_after_a_reshard(tmp_path):
+    databases = [LocalDatabase(str(tmp_path / f"shard{i}.db")) for i in range(3)]
+    shards = [db.connection_manager(pool_size=2, id_series=shard_id_series(i, 3)) for i, db in enumerate(databases)]
+    legacy = LocalDatabase(str(tmp_path / "legacy.db")).connection_manager()
+    for day, email in enumerate(EMAILS, start=1):
+        _insert(legacy, email, f"2025-01-{day:02d} 12:00:00")
+    reshard([legacy], shards)
+
+    repository = BookingRepository(shards=shards)
+    assert all(repository.create_booking(2, email) for email in EMAILS)
+    for index, shard in enumerate(shards):
+        new_ids = _ids(shard) - set(range(1, 13))
+        # Each shard allocates from its own series, above every id the reshard copied
+        assert new_ids and all(i > 12 and i % 3 == (index + 1) % 3 for i in new_ids)
+    all_ids = [i for shard in shards for i in _ids(shard)]
+    assert len(all_ids) == len(set(all_ids)) == 24
+
+def test_reshard_leaves_rows_whose_id_belongs_to_another_booking(tmp_path, shards):
+    legacy = LocalDatabase(str(tmp_path / "legacy.db")).connection_manager()
+    _insert(legacy, EMAILS[0], "2025-01-01 12:00:00")
+    _insert(shards[shard_index(EMAILS[0], 3)], "someone@else.com", "2025-01-05 12:00:00", booking_id=1)
+
+    result = reshard([legacy], shards)
+    assert result.conflicts == [1]
+    assert _count(legacy) == 1
+
+def test_api_reads_and_writes_through_shards(make_app, shards):
+    client = make_app(shards=shards).test_client()
+    for email in EMAILS[:4]:
+        assert client.post("/api/bookings", json={"event_id": 3, "user_email": email}).status_code == 201
+
+    assert len(client.get("/api/bookings?fields=id").get_json()) == 4
+    assert client.get(f"/api/bookings/user/{EMAILS[0]}").get_json()[0]["event_title"] == "Art Exhibition"
+    assert len(client.get("/api/health").get_json()["database"]["shards"]) == 3
@@ -0,0 +1,168 @@
+"""
+Tests for the cross-worker shared-memory cache
+Several local processes share one segment; only one of them may load from the "database"
+"""
+
+import multiprocessing
+import time
+import pytest
+import shared_cache
+from event_bus import EVENT_CHANGED
+from shared_cache import SharedSnapshot
+from services import EventService
+from models import Event
+
+CATALOG = [{"id": 1, "title": "Coldplay Concert"}, {"id": 2, "title": "Comedy Night"}]
+
+def _worker(path, loads, results):
+    cache = SharedSnapshot(path, ttl=60, slot_size=64 * 1024)
+
+    def loader():
+        with loads.get_lock():
+            loads.value += 1
+        time.sleep(0.2)
+        return CATALOG
+
+    results.put(cache.get(loader))
+    cache.close()
+
+def test_one_process_refreshes_and_all_workers_read_it(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    loads = ctx.Value("i", 0)
+    results = ctx.Queue()
+    path = str(tmp_path / "catalog.shm")
+
+    workers = [ctx.Process(target=_worker, args=(path, loads, results)) for _ in range(4)]
+    for p in workers:
+        p.start()
+    snapshots = [results.get(timeout=30) for _ in workers]
+    for p in workers:
+        p.join(timeout=30)
+
+    assert loads.value == 1
+    assert snapshots == [CATALOG] * 4
+
+def test_reader_sees_new_version_after_publish(tmp_path):
+    path = str(tmp_path / "catalog.shm")
+    writer = SharedSnapshot(path, slot_size=4096)
+    reader = SharedSnapshot(path, slot_size=4096)
+
+    assert reader.read() is None
+    writer.publish(CATALOG)
+    first = reader.read()
+    assert first == CATALOG
+    assert reader.read() is first  # unchanged version is not decoded again
+
+    writer.publish(CATALOG[:1])
+    assert reader.read() == CATALOG[:1]
+    assert reader.version == 2
+
+def _publisher(path, count):
+    cache = SharedSnapshot(path, slot_size=64 * 1024)
+    for n in range(1, count + 1):
+        # Payload length changes every time, so a torn header would cut the JSON short
+        cache.publish({"n": n, "pad": "x" * (n % 97)})
+    cache.close()
+
+def test_readers_never_see_a_torn_header_while_a_writer_publishes(tmp_path):
+    path = str(tmp_path / "catalog.shm")
+    reader = SharedSnapshot(path, slot_size=64 * 1024)
+    writer = multiprocessing.get_context("spawn").Process(target=_publisher, args=(path, 5000))
+    writer.start()
+    seen = 0
+    while writer.is_alive():
+        value = reader.read()
+        if value is not None:
+            # The decoded slot is the one the header's version names
+            assert value["n"] == reader._local_version >= seen
+            seen = value["n"]
+    writer.join(timeout=30)
+    assert seen > 0 and reader.read()["n"] == reader.version == 5000
+
+def test_copy_overwritten_by_two_publishes_during_a_read_is_retried(tmp_path):
+    path = str(tmp_path / "catalog.shm")
+    writer = SharedSnapshot(path, slot_size=4096)
+    reader = SharedSnapshot(path, slot_size=4096)
+    writer.publish(CATALOG)
+    copy = reader._copy
+    finish_header = []
+
+    def copy_during_two_publishes(slot, length):
+        if finish_header:
+            return copy(slot, length)
+        writer.publish({"n": 2})
+        # The second publish has rewritten the slot being read but not yet its header
+        write_header = writer._write_header
+        writer._write_header = lambda *fields: finish_header.append(lambda: write_header(*fields))
+        writer.publish({"n": 3, "pad": "x" * 100})
+        return copy(slot, length)
+
+    reader._copy = copy_during_two_publishes
+    assert reader.read() == {"n": 2}
+    finish_header[0]()
+    assert reader.read() == {"n": 3, "pad": "x" * 100}
+
+def test_header_mid_update_is_not_read_and_the_next_publish_recovers(tmp_path, monkeypatch):
+    path = str(tmp_path / "catalog.shm")
+    cache = SharedSnapshot(path, slot_size=4096)
+    cache.publish(CATALOG)
+    # A writer died between making the sequence odd and making it even again
+    seq = shared_cache._SEQ.unpack_from(cache._mm, shared_cache._SEQ_OFFSET)[0]
+    shared_cache._SEQ.pack_into(cache._mm, shared_cache._SEQ_OFFSET, seq + 1)
+    monkeypatch.setattr(shared_cache, "_HEADER_READ_ATTEMPTS", 10)
+
+    other = SharedSnapshot(path, slot_size=4096)
+    assert other.version == 0 and other.read() is None
+    assert other.get(lambda: CATALOG[:1]) == CATALOG[:1]
+    assert cache.version == 2 and cache.read() == CATALOG[:1]
+
+def test_expired_snapshot_is_refreshed_and_invalidate_forces_reload(tmp_path):
+    cache = SharedSnapshot(str(tmp_path / "catalog.shm"), ttl=60, slot_size=4096)
+    calls = []
+    loader = lambda: calls.append(1) or CATALOG
+
+    cache.get(loader)
+    cache.get(loader)
+    assert len(calls) == 1
+
+    cache.invalidate()
+    cache.get(loader)
+    assert len(calls) == 2
+
+def test_oversized_snapshot_falls_back_to_loader(tmp_path):
+    cache = SharedSnapshot(str(tmp_path / "catalog.shm"), slot_size=16)
+    assert cache.get(lambda: CATALOG) == CATALOG
+    assert cache.version == 0
+    with pytest.raises(ValueError):
+        cache.publish(CATALOG)
+
+def test_event_service_reads_through_the_snapshot(tmp_path):
+    class FakeRepository:
+        calls = 0
+        def get_all_events(self):
+            FakeRepository.calls += 1
+            return [Event(id=1, title="Coldplay Concert", date="2025-01-20", location="Mumbai, India")]
+
+    cache = SharedSnapshot(str(tmp_path / "catalog.shm"), ttl=60, slot_size=4096)
+    service = EventService(FakeRepository(), catalog_cache=cache)
+
+    assert service.get_all_events()[0]["title"] == "Coldplay Concert"
+    assert service.get_all_events()[0]["title"] == "Coldplay Concert"
+    assert FakeRepository.calls == 1
+
+def test_event_changed_invalidates_the_catalog_snapshot(tmp_path, db, make_app):
+    app = make_app(catalog_cache_ttl=600, catalog_cache_path=str(tmp_path / "catalog.shm"))
+    client = app.test_client()
+    assert client.get("/api/events").get_json()[0]["title"] == "Coldplay Concert"
+    with db.get_connection() as conn:
+        conn.cursor().execute("UPDATE events SET title = %s WHERE id = 1", ("Coldplay: Music of the Spheres",))
+        conn.commit()
+    assert client.get("/api/events").get_json()[0]["title"] == "Coldplay Concert"
+
+    app.extensions["lookmyshow"].events.publish(EVENT_CHANGED, {"event_id": 1})
+    assert client.get("/api/events").get_json()[0]["title"] == "Coldplay: Music of the Spheres"
+
+def test_cached_event_list_rejects_fields_the_snapshot_lacks(tmp_path, make_app):
+    client = make_app(catalog_cache_ttl=600, catalog_cache_path=str(tmp_path / "catalog.shm")).test_client()
+    assert client.get("/api/events?fields=id,title").get_json()[0] == {"id": 1, "title": "Coldplay Concert"}
+    assert client.get("/api/events?fields=description").status_code == 400
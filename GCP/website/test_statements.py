@@ -0,0 +1,117 @@
+"""
+Tests for the per-connection prepared statement cache
+"""
+
+import mysql.connector
+from mysql.connector.connection import MySQLConnection
+from data_access import (ER_UNKNOWN_STMT_HANDLER, BookingRepository, DatabaseConnection, EventRepository,
+                         StatementCache, StatementStats)
+from local_db import LocalConnection, LocalDatabase
+
+def _manager(database: LocalDatabase, pool_size: int = 1, cache_size: int = 32, connect=None) -> DatabaseConnection:
+    config = database.config()
+    config.statement_cache_size = cache_size
+    return DatabaseConnection(config, pool_size=pool_size, connect=connect or database.connect, dialect="sqlite")
+
+def test_hot_statements_are_prepared_once_per_connection(tmp_path):
+    db = _manager(LocalDatabase(str(tmp_path / "lookmyshow.db")))
+    events, bookings = EventRepository(db), BookingRepository(db)
+    for i in range(5):
+        assert events.get_event_by_id(1).title == "Coldplay Concert"
+        assert bookings.create_booking(2, f"fan{i}@lookmyshow.com")
+        assert len(bookings.get_bookings_by_email(f"fan{i}@lookmyshow.com")) == 1
+
+    stats = db.statement_stats.snapshot()
+    # Event lookup, booking insert, outbox insert and the by-email listing
+    assert stats["prepares"] == 4
+    assert stats["hits"] == 16
+    assert stats["hit_ratio"] == 0.8
+
+def test_cache_is_bounded_and_dropped_with_its_connection(tmp_path):
+    db = _manager(LocalDatabase(str(tmp_path / "lookmyshow.db")), cache_size=2)
+    events = EventRepository(db)
+    for fields in (("id",), ("title",), ("date",), ("id",)):
+        events.get_event_by_id(1, fields)
+    assert db.statement_stats.snapshot()["evictions"] == 2
+
+    # A connection that went away takes its statements with it
+    with db.get_connection() as conn:
+        conn.raw.close()
+    events.get_event_by_id(1, ("id",))
+    stats = db.statement_stats.snapshot()
+    assert stats["invalidations"] == 2
+    assert stats["prepares"] == 5
+
+def test_unpooled_connections_do_not_prepare(tmp_path):
+    db = _manager(LocalDatabase(str(tmp_path / "lookmyshow.db")), pool_size=0)
+    EventRepository(db).get_event_by_id(1)
+    assert db.statement_stats.snapshot()["prepares"] == 0
+
+def test_statement_unknown_to_the_server_is_prepared_again(tmp_path):
+    database = LocalDatabase(str(tmp_path / "lookmyshow.db"))
+    failures = []
+
+    class ForgetfulConnection(LocalConnection):
+        """Loses its prepared statements once, like a MySQL session reset"""
+
+        def cursor(self, dictionary: bool = False, **kwargs):
+            cursor = super().cursor(dictionary=dictionary)
+            execute = cursor.execute
+
+            def forget_once(operation, params=()):
+                if failures and not failures[-1]:
+                    failures[-1] = True
+                    raise mysql.connector.errors.DatabaseError(msg="Unknown prepared statement handler",
+                                                               errno=ER_UNKNOWN_STMT_HANDLER)
+                return execute(operation, params)
+            cursor.execute = forget_once
+            return cursor
+
+    db = _manager(database, connect=lambda **kwargs: ForgetfulConnection(database.path))
+    events = EventRepository(db)
+    events.get_event_by_id(1)
+    failures.append(False)
+    assert events.get_event_by_id(1).title == "Coldplay Concert"
+    assert failures == [True]
+    stats = db.statement_stats.snapshot()
+    assert (stats["prepares"], stats["invalidations"]) == (2, 1)
+
+def test_reused_statement_is_executed_without_a_reset_round_trip():
+    class Wire(MySQLConnection):
+        """The pure-Python driver with the protocol commands recorded instead of sent"""
+
+        def __init__(self):
+            super().__init__()
+            self.commands = []
+
+        def is_connected(self):
+            return True
+
+        def cmd_stmt_prepare(self, statement):
+            self.commands.append("prepare")
+            return {"statement_id": 1, "parameters": [None], "columns": []}
+
+        def cmd_stmt_reset(self, statement_id):
+            self.commands.append("reset")
+
+        def cmd_stmt_execute(self, statement_id, data=(), parameters=(), flags=0):
+            self.commands.append(("execute",) + tuple(data))
+            return {"affected_rows": 1, "insert_id": 0, "warning_count": 0, "status_flag": 0}
+
+    wire = Wire()
+    statements = StatementCache(8, StatementStats())
+    operation = "SELECT title FROM events WHERE id = %s"
+    for event_id in (1, 2, 3):
+        cursor, prepared = statements.get(wire, operation, dictionary=True)
+        cursor.execute(prepared, (event_id,))
+    assert wire.commands == ["prepare", "reset", ("execute", 1), ("execute", 2), ("execute", 3)]
+
+def test_executemany_on_a_prepared_cursor_runs_on_a_plain_one(tmp_path):
+    db = _manager(LocalDatabase(str(tmp_path / "lookmyshow.db")))
+    with db.get_connection() as conn:
+        cursor = conn.cursor(prepared=True)
+        cursor.executemany("INSERT INTO bookings (event_id, user_email) VALUES (%s, %s)",
+                           [(1, "a@lookmyshow.com"), (2, "b@lookmyshow.com")])
+        conn.commit()
+    assert len(BookingRepository(db).get_all_bookings()) == 2
+    assert db.statement_stats.snapshot()["prepares"] == 0
@@ -0,0 +1,101 @@
+"""
+Tests for request tracing across the app, service and repository layers
+"""
+
+import json
+import pytest
+from tracing import (BatchExporter, Exporter, FileExporter, RatioSampler, Tracer, activate, deactivate,
+                     parse_traceparent, span)
+
+CALLER_TRACE = "4bf92f3577b34da6a3ce929d0e0e4736"
+CALLER_SPAN = "00f067aa0ba902b7"
+
+@pytest.fixture
+def traced_app(make_app):
+    app = make_app(trace_exporter="memory", trace_sample_ratio=1.0)
+    return app.test_client(), app.extensions["lookmyshow"].tracer.exporter
+
+def test_booking_trace_covers_request_service_and_sql(traced_app):
+    client, exporter = traced_app
+    response = client.post("/api/bookings", json={"event_id": 1, "user_email": "fan@lookmyshow.com"})
+    assert response.status_code == 201
+
+    spans = exporter.trace(response.headers["X-Trace-Id"])
+    by_id = {s.span_id: s for s in spans}
+    root = next(s for s in spans if s.parent_id is None)
+    assert root.name == "POST /api/bookings"
+    assert root.attributes["http.status_code"] == 201
+
+    service = next(s for s in spans if s.name == "BookingService.create_booking")
+    assert service.parent_id == root.span_id
+    statements = [s.attributes["statement"] for s in spans if s.name == "sql"]
+    assert any(st.startswith("SELECT") for st in statements)
+    assert any(st.startswith("INSERT INTO bookings") for st in statements)
+    assert {by_id[s.parent_id].name for s in spans if s.name in ("sql", "db.acquire")} == {service.name}
+    assert {"db.acquire", "serialize"} <= {s.name for s in spans}
+
+def test_incoming_traceparent_is_continued(traced_app):
+    client, exporter = traced_app
+    response = client.get("/api/events", headers={"traceparent": f"00-{CALLER_TRACE}-{CALLER_SPAN}-01"})
+    assert response.headers["X-Trace-Id"] == CALLER_TRACE
+    root = next(s for s in exporter.trace(CALLER_TRACE) if s.name == "GET /api/events")
+    assert root.parent_id == CALLER_SPAN
+
+def test_unsampled_caller_records_nothing(traced_app):
+    client, exporter = traced_app
+    response = client.get("/api/events", headers={"traceparent": f"00-{CALLER_TRACE}-{CALLER_SPAN}-00"})
+    assert response.status_code == 200
+    assert "X-Trace-Id" not in response.headers
+    assert exporter.spans == []
+
+def test_exception_marks_span_as_error(traced_app):
+    client, exporter = traced_app
+    tracer = Tracer(exporter)
+    root = tracer.start_trace("job")
+    token = activate(root)
+    with pytest.raises(ZeroDivisionError):
+        with span("step"):
+            1 / 0
+    deactivate(token)
+    root.end()
+    step = next(s for s in exporter.spans if s.name == "step")
+    assert step.status == "error" and step.attributes["error.type"] == "ZeroDivisionError"
+
+def test_ratio_sampler_is_deterministic_per_trace():
+    sampler = RatioSampler(0.25)
+    ids = [f"{i:032x}" for i in range(0, 1 << 64, (1 << 64) // 1000)]
+    decisions = [sampler.should_sample("0" * 16 + i[16:]) for i in ids]
+    assert decisions == [sampler.should_sample("0" * 16 + i[16:]) for i in ids]
+    assert 200 <= sum(decisions) <= 300
+    assert not any(RatioSampler(0).should_sample(i) for i in ids)
+
+def test_traceparent_parsing_rejects_malformed_headers():
+    assert parse_traceparent(f"00-{CALLER_TRACE}-{CALLER_SPAN}-01") == (CALLER_TRACE, CALLER_SPAN, True)
+    assert parse_traceparent("00-xyz-00f067aa0ba902b7-01") is None
+    assert parse_traceparent(f"00-{'0' * 32}-{CALLER_SPAN}-01") is None
+    assert parse_traceparent(None) is None
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = FileExporter(str(path), flush_interval=0.05)
+    tracer = Tracer(exporter)
+    for name in ("a", "b"):
+        tracer.start_trace(name).end()
+    exporter.shutdown()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["a", "b"]
+    assert all(line["duration_ms"] >= 0 for line in lines)
+
+def test_exporters_must_implement_their_abstract_methods():
+    with pytest.raises(TypeError):
+        Exporter()
+    with pytest.raises(TypeError):
+        type("NoWrite", (BatchExporter,), {})()
+
+def test_create_app_flushes_the_exporter_at_exit(make_app, monkeypatch, tmp_path):
+    registered = []
+    monkeypatch.setattr("app.atexit.register", registered.append)
+    app = make_app(trace_exporter=f"file:{tmp_path / 'spans.jsonl'}")
+    exporter = app.extensions["lookmyshow"].tracer.exporter
+    assert registered == [exporter.shutdown]
+    exporter.shutdown()
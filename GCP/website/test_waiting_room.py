@@ -0,0 +1,159 @@
+"""
+Tests for the flash on-sale waiting room, including a simulated crowd
+"""
+
+import heapq
+from collections import Counter
+import pytest
+from data_access import BookingRepository, QueuePassUsed
+from local_db import LocalDatabase
+from models import QueuePass
+from waiting_room import TOKEN_HEADER, WaitingRoom, WaitingRoomError
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_simulated_on_sale_admits_in_order_at_the_configured_rate():
+    clock = FakeClock()
+    room = WaitingRoom([1], rate=100, burst=50, secret="s3cret", clock=clock)
+    opened = clock.now
+
+    # 20,000 virtual clients arrive over the first 2 seconds
+    clients, on_arrival = [], []
+    for i in range(20000):
+        clock.now = opened + i / 10000
+        joined = room.join(1)
+        clients.append(joined["token"])
+        on_arrival.append(joined["admitted"])
+    # The burst goes straight through; arrivals outpace the release rate after that
+    assert on_arrival[:60] == [True] * 50 + [False] * 10
+    assert sum(on_arrival) == 50
+
+    # Clients poll again when Retry-After says to and book as soon as they are admitted
+    polls = [(clock.now, i) for i in range(len(clients))]
+    heapq.heapify(polls)
+    booked_at, positions = {}, {}
+    while polls:
+        clock.now, i = heapq.heappop(polls)
+        status = room.status(1, clients[i])
+        assert status["position"] <= positions.get(i, status["position"])
+        positions[i] = status["position"]
+        if status["admitted"]:
+            room.admit(1, clients[i])
+            room.booked(1)
+            booked_at[i] = clock.now
+        else:
+            heapq.heappush(polls, (clock.now + max(1, min(30, int(status["wait_seconds"] / 4))), i))
+
+    # First come, first served, and never faster than the bucket allows
+    admit_at = [int(token.split(".")[1]) / 1000 for token in clients]
+    assert admit_at == sorted(admit_at)
+    per_second = Counter(int(t - opened) for t in admit_at)
+    assert per_second[0] == 50 + 100 and max(per_second.values()) <= 150
+    assert all(booked_at[i] >= admit_at[i] for i in booked_at)
+    # 20,000 clients at 100/s take 200 seconds to clear
+    assert 199 <= max(booked_at.values()) - opened <= 201
+    assert room.stats()["1"] == {"joined": 20000, "booked": 20000, "turned_away": 0, "waiting": 0}
+
+def test_tokens_are_signed_and_expire():
+    clock = FakeClock()
+    room = WaitingRoom([1, 2], rate=1, burst=1, secret="s3cret", admit_seconds=60, clock=clock)
+    first, second = room.join(1)["token"], room.join(1)["token"]
+
+    forged = second.replace(second.split(".")[1], str(int(clock.now * 1000)))
+    with pytest.raises(WaitingRoomError, match="Invalid"):
+        room.admit(1, forged)
+    with pytest.raises(WaitingRoomError, match="Invalid"):
+        room.status(1, first[:-1] + "\u00e9")
+    with pytest.raises(WaitingRoomError, match="another event"):
+        room.admit(2, first)
+    with pytest.raises(WaitingRoomError) as early:
+        room.admit(1, second)
+    assert (early.value.status_code, early.value.retry_after) == (429, 1)
+
+    # Single use is up to the booking transaction: the room hands out the same pass every time
+    queue_pass = room.admit(1, first)
+    assert queue_pass == room.admit(1, first)
+    assert (queue_pass.event_id, queue_pass.expires_at) == (1, clock.now + 60)
+
+    clock.now += 120
+    with pytest.raises(WaitingRoomError, match="expired"):
+        room.admit(1, second)
+    # Another worker with the same secret reads the same token
+    assert WaitingRoom([1], rate=1, secret="s3cret", clock=clock).status(1, second)["admitted"] is True
+
+@pytest.fixture
+def on_sale(db, make_app):
+    app = make_app(waiting_room_events=[1], waiting_room_rate=1, waiting_room_burst=1,
+                   waiting_room_secret="s3cret")
+    clock = FakeClock()
+    app.extensions["lookmyshow"].waiting_room._clock = clock
+    return app.test_client(), db, clock
+
+def _book(client, event_id: int, email: str, token=None):
+    headers = {TOKEN_HEADER: token} if token else {}
+    return client.post("/api/bookings", json={"event_id": event_id, "user_email": email}, headers=headers)
+
+def test_only_admitted_clients_reach_the_booking_service(on_sale):
+    client, db, clock = on_sale
+    assert _book(client, 1, "fan@lookmyshow.com").status_code == 403
+    # Events without a waiting room book as before
+    assert _book(client, 2, "fan@lookmyshow.com").status_code == 201
+
+    first = client.post("/api/waiting-room/1").get_json()
+    second = client.post("/api/waiting-room/1").get_json()
+    assert (first["admitted"], second["admitted"], second["position"]) == (True, False, 1)
+
+    queries = db.queries
+    polled = client.get("/api/waiting-room/1", headers={TOKEN_HEADER: second["token"]})
+    assert polled.get_json()["position"] == 1 and polled.headers["Retry-After"] == "1"
+    early = _book(client, 1, "late@lookmyshow.com", second["token"])
+    assert early.status_code == 429 and early.headers["Retry-After"] == "1"
+    # Joining, polling and turning clients away never touch the database
+    assert db.queries == queries
+
+    assert _book(client, 1, "early@lookmyshow.com", first["token"]).status_code == 201
+    assert _book(client, 1, "again@lookmyshow.com", first["token"]).status_code == 403
+    clock.now += 1
+    assert _book(client, 1, "late@lookmyshow.com", second["token"]).status_code == 201
+
+    health = client.get("/api/health").get_json()["waiting_room"]
+    assert health["1"]["booked"] == 2 and health["1"]["joined"] == 2
+
+def test_token_books_once_across_instances_sharing_the_secret(db, make_app):
+    settings = dict(waiting_room_events=[1], waiting_room_rate=1, waiting_room_burst=1, waiting_room_secret="s3cret")
+    first, second = make_app(**settings).test_client(), make_app(**settings).test_client()
+    token = first.post("/api/waiting-room/1").get_json()["token"]
+
+    assert _book(first, 1, "fan@lookmyshow.com", token).status_code == 201
+    again = _book(second, 1, "friend@lookmyshow.com", token)
+    assert again.status_code == 403 and again.get_json()["error"] == "Queue token already used"
+    assert _book(first, 1, "fan@lookmyshow.com", token).status_code == 403
+
+def test_passes_are_spent_on_the_first_shard(tmp_path):
+    shards = [LocalDatabase(str(tmp_path / f"shard{i}.db")).connection_manager(pool_size=2) for i in range(2)]
+    repository = BookingRepository(shards=shards)
+    other = next(f"fan{i}@lookmyshow.com" for i in range(20) if repository.shard_for(f"fan{i}@lookmyshow.com")
+                 is shards[1])
+    queue_pass = QueuePass("a1b2c3", 1, 1_700_000_300.0)
+
+    # Unknown event: the booking fails and the pass it took on shard 0 is handed back
+    assert repository.create_booking(999, other, queue_pass) is False
+    assert repository.create_booking(1, other, queue_pass) is True
+    with pytest.raises(QueuePassUsed):
+        repository.create_booking(1, "someone@lookmyshow.com", queue_pass)
+    assert repository.prune_queue_passes(now=1_700_000_301.0) == 1
+
+def test_failed_booking_gives_the_pass_back(on_sale):
+    client, db, clock = on_sale
+    token = client.post("/api/waiting-room/1").get_json()["token"]
+    assert _book(client, 1, "not-an-email", token).status_code == 400
+    assert _book(client, 1, "fan@lookmyshow.com", token).status_code == 201
+
+def test_waiting_room_is_off_by_default(client):
+    assert client.post("/api/waiting-room/1").status_code == 404
+    assert _book(client, 1, "fan@lookmyshow.com").status_code == 201
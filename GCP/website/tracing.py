@@ -0,0 +1,277 @@
+"""
+Lightweight request tracing
+A span per Flask request, per service method and per SQL statement, linked
+through W3C trace context (the ``traceparent`` header) so a slow booking can
+be broken down into connecting, the event lookup, the insert and serializing.
+Spans are only recorded inside a sampled request; everywhere else ``span()``
+is a no-op. Finished spans go to a file, an HTTP collector or memory (tests).
+"""
+
+import abc
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class Span:
+    """One timed operation in a trace"""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "sampled",
+                 "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 sampled: bool, attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error.type"] = type(error).__name__
+        self.attributes["error.message"] = str(error)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.sampled:
+                self.tracer.exporter.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.tracer.service,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class RatioSampler:
+    """Sample a fixed fraction of new traces, decided from the trace id
+
+    The decision is deterministic per trace id, so every service sampling at
+    the same ratio keeps the same traces.
+    """
+
+    def __init__(self, ratio: float):
+        self.ratio = min(max(ratio, 0.0), 1.0)
+        self._bound = int(self.ratio * (1 << 64))
+
+    def should_sample(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self._bound
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a traceparent header, or None if absent/invalid"""
+    match = TRACEPARENT.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+class Tracer:
+    """Starts root spans for incoming requests
+
+    A sampled flag in the incoming traceparent is honoured (parent-based
+    sampling); otherwise the sampler decides.
+    """
+
+    def __init__(self, exporter: "Exporter", sampler: Optional[RatioSampler] = None,
+                 service: str = "lookmyshow-api"):
+        self.exporter = exporter
+        self.sampler = sampler or RatioSampler(1.0)
+        self.service = service
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None,
+                    attributes: Optional[Dict[str, Any]] = None) -> Span:
+        parent = parse_traceparent(traceparent)
+        if parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = self.sampler.should_sample(trace_id)
+        return Span(self, name, trace_id, parent_id, sampled, attributes)
+
+def activate(span: Span):
+    """Make ``span`` the parent of spans started in this context; returns a reset token"""
+    return _current.set(span)
+
+def deactivate(token):
+    _current.reset(token)
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span (no-op outside a sampled trace)"""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    child = Span(parent.tracer, name, parent.trace_id, parent.span_id, True, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_exception(e)
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator form of span(), named after the method unless ``name`` is given"""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None or not parent.sampled:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class Exporter(abc.ABC):
+    """Receives finished, sampled spans"""
+
+    @abc.abstractmethod
+    def export(self, span: Span):
+        """Take one finished span; called on the request thread, so it must not block"""
+
+    def shutdown(self):
+        pass
+
+class InMemoryExporter(Exporter):
+    """Keeps spans in a list (tests, local debugging)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        return [s for s in self.spans if s.trace_id == trace_id]
+
+class BatchExporter(Exporter):
+    """Queues spans and writes them in batches from a background thread
+
+    A full queue drops spans rather than slowing the request down.
+    """
+
+    def __init__(self, batch_size: int = 256, flush_interval: float = 2.0, queue_size: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self.write(batch)
+                except Exception as e:
+                    logger.warning("Dropped %d spans: %s", len(batch), e)
+
+    @abc.abstractmethod
+    def write(self, batch: List[Dict[str, Any]]):
+        """Send one batch of span dicts; runs on the background thread"""
+
+    def shutdown(self):
+        """Flush what is queued and stop the background thread"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+class FileExporter(BatchExporter):
+    """Appends spans to a file as JSON lines"""
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        super().__init__(**kwargs)
+
+    def write(self, batch: List[Dict[str, Any]]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(s, default=str) + "\n" for s in batch))
+
+class HttpExporter(BatchExporter):
+    """POSTs batches of spans as a JSON array to a collector endpoint"""
+
+    def __init__(self, url: str, timeout: float = 5.0, **kwargs):
+        self.url = url
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def write(self, batch: List[Dict[str, Any]]):
+        request = urllib.request.Request(self.url, data=json.dumps(batch, default=str).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+def exporter_from_spec(spec: Optional[str]) -> Optional[Exporter]:
+    """'memory', 'http(s)://collector/...' or a file path ('file:' prefix optional); None disables tracing"""
+    if not spec:
+        return None
+    if spec == "memory":
+        return InMemoryExporter()
+    if spec.startswith(("http://", "https://")):
+        return HttpExporter(spec)
+    return FileExporter(spec[len("file:"):] if spec.startswith("file:") else spec)
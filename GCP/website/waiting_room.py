@@ -0,0 +1,155 @@
+"""
+Virtual waiting room for flash on-sales
+Clients joining the queue for a waiting-room event get a signed token that
+records when they will be admitted. Admission times are handed out like a
+token bucket: the first ``burst`` arrivals go straight through, everyone
+after is spaced 1/rate seconds apart in arrival order. The token carries
+everything needed to answer "where am I?" and "may I book?", so polling and
+the booking check are an HMAC verification, never a database query, and any
+worker sharing the secret can answer them. Single use is enforced by the
+database: the booking records the token's pass in the queue_passes table in
+its own transaction (see BookingRepository.create_booking).
+
+The bucket itself is per process: the overall admission rate is
+WAITING_ROOM_RATE times the number of serving processes.
+"""
+
+import base64
+import hmac
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+from models import QueuePass
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "X-Queue-Token"
+
+class WaitingRoomError(Exception):
+    """A booking or poll the waiting room turns away (status maps to the HTTP response)"""
+
+    def __init__(self, message: str, status_code: int = 403, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+@dataclass
+class Ticket:
+    event_id: int
+    admit_at: float
+    nonce: str
+
+class WaitingRoom:
+    """Queues bookings for ``event_ids`` and releases them at ``rate`` per second per event"""
+
+    def __init__(self, event_ids: Iterable[int], rate: float, burst: int = 1, secret: Optional[str] = None,
+                 admit_seconds: float = 300.0, clock: Callable[[], float] = time.time):
+        self.event_ids = frozenset(event_ids)
+        self.interval = 1.0 / rate
+        self.burst = max(1, burst)
+        if not secret:
+            logger.warning("WAITING_ROOM_SECRET is not set; queue tokens only work on the process that issued them")
+        self._secret = (secret or os.urandom(32).hex()).encode()
+        self.admit_seconds = admit_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Next free admission slot per event; a slot in the past means spare burst capacity
+        self._next_slot: Dict[int, float] = {}
+        self._counts = defaultdict(lambda: {"joined": 0, "booked": 0, "turned_away": 0})
+
+    def covers(self, event_id) -> bool:
+        return event_id in self.event_ids
+
+    def _sign(self, text: str) -> str:
+        # One-shot hmac.digest stays in C; polling verifies a token on every call
+        digest = hmac.digest(self._secret, text.encode(), "sha256")[:18]
+        return base64.urlsafe_b64encode(digest).decode()
+
+    def _encode(self, ticket: Ticket) -> str:
+        text = f"{ticket.event_id}.{int(ticket.admit_at * 1000)}.{ticket.nonce}"
+        return f"{text}.{self._sign(text)}"
+
+    def _decode(self, token: Optional[str]) -> Ticket:
+        try:
+            event_id, admit_ms, nonce, signature = (token or "").split(".")
+            # compare_digest only takes ASCII str, so compare bytes: other characters never match
+            expected = self._sign(f"{event_id}.{admit_ms}.{nonce}").encode()
+            if not hmac.compare_digest(signature.encode("ascii", "replace"), expected):
+                raise ValueError
+            return Ticket(int(event_id), int(admit_ms) / 1000.0, nonce)
+        except ValueError:
+            raise WaitingRoomError("Invalid queue token") from None
+
+    def join(self, event_id: int) -> Dict[str, object]:
+        """Take the next admission slot for ``event_id`` and return its token and position"""
+        if not self.covers(event_id):
+            raise WaitingRoomError("This event has no waiting room", 404)
+        now = self._clock()
+        with self._lock:
+            # Up to burst - 1 slots may lie in the past: that many arrivals are admitted at once
+            slot = max(self._next_slot.get(event_id, 0.0), now - (self.burst - 1) * self.interval)
+            self._next_slot[event_id] = slot + self.interval
+            self._counts[event_id]["joined"] += 1
+        ticket = Ticket(event_id, max(slot, now), os.urandom(6).hex())
+        return dict(self._describe(ticket, now), token=self._encode(ticket))
+
+    def _describe(self, ticket: Ticket, now: float) -> Dict[str, object]:
+        wait = max(0.0, ticket.admit_at - now)
+        return {
+            "event_id": ticket.event_id,
+            "admitted": wait == 0,
+            # Clients admitted before this one in the meantime, each 1/rate apart
+            "position": math.ceil(wait / self.interval),
+            "wait_seconds": round(wait, 1),
+            "expires_in": round(max(0.0, ticket.admit_at + self.admit_seconds - now), 1),
+        }
+
+    def status(self, event_id: int, token: Optional[str]) -> Dict[str, object]:
+        """Position in the queue, from the token alone"""
+        ticket = self._decode(token)
+        if ticket.event_id != event_id:
+            raise WaitingRoomError("Queue token is for another event")
+        return self._describe(ticket, self._clock())
+
+    def admit(self, event_id: int, token: Optional[str]) -> QueuePass:
+        """Check that ``token`` is admitted for ``event_id``; returns the pass the booking must spend"""
+        try:
+            if not token:
+                raise WaitingRoomError("This event is in a waiting room; join the queue first")
+            ticket = self._decode(token)
+            if ticket.event_id != event_id:
+                raise WaitingRoomError("Queue token is for another event")
+            now = self._clock()
+            if now < ticket.admit_at:
+                raise WaitingRoomError("Not admitted yet", 429, retry_after=math.ceil(ticket.admit_at - now))
+            expires = ticket.admit_at + self.admit_seconds
+            if now > expires:
+                raise WaitingRoomError("Queue token expired; join the queue again")
+            return QueuePass(ticket.nonce, event_id, expires)
+        except WaitingRoomError:
+            self.turned_away(event_id)
+            raise
+
+    def booked(self, event_id: int):
+        """Count a booking that spent its pass"""
+        with self._lock:
+            self._counts[event_id]["booked"] += 1
+
+    def turned_away(self, event_id: int):
+        """Count a refused booking (including a pass the database says was already spent)"""
+        with self._lock:
+            self._counts[event_id]["turned_away"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = self._clock()
+        with self._lock:
+            return {str(event_id): dict(
+                self._counts[event_id],
+                # Joined on this process and not admitted yet
+                waiting=max(0, math.ceil((self._next_slot.get(event_id, now) - now) / self.interval)),
+            ) for event_id in sorted(self.event_ids)}